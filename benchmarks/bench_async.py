@@ -0,0 +1,44 @@
+"""
+wall time of concurrent Invoices.aload uploads and the lag they cause to the event loop
+
+a ticker task sleeps 10ms in a loop, the lag is how late it wakes up while the pdfs are loaded
+
+    python benchmarks/bench_async.py [pages] [uploads] [corpus directory]
+"""
+import asyncio
+import sys
+import tempfile
+import time
+from io import BytesIO
+
+from invoice_parser import Invoices
+
+from corpus import pdf
+
+
+async def ticker(lags: list[float], interval: float = 0.01) -> None:
+    while True:
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append(time.perf_counter() - start - interval)
+
+
+async def main(path, uploads: int) -> None:
+    data = path.read_bytes()
+    for name, load in (('Invoices', lambda upload: asyncio.sleep(0, Invoices(upload))),
+                       ('Invoices.aload', lambda upload: Invoices.aload(upload))):
+        lags = []
+        tick = asyncio.create_task(ticker(lags))
+        await asyncio.sleep(0)
+        start = time.perf_counter()
+        results = await asyncio.gather(*(load(BytesIO(data)) for _ in range(uploads)))
+        seconds = time.perf_counter() - start
+        tick.cancel()
+        print(f"{name:>14}: {sum(len(r.invoices) for r in results)} invoices in {seconds:6.2f}s, "
+              f"event loop lag max {max(lags, default=seconds) * 1000:7.1f}ms")
+
+
+if __name__ == '__main__':
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    uploads = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    asyncio.run(main(pdf(n, sys.argv[3] if len(sys.argv) > 3 else tempfile.gettempdir()), uploads))
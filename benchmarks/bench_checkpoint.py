@@ -0,0 +1,35 @@
+"""
+seconds to parse a cumulative pdf in full and with a checkpoint, when a few pages are added to it
+
+the checkpoint is made on the first pages, then the whole pdf is parsed again with it
+
+    python benchmarks/bench_checkpoint.py [pages] [new pages]
+"""
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from invoice_parser import Invoices, Checkpoint
+
+from corpus import pages, write_pdf
+
+
+if __name__ == '__main__':
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 2_000
+    new = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    texts = pages(n)
+
+    with tempfile.TemporaryDirectory() as directory:
+        pdf = Path(directory) / 'export.pdf'
+        checkpoint = Checkpoint(Path(directory) / 'checkpoint.json')
+
+        write_pdf(pdf, texts[:n - new])
+        Invoices(pdf, checkpoint=checkpoint).commit_checkpoint()
+        write_pdf(pdf, texts)
+
+        for name, kwargs in (('full', {}), ('checkpoint', {'checkpoint': Checkpoint(checkpoint.path)})):
+            start = time.perf_counter()
+            invoices = Invoices(pdf, **kwargs)
+            print(f"{name:>10}: {len(invoices.invoices):6} invoices in {time.perf_counter() - start:7.3f}s, "
+                  f"from page {invoices.start_page + 1}")
@@ -0,0 +1,57 @@
+"""
+conformance and pages/sec of the text extraction backends
+
+every installed backend has to give InvoiceParser the same fields as PyPDF2 (the default) on each page
+of the corpus, backends which are not installed are skipped.
+exits with 1 if any backend does not conform
+
+    python benchmarks/bench_extractors.py [pages] [corpus directory]
+"""
+import sys
+import time
+import tempfile
+
+from invoice_parser import InvoiceParser
+from invoice_parser.extractors import EXTRACTORS
+from PyPDF2 import PdfReader
+
+from corpus import pdf
+
+
+def fields(text: str) -> tuple:
+    """fields of the invoice as parsed by InvoiceParser, None if the page is not an invoice"""
+    try:
+        invoice = InvoiceParser(text)
+    except Exception:
+        return None
+    return (invoice.invoice_no, invoice.date, invoice.sub_total, invoice.round_off, getattr(invoice, 'total', None),
+            invoice.gst, repr(invoice.items))
+
+
+def extract(name: str, path) -> tuple[list[str], float]:
+    """texts of all the pages and pages/sec of the backend"""
+    reader = PdfReader(path)
+    extractor = EXTRACTORS[name]().bind(reader)
+    start = time.perf_counter()
+    texts = [extractor.extract(index) for index in range(len(reader.pages))]
+    return texts, len(texts) / (time.perf_counter() - start)
+
+
+if __name__ == '__main__':
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000
+    path = pdf(n, sys.argv[2] if len(sys.argv) > 2 else tempfile.gettempdir())
+
+    texts, _ = extract('pypdf2', path)
+    expected = [fields(text) for text in texts]
+    failed = False
+    for name in EXTRACTORS:
+        try:
+            texts, rate = extract(name, path)
+        except ImportError as e:
+            print(f"{name:>9}: skipped, {e}")
+            continue
+        mismatches = [index for index, text in enumerate(texts) if fields(text) != expected[index]]
+        failed |= bool(mismatches)
+        print(f"{name:>9}: {rate:10,.0f} pages/sec  "
+              + (f"{len(mismatches)} pages differ, first {mismatches[0]}" if mismatches else "conforms"))
+    sys.exit(1 if failed else 0)
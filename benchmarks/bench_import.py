@@ -0,0 +1,67 @@
+"""
+import time of the package, each statement timed in a fresh interpreter
+
+'everything' imports all the modules, PyPDF2 and asyncio, as importing the package did before the imports were lazy.
+the other statements load only what they use, the heavy dependencies they loaded are listed.
+exits with 1 if a statement other than 'everything' loads a dependency it does not need (LAZY)
+
+    python benchmarks/bench_import.py [repeats]
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+STATEMENTS = {
+    'everything': 'import asyncio, PyPDF2, invoice_parser; '
+                  '[getattr(invoice_parser, name) for name in invoice_parser.__all__]',
+    'import invoice_parser': 'import invoice_parser',
+    'Round, GST': 'from invoice_parser import Round, GST',
+    'InvoiceParser': 'from invoice_parser import InvoiceParser',
+    'Invoices, CSVExport': 'from invoice_parser import Invoices, CSVExport',
+    'Export': 'from invoice_parser import Export',
+}
+
+HEAVY = ('PyPDF2', 'openpyxl', 'numpy', 'sqlite3', 'multiprocessing', 'asyncio')
+
+# dependencies each statement may load, the others should be imported only when they are used
+LAZY = {
+    'import invoice_parser': (),
+    'Round, GST': (),
+    'InvoiceParser': (),
+    'Invoices, CSVExport': (),
+    'Export': ('openpyxl', 'numpy'),  # openpyxl imports numpy itself when it is installed
+}
+
+TIMER = """
+import json, sys, time
+start = time.perf_counter()
+{}
+seconds = time.perf_counter() - start
+print(json.dumps([seconds, [name for name in {} if name in sys.modules]]))
+"""
+
+
+def measure(statement: str, repeats: int) -> tuple[float, list[str]]:
+    """median seconds of the statement and the heavy modules it imported"""
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path), PYTHONDONTWRITEBYTECODE='')
+    times, loaded = [], []
+    for _ in range(repeats):
+        output = subprocess.run([sys.executable, '-c', TIMER.format(statement, HEAVY)], env=env, check=True,
+                                capture_output=True, text=True).stdout
+        seconds, loaded = json.loads(output)
+        times.append(seconds)
+    return statistics.median(times), loaded
+
+
+if __name__ == '__main__':
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    failed = False
+    for name, statement in STATEMENTS.items():
+        seconds, loaded = measure(statement, repeats)
+        unexpected = [module for module in loaded if name in LAZY and module not in LAZY[name]]
+        failed |= bool(unexpected)
+        print(f"{name:>22}: {seconds * 1000:8.1f} ms  imports {', '.join(loaded) or 'none of ' + ', '.join(HEAVY)}"
+              + (f"  UNEXPECTED {', '.join(unexpected)}" if unexpected else ''))
+    sys.exit(1 if failed else 0)
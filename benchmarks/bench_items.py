@@ -0,0 +1,49 @@
+"""
+bytes and construction time of Item (with its GST, CGST and SGST), GST and MergedItems
+
+    python benchmarks/bench_items.py [items]
+"""
+import gc
+import random
+import sys
+import time
+import tracemalloc
+
+from invoice_parser.gst import GST
+from invoice_parser.items import Item, MergedItems
+
+
+def values(n: int, seed: int = 0) -> list[tuple]:
+    rng = random.Random(seed)
+    return [(i // 2, rng.choice(('gold', 'silver')), round(rng.uniform(1, 500), 3), round(rng.uniform(100, 100_000), 2))
+            for i in range(n)]
+
+
+def measure(func, n: int) -> tuple[float, float]:
+    """returns microseconds and bytes per object made by func"""
+    gc.collect()
+    start = time.perf_counter()
+    func()
+    seconds = time.perf_counter() - start
+
+    gc.collect()
+    tracemalloc.start()
+    objects = func()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del objects
+    return seconds / n * 1e6, size / n
+
+
+if __name__ == '__main__':
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    rows = values(n)
+    pairs = [rows[i:i + 2] for i in range(0, n, 2)]
+
+    for name, func, count in (
+            ('Item', lambda: [Item(*row) for row in rows], n),
+            ('GST', lambda: [GST(1.5, row[3]) for row in rows], n),
+            ('MergedItems', lambda: [MergedItems([Item(*row) for row in pair]) for pair in pairs], len(pairs)),
+    ):
+        us, size = measure(func, count)
+        print(f"{name:>12}: {us:8.2f} us {size:8.0f} bytes")
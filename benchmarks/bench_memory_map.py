@@ -0,0 +1,40 @@
+"""
+peak resident memory of Invoices with and without memory_map, on a process pool
+
+each mode runs in a fresh interpreter, the peak rss of the parent and of the largest worker is printed.
+without memory_map every worker reads the whole pdf into memory, with it the workers map the same file
+
+    python benchmarks/bench_memory_map.py [pages] [workers] [corpus directory]
+"""
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+from corpus import pdf
+
+
+def run(path: str, workers: int, memory_map: bool) -> None:
+    from invoice_parser import Invoices
+
+    start = time.perf_counter()
+    invoices = Invoices(path, parallel=workers, lazy=True, memory_map=memory_map)
+    count = sum(1 for _ in invoices)
+    seconds = time.perf_counter() - start
+    parent = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    print(f"memory_map={memory_map!s:>5}: {count} invoices in {seconds:6.2f}s, "
+          f"peak rss parent {parent / 1024:7.1f} MiB, largest worker {children / 1024:7.1f} MiB")
+
+
+if __name__ == '__main__':
+    if sys.argv[1] == '--run':
+        run(sys.argv[2], int(sys.argv[3]), sys.argv[4] == 'True')
+    else:
+        n = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+        workers = sys.argv[2] if len(sys.argv) > 2 else '4'
+        path = pdf(n, sys.argv[3] if len(sys.argv) > 3 else tempfile.gettempdir())
+        print(f"{path} {path.stat().st_size / 2 ** 20:.1f} MiB, {workers} workers")
+        for memory_map in (False, True):
+            subprocess.run([sys.executable, __file__, '--run', str(path), workers, str(memory_map)], check=True)
@@ -0,0 +1,48 @@
+"""
+pages/sec of InvoiceParser field extraction, before and after precompiled Patterns
+
+before: a findall/finditer per field on the pattern strings, going through the re module cache
+after: Patterns.scan, one sweep of the text with the precompiled scanner
+
+    python benchmarks/bench_parser.py [pages]
+"""
+import re
+import sys
+import time
+
+from invoice_parser import InvoiceParser, PATTERNS
+from invoice_parser.patterns import RE_INVOICE, RE_DATE, RE_SUBTOTAL, RE_GST, RE_ROUND, RE_TOTAL, RE_ITEM
+
+from corpus import pages
+
+
+def fields_before(text: str):
+    return (re.findall(RE_INVOICE, text)[0], re.findall(RE_DATE, text)[0], re.findall(RE_SUBTOTAL, text)[0],
+            [gst.groupdict() for gst in re.finditer(RE_GST, text)], re.findall(RE_ROUND, text),
+            re.findall(RE_TOTAL, text))
+
+
+def fields_after(text: str):
+    return PATTERNS.scan(text)
+
+
+def before(text: str):
+    return fields_before(text), [item.groupdict() for item in re.finditer(RE_ITEM, text)]
+
+
+def after(text: str):
+    return fields_after(text), PATTERNS.items(text)
+
+
+def rate(func, texts: list[str]) -> float:
+    start = time.perf_counter()
+    for text in texts:
+        func(text)
+    return len(texts) / (time.perf_counter() - start)
+
+
+if __name__ == '__main__':
+    texts = pages(int(sys.argv[1]) if len(sys.argv) > 1 else 10_000)
+    for name, func in (('fields before', fields_before), ('fields after', fields_after),
+                       ('before', before), ('after', after), ('InvoiceParser', InvoiceParser)):
+        print(f"{name:>14}: {rate(func, texts):,.0f} pages/sec")
@@ -0,0 +1,69 @@
+"""
+speed of Round.round, round_many and cached_round against the recursive Round.round they replace
+
+the corpus is generated from a seed: uniform amounts and quantities, exact halves at every decimal, values a few
+ulps around the halves, ints, negatives, zeros, tiny and huge numbers. tests/test_round.py checks every value of
+it rounds to the same result as before, at -1 to 6 decimals
+
+    python benchmarks/bench_round.py [values] [seed]
+"""
+import math
+import random
+import sys
+import timeit
+
+from invoice_parser.round import Round, cached_round, round_many
+
+
+def round_before(n, decimal=0):
+    # Round.round before it was rewritten
+    sign = 1 if abs(n) == n else -1
+    n = abs(n)
+    if decimal:
+        n = round_before(n * (10 ** decimal)) / (10 ** decimal)
+    elif n > 1 and n % int(n) >= 0.5:
+        n = math.ceil(n)
+    else:
+        n = math.ceil(n) if 1 > n >= 0.5 else math.floor(n)
+    return n * sign
+
+
+def corpus(n: int, seed: int = 0) -> list:
+    rng = random.Random(seed)
+    makers = (
+        lambda: rng.uniform(-1e6, 1e6),
+        lambda: round(rng.uniform(0, 500), rng.randint(0, 4)),  # quantities and amounts as printed
+        lambda: (rng.randint(-10 ** 6, 10 ** 6) + 0.5) / 10 ** rng.randint(0, 6),  # halves
+        lambda: math.nextafter((rng.randint(0, 10 ** 5) + 0.5) / 10 ** rng.randint(0, 4), rng.choice((0, math.inf))),
+        lambda: rng.randint(-10 ** 9, 10 ** 9),
+        lambda: rng.choice((0, 0.0, -0.0, 0.5, -0.5, 1, 1.0, 0.49999999999999994, 2 ** 53 + 1.0, -2 ** 60)),
+        lambda: rng.uniform(-1, 1) * 10 ** rng.randint(-12, 18),
+    )
+    return [rng.choice(makers)() for _ in range(n)]
+
+
+def measure(values: list, decimal: int) -> dict[str, float]:
+    """nanoseconds per value"""
+    memo = cached_round()
+    funcs = {
+        'before': lambda: [round_before(n, decimal) for n in values],
+        'Round.round': lambda: [Round.round(n, decimal) for n in values],
+        'cached_round': lambda: [memo(n, decimal) for n in values],
+        'round_many': lambda: round_many(values, decimal),
+    }
+    return {name: min(timeit.repeat(func, number=1, repeat=5)) / len(values) * 1e9 for name, func in funcs.items()}
+
+
+if __name__ == '__main__':
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    seed = int(sys.argv[2]) if len(sys.argv) > 2 else 0
+    values = corpus(n, seed)
+
+    # quantities of items, a few hundred distinct values repeated, as in an invoice pdf
+    rng = random.Random(seed)
+    quantities = [round(rng.uniform(1, 500), 3) for _ in range(500)]
+    for name, sample, decimal in (('corpus', values, 0), ('corpus', values, 3),
+                                  ('quantities', [rng.choice(quantities) for _ in range(n)], 3)):
+        times = measure(sample, decimal)
+        print(f"{name:>10} decimal {decimal}: " + '  '.join(f"{func} {ns:6.0f} ns" for func, ns in times.items())
+              + f"  ({times['before'] / times['Round.round']:.1f}x, {times['before'] / times['round_many']:.1f}x)")
@@ -0,0 +1,74 @@
+"""
+throughput and memory of InvoiceSegmenter on mixed layouts, and conformance with one invoice per page
+
+the invoices of the corpus are laid out as one per page, three per page, each split over two pages
+(the continuation page repeats the header) and as text cut into pages at random lines.
+every layout has to give InvoiceParser the same invoices as one per page.
+time per invoice stays flat and peak memory does not grow with the number of invoices.
+exits with 1 if any layout does not conform
+
+    python benchmarks/bench_segment.py [invoices ...]
+"""
+import random
+import sys
+import time
+import tracemalloc
+
+from invoice_parser import InvoiceParser
+from invoice_parser.segmenter import InvoiceSegmenter
+
+from corpus import pages
+
+
+def layouts(texts: list[str], seed: int = 0) -> dict[str, list[str]]:
+    rng = random.Random(seed)
+    split = []
+    for text in texts:
+        lines = text.splitlines(keepends=True)
+        cut = rng.randint(12, len(lines) - 1)
+        split += [''.join(lines[:cut]), ''.join(lines[:10]) + ''.join(lines[cut:])]
+
+    stream, mixed, start = ''.join(texts), [], 0
+    while start < len(stream):
+        end = stream.find('\n', start + rng.randint(50, 2500)) + 1 or len(stream)
+        mixed.append(stream[start:end])
+        start = end
+
+    return {'one per page': texts, 'three per page': [''.join(texts[i:i + 3]) for i in range(0, len(texts), 3)],
+            'split': split, 'mixed': mixed}
+
+
+def fields(text: str) -> tuple:
+    invoice = InvoiceParser(text)
+    return invoice.invoice_no, invoice.date, invoice.sub_total, invoice.round_off, invoice.total, repr(invoice.items)
+
+
+def measure(texts: list[str]) -> tuple[float, int, int]:
+    """seconds, peak bytes allocated while segmenting (in a second pass, tracemalloc slows it down) and invoices"""
+    start = time.perf_counter()
+    count = sum(1 for _ in InvoiceSegmenter().split(texts))  # each invoice is dropped, as a parser consuming it
+    seconds = time.perf_counter() - start
+
+    tracemalloc.start()
+    for _ in InvoiceSegmenter().split(texts):
+        pass
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return seconds, peak, count
+
+
+if __name__ == '__main__':
+    sizes = [int(n) for n in sys.argv[1:]] or [1_000, 10_000, 100_000]
+    failed = False
+    for n in sizes:
+        texts = pages(n)
+        expected = [fields(text) for text in texts] if n <= 10_000 else None
+        for name, layout in layouts(texts).items():
+            seconds, peak, count = measure(layout)
+            conforms = count == n and (expected is None or expected == [fields(segment.text) for segment
+                                                                        in InvoiceSegmenter().split(layout)])
+            failed |= not conforms
+            print(f"{n:>8} {name:>15}: {len(layout):>7} pages, {count:>7} invoices, "
+                  f"{seconds / n * 1e6:6.2f} us/invoice, {n / seconds:10,.0f} invoices/s, "
+                  f"peak {peak / 1024:7.1f} KiB  " + ('conforms' if conforms else 'DIFFERS'))
+    sys.exit(1 if failed else 0)
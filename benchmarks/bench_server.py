@@ -0,0 +1,87 @@
+"""
+latency of small pdfs parsed by the http service against a new interpreter per pdf
+
+the cold run starts python, imports invoice_parser and converts the pdf to xlsx, as a cron job does.
+the warm run posts the same pdf to a ParsingServer, whose workers have already started, imported and parsed
+the pdf once (warm_up). prints the mean and p95 of each, and the metrics of the server.
+the parse time of the first request has to be no slower than the steady state (the median of the other requests,
+within FIRST_REQUEST_TOLERANCE for noise), exits with 1 if it is slower
+
+    python benchmarks/bench_server.py [pages] [requests] [corpus directory]
+"""
+import json
+import math
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+
+from invoice_parser.server import ParsingServer
+
+from corpus import pdf
+
+FIRST_REQUEST_TOLERANCE = 1.25  # first request / median of the others, above it the workers were not warm
+
+COLD = """
+import sys
+from invoice_parser import Invoices, Export
+Export(Invoices(sys.argv[1]).table, write_only=True).save(sys.argv[2])
+"""
+
+
+def summary(name: str, seconds: list[float]) -> None:
+    p95 = sorted(seconds)[max(0, math.ceil(len(seconds) * 0.95) - 1)]  # nearest rank
+    print(f"{name:>5}: mean {statistics.mean(seconds) * 1000:8.1f} ms, p95 {p95 * 1000:8.1f} ms")
+
+
+def cold(path, requests: int) -> list[float]:
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+    seconds = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for _ in range(requests):
+            start = time.perf_counter()
+            subprocess.run([sys.executable, '-c', COLD, str(path), os.path.join(tmp, 'out.xlsx')], env=env, check=True)
+            seconds.append(time.perf_counter() - start)
+    return seconds
+
+
+def warm(path, requests: int) -> tuple[list[float], list[float], dict]:
+    """latencies, parse times in the worker (X-Parse-Time) and metrics"""
+    with open(path, 'rb') as file:
+        data = file.read()
+    with ParsingServer(('127.0.0.1', 0), workers=1, warm_up=data) as server:
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = f'http://127.0.0.1:{server.server_port}'
+        seconds, parse_seconds = [], []
+        for _ in range(requests):
+            start = time.perf_counter()
+            with urllib.request.urlopen(urllib.request.Request(f'{url}/parse?format=xlsx', data=data)) as response:
+                response.read()
+            seconds.append(time.perf_counter() - start)
+            parse_seconds.append(float(response.headers['X-Parse-Time']))
+        with urllib.request.urlopen(f'{url}/metrics') as response:
+            metrics = json.load(response)
+        server.shutdown()
+    return seconds, parse_seconds, metrics
+
+
+if __name__ == '__main__':
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    requests = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    path = pdf(n, sys.argv[3] if len(sys.argv) > 3 else tempfile.gettempdir())
+    print(f"{path}, {requests} requests")
+
+    summary('cold', cold(path, requests))
+    seconds, parse_seconds, metrics = warm(path, requests)
+    summary('warm', seconds)
+    print(json.dumps(metrics, indent=2))
+
+    first, steady = parse_seconds[0], statistics.median(parse_seconds[1:])
+    warmed = first <= steady * FIRST_REQUEST_TOLERANCE
+    print(f"first request parsed in {first * 1000:.1f} ms, steady state {steady * 1000:.1f} ms: "
+          + ('warm' if warmed else 'SLOWER'))
+    sys.exit(0 if warmed else 1)
@@ -0,0 +1,152 @@
+"""
+synthetic vyapar style invoices, for benchmarks
+
+pages follow the layout the default Patterns expect: gold/silver items,
+SGST/CGST, round off, items with discount and both ₹ and ₨ symbols.
+same n and seed always give the same pages, so results can be compared across commits.
+
+    python benchmarks/corpus.py pages [out.pdf] [seed]
+"""
+import random
+import sys
+from pathlib import Path
+
+
+HEADER = [
+    "Tax Invoice",
+    "SRI LAKSHMI JEWELLERS",
+    "1-2-3, Main Road, Hyderabad",
+    "Phone no.: 9999999999",
+    "GSTIN: 36AAAAA0000A1Z5",
+    "Bill To",
+    "Walk-in Customer",
+    "Hyderabad",
+    "Invoice Details",
+]
+
+# ToUnicode cmap of the pdf font, maps the two rupee symbols to single byte codes
+CMAP = b"""/CIDInit /ProcSet findresource begin
+12 dict begin
+begincmap
+/CMapName /Adobe-Identity-UCS def
+/CMapType 2 def
+1 begincodespacerange
+<00> <FF>
+endcodespacerange
+2 beginbfchar
+<80> <20B9>
+<81> <20A8>
+endbfchar
+endcmap
+CMapName currentdict /CMap defineresource pop
+end
+end"""
+CODES = {'₹': '\x80', '₨': '\x81'}
+VERSION = 2  # part of the pdf file names, bump it when the pages change
+
+
+def page_text(invoice_no: int, rng: random.Random, rate: float = 1.5, symbol: str = '₹',
+              discount: bool = False) -> str:
+    """
+    returns the extracted text of one invoice page with one to three gold/silver items
+
+    items get a 1-5% discount if discount
+    """
+    lines = [*HEADER,
+             f"Invoice No. : {invoice_no}",
+             f"Date : {rng.randint(1, 28):02d}-{rng.randint(1, 12):02d}-2023",
+             "Place of supply: 36-Telangana",
+             "#Item name HSN/ SAC Quantity Price/ Unit Amount"]
+
+    sub_total = 0  # in paise, gst is rounded half up to the paise like the invoices
+    for n in range(1, rng.randint(1, 3) + 1):
+        item = rng.choice(('gold', 'silver'))
+        quantity = round(rng.uniform(1, 20) if item == 'gold' else rng.uniform(10, 500), 3)
+        price = rng.choice((5400.0, 5550.0, 5625.0)) if item == 'gold' else rng.choice((70.0, 72.5, 75.0))
+        amount = round(quantity * price * 100)
+        line = f"{n} {item} ornament 22k 7113 {quantity} Gm {symbol} {price:,.2f}"
+        if discount:
+            percent = rng.randint(1, 5)
+            off = round(amount * percent / 100)
+            amount -= off
+            line += f" {symbol} {off / 100:,.2f} ({percent}%)"
+        sub_total += amount
+        lines.append(f"{line} {symbol} {amount / 100:,.2f}")
+
+    gst = (sub_total * round(rate * 100) + 5000) // 10000
+    total = sub_total + 2 * gst
+    rounded = (total + 50) // 100 * 100
+    round_off = rounded - total
+    lines += [f"Sub Total {symbol} {sub_total / 100:,.2f}",
+              f"SGST@{rate}% {symbol} {gst / 100:,.2f}",
+              f"CGST@{rate}% {symbol} {gst / 100:,.2f}",
+              f"Round off {'-' if round_off < 0 else ''} {symbol} {abs(round_off) / 100:.2f}",
+              f"Total {symbol} {rounded / 100:,.2f}",
+              "Thank you for doing business with us."]
+    return '\n'.join(lines)
+
+
+def pages(n: int, seed: int = 0) -> list[str]:
+    """returns n invoice pages, every fifth page has discounts, same seed gives the same pages"""
+    rng = random.Random(seed)
+    return [page_text(invoice_no, rng, symbol=rng.choice('₹₨'), discount=invoice_no % 5 == 0)
+            for invoice_no in range(1, n + 1)]
+
+
+def write_pdf(path: str | Path, texts: list[str]) -> Path:
+    """
+    writes a pdf with a page for each text, made by Vyaparapp as far as Invoices can tell
+
+    each line is a Tj operator, so PyPDF2 extracts the text back line by line
+    """
+    from PyPDF2 import PdfWriter, PageObject
+    from PyPDF2.generic import DictionaryObject, DecodedStreamObject, NameObject
+
+    writer = PdfWriter()
+    cmap = DecodedStreamObject()
+    cmap.set_data(CMAP)
+    font = writer._add_object(DictionaryObject({
+        NameObject('/Type'): NameObject('/Font'),
+        NameObject('/Subtype'): NameObject('/Type1'),
+        NameObject('/BaseFont'): NameObject('/Helvetica'),
+        NameObject('/Encoding'): NameObject('/WinAnsiEncoding'),
+        NameObject('/ToUnicode'): writer._add_object(cmap),
+    }))
+    resources = writer._add_object(DictionaryObject({
+        NameObject('/Font'): DictionaryObject({NameObject('/F1'): font})
+    }))
+
+    for text in texts:
+        page = PageObject.create_blank_page(None, 595, 842)
+        page[NameObject('/Resources')] = resources
+        operators = ['BT', '/F1 9 Tf', '40 800 Td', '12 TL']
+        for line in text.split('\n'):
+            for symbol, code in CODES.items():
+                line = line.replace(symbol, code)
+            line = line.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+            operators.append(f'({line}) Tj T*')
+        operators.append('ET')
+        contents = DecodedStreamObject()
+        contents.set_data('\n'.join(operators).encode('latin-1'))
+        page[NameObject('/Contents')] = writer._add_object(contents)
+        writer.add_page(page)
+
+    writer.add_metadata({'/Creator': 'Vyaparapp'})
+    with open(path, 'wb') as f:
+        writer.write(f)
+    return Path(path)
+
+
+def pdf(n: int, directory: str | Path, seed: int = 0) -> Path:
+    """returns the pdf of pages(n, seed) in directory, writes it only if it does not exist yet"""
+    path = Path(directory) / f'invoices_v{VERSION}_{n}_{seed}.pdf'
+    if not path.exists():
+        path.parent.mkdir(parents=True, exist_ok=True)
+        write_pdf(path, pages(n, seed))
+    return path
+
+
+if __name__ == '__main__':
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    out = sys.argv[2] if len(sys.argv) > 2 else f'invoices_{n}.pdf'
+    print(write_pdf(out, pages(n, int(sys.argv[3]) if len(sys.argv) > 3 else 0)))
@@ -0,0 +1,173 @@
+"""
+benchmark suite of the parse -> table -> export pipeline on the synthetic corpus
+
+measures throughput and peak memory of each stage separately, at each size:
+
+InvoiceParser: parsing the text of the pages (no pdf)
+Invoices: opening the pdf, extracting and parsing every page
+make_table: Invoices.make_table of the parsed invoices
+make_table.columnar: make_table(columnar=True) of the parsed invoices, before their Item objects are created
+Table.sort, Table.filter: sort_by_date then sort_by_invoice, filter_by_item of both items
+Table.aggregate: daily, monthly per item and per gst rate summaries, in one pass
+Export: workbook of the table, in write only mode (and default mode up to --max-export-rows rows)
+
+pdfs of the corpus are written once to --corpus, and reused by later runs.
+results are saved as json, compare two of them to find regressions
+
+    python benchmarks/run.py [--pages 10 1000 100000] [--output results.json]
+    python benchmarks/run.py --compare before.json after.json
+"""
+import argparse
+import datetime
+import gc
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from invoice_parser import Export, InvoiceParser, Invoices
+
+import corpus
+
+
+STAGES = ('InvoiceParser', 'Invoices', 'make_table', 'make_table.columnar', 'Table.sort', 'Table.filter', 'Table.aggregate', 'Export', 'Export.write_only')
+
+
+def measure(func, memory: bool = True) -> tuple[float, int | None, object]:
+    """
+    runs func once for time, and once more under tracemalloc for peak memory if memory
+
+    Returns
+    -------
+    tuple:
+        seconds, peak bytes allocated (None if not memory) and result of func
+    """
+    gc.collect()
+    start = time.perf_counter()
+    result = func()
+    seconds = time.perf_counter() - start
+
+    peak = None
+    if memory:
+        del result
+        gc.collect()
+        tracemalloc.start()
+        result = func()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return seconds, peak, result
+
+
+def bench(n: int, directory: Path, memory: bool = True, max_export_rows: int = 1000, seed: int = 0) -> list[dict]:
+    """runs every stage on n pages, returns a result per stage"""
+    results = []
+
+    def add(stage, items, seconds, peak):
+        results.append({'pages': n, 'stage': stage, 'items': items, 'seconds': seconds,
+                        'items/sec': items / seconds if seconds else None, 'peak_bytes': peak})
+        print(f"{n:>8} {stage:<21} {items:>9} {seconds:>10.4f}s {items / seconds if seconds else 0:>12,.0f}/s"
+              f"{'' if peak is None else f'  {peak / 2 ** 20:>9.1f} MiB'}", flush=True)
+
+    texts = corpus.pages(n, seed)
+    seconds, peak, _ = measure(lambda: [InvoiceParser(text) for text in texts], memory)
+    add('InvoiceParser', n, seconds, peak)
+    del texts
+
+    path = corpus.pdf(n, directory, seed)
+    seconds, peak, invoices = measure(lambda: Invoices(path), memory)
+    add('Invoices', n, seconds, peak)
+
+    seconds, peak, table = measure(invoices.make_table, memory)
+    rows = len(table.rows)
+    add('make_table', rows, seconds, peak)
+
+    # batch.table_rows does not use InvoiceParser.items, so it is measured on copies which have not created them
+    copies = [[InvoiceParser.from_fields(invoice.fields) for invoice in invoices.invoices] for _ in range(2)]
+    seconds, peak, _ = measure(lambda: invoices.make_table(invoices=copies.pop(), columnar=True), memory)
+    add('make_table.columnar', rows, seconds, peak)
+    del copies
+
+    def sort():
+        table.sort_by_date()
+        table.sort_by_invoice()
+    seconds, peak, _ = measure(sort, memory)
+    add('Table.sort', rows, seconds, peak)
+
+    seconds, peak, _ = measure(lambda: [len(list(table.filter_by_item(item))) for item in ('gold', 'silver')], memory)
+    add('Table.filter', rows, seconds, peak)
+
+    seconds, peak, _ = measure(lambda: table.aggregate({'daily': ['DATE'], 'monthly': [table.month(), 'ITEM'],
+                                                        'rates': [table.gst_rate()]}), memory)
+    add('Table.aggregate', rows, seconds, peak)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if rows <= max_export_rows:
+            seconds, peak, _ = measure(lambda: Export(table).save(os.path.join(tmp, 'export.xlsx')), memory)
+            add('Export', rows, seconds, peak)
+        seconds, peak, _ = measure(lambda: Export(table, write_only=True).save(os.path.join(tmp, 'export_wo.xlsx')),
+                                   memory)
+        add('Export.write_only', rows, seconds, peak)
+
+    return results
+
+
+def commit() -> str | None:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=Path(__file__).parent, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(before: str, after: str) -> None:
+    """prints the speedup and memory ratio of each stage of after over before"""
+    def load(file):
+        with open(file) as f:
+            return {(result['pages'], result['stage']): result for result in json.load(f)['results']}
+
+    old, new = load(before), load(after)
+    print(f"{'pages':>8} {'stage':<21} {'before':>10} {'after':>10} {'speedup':>8} {'memory':>8}")
+    for key in sorted(old.keys() & new.keys(), key=lambda key: (key[0], STAGES.index(key[1]) if key[1] in STAGES else len(STAGES), key[1])):
+        a, b = old[key], new[key]
+        memory = b['peak_bytes'] / a['peak_bytes'] if a['peak_bytes'] and b['peak_bytes'] else float('nan')
+        print(f"{key[0]:>8} {key[1]:<21} {a['seconds']:>9.4f}s {b['seconds']:>9.4f}s "
+              f"{a['seconds'] / b['seconds']:>7.2f}x {memory:>7.2f}x")
+
+
+def main(argv: list[str] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0].strip())
+    parser.add_argument('--pages', type=int, nargs='+', default=[10, 1_000, 100_000], help='sizes of the corpus')
+    parser.add_argument('--output', default='benchmark_results.json', help='json file of the results')
+    parser.add_argument('--corpus', default=Path(tempfile.gettempdir()) / 'invoice_parser_corpus',
+                        help='directory of the generated pdfs')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--no-memory', action='store_true', help='skip peak memory, halves the runtime')
+    parser.add_argument('--max-export-rows', type=int, default=1000,
+                        help='largest table exported in default (not write only) mode, which is slow')
+    parser.add_argument('--compare', nargs=2, metavar=('BEFORE', 'AFTER'), help='compare two results files')
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        return compare(*args.compare)
+
+    results = []
+    for n in args.pages:
+        results += bench(n, Path(args.corpus), not args.no_memory, args.max_export_rows, args.seed)
+
+    with open(args.output, 'w') as f:
+        json.dump({'commit': commit(),
+                   'date': datetime.datetime.now().isoformat(timespec='seconds'),
+                   'python': platform.python_version(),
+                   'platform': platform.platform(),
+                   'cpus': os.cpu_count(),
+                   'results': results}, f, indent=2)
+    print(f'saved {args.output}')
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,7 +1,54 @@
-import os, sys
+"""
+parses vyapar invoice pdfs and converts them into excel tables
 
-__parent_dir = os.path.dirname(os.path.abspath(__file__))
-sys.path.append(__parent_dir)
+names are imported from their modules on first use, importing the package imports neither PyPDF2 nor openpyxl.
+openpyxl is imported only when Export is first used, PyPDF2 when Invoices (or another name which needs it) is
+"""
+from importlib import import_module
+from typing import TYPE_CHECKING
 
-from invoices import Invoices
-from export import Export
\ No newline at end of file
+# module of each public name
+_LAZY = {
+    'Invoices': 'invoices', 'InvoiceParser': 'invoices', 'PageError': 'invoices',
+    'Export': 'export',
+    'Exporter': 'exporters', 'CSVExport': 'exporters', 'JSONLinesExport': 'exporters', 'ParquetExport': 'exporters',
+    'Extractor': 'extractors', 'PyPDF2Extractor': 'extractors', 'PypdfExtractor': 'extractors',
+    'PdfminerExtractor': 'extractors', 'ContentStreamExtractor': 'extractors',
+    'Patterns': 'patterns', 'PATTERNS': 'patterns',
+    'ParseCache': 'cache',
+    'Checkpoint': 'checkpoint',
+    'InvoiceSegmenter': 'segmenter',
+    'Table': 'table', 'ColumnarTable': 'table',
+    'Profiler': 'profiling',
+    'GST': 'gst',
+    'Round': 'round',
+}
+
+__all__ = list(_LAZY)
+
+if TYPE_CHECKING:
+    from .invoices import Invoices, InvoiceParser, PageError
+    from .export import Export
+    from .exporters import Exporter, CSVExport, JSONLinesExport, ParquetExport
+    from .extractors import Extractor, PyPDF2Extractor, PypdfExtractor, PdfminerExtractor, ContentStreamExtractor
+    from .patterns import Patterns, PATTERNS
+    from .cache import ParseCache
+    from .checkpoint import Checkpoint
+    from .segmenter import InvoiceSegmenter
+    from .table import Table, ColumnarTable
+    from .profiling import Profiler
+    from .gst import GST
+    from .round import Round
+
+
+def __getattr__(name: str):
+    module = _LAZY.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(f'.{module}', __name__), name)
+    globals()[name] = value  # later lookups do not call __getattr__
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,208 @@
+"""
+gst, round off and total of many items in one call
+
+computes the same values as Item/GST/Round.round, one column at a time instead of one item at a time.
+uses NumPy when it is installed (imported on the first call, not with the module), otherwise an inlined pure
+python loop.
+results are equal to Item, float for float.
+table_rows makes the rows of InvoiceParser.rows from these columns, without creating Item objects.
+"""
+from typing import TYPE_CHECKING, Iterable, Sequence
+
+from .gst import GST, RATE_SCALE, gst_paise, rate_units
+from .round import PAISE, div_round, rnd, round_many, to_paise
+
+if TYPE_CHECKING:
+    from .invoices import InvoiceParser
+
+numpy = None  # NumPy once imported by _numpy, numpy is optional
+_numpy_missing = False
+
+
+def round_values(values: Sequence[float], decimal: int = 0, use_numpy: bool = None) -> list:
+    """
+    Round.round of each value
+
+    Parameters
+    ----------
+    values: Sequence[float]
+        numbers to round
+
+    decimal: int, optional
+        rounds upto the decimal (default is 0)
+
+    use_numpy: bool, optional
+        use NumPy (default is None, uses NumPy if installed)
+
+    Returns
+    -------
+    list:
+        rounded values, int if decimal is 0 like Round.round
+    """
+    if _numpy(use_numpy) and len(values):
+        rounded = _np_round(numpy.asarray(values, dtype=float), decimal)
+        return rounded.tolist() if decimal else rounded.astype(int).tolist()
+    return round_many(values, decimal)
+
+
+def item_totals(sub_totals: Sequence[float], rates: Sequence[float] | float, use_numpy: bool = None) -> dict[str, list]:
+    """
+    gst, total and round off of items, like Item(invoice_no, type, quantity, sub_total, rate)
+
+    Parameters
+    ----------
+    sub_totals: Sequence[float]
+        sub_total of each item in rupees, as passed to Item
+
+    rates: Sequence[float] | float
+        gst rate of each item, or one rate of all the items
+
+    use_numpy: bool, optional
+        use NumPy (default is None, uses NumPy if installed)
+
+    Returns
+    -------
+    dict:
+        lists of sgst, cgst (Item.gst.sgst.amount, Item.gst.cgst.amount), gst (Item.gst.amount),
+        total (Item.total) and round_off (Item.round_off) of the items
+    """
+    if isinstance(rates, (int, float)):
+        rates = [rates] * len(sub_totals)
+    if len(rates) != len(sub_totals):
+        raise ValueError(f"{len(sub_totals)} sub_totals but {len(rates)} rates")
+
+    if _numpy(use_numpy) and len(sub_totals):
+        return _np_item_totals(numpy.asarray(sub_totals, dtype=float), numpy.asarray(rates, dtype=float))
+
+    # in integer paise, as Item
+    divisor = 100 * RATE_SCALE
+    half, gst, total, round_off = [], [], [], []
+    for sub_total, rate in zip(sub_totals, rates):
+        sub_total = to_paise(sub_total)
+        amount = div_round(sub_total * rate_units(rate), divisor)
+        gst_total = sub_total + amount + amount
+        item_total = div_round(gst_total, PAISE) * PAISE
+
+        half.append(amount / PAISE)
+        gst.append((amount + amount) / PAISE)
+        total.append(item_total / PAISE)
+        round_off.append((item_total - gst_total) / PAISE)
+    return {'sgst': half, 'cgst': list(half), 'gst': gst, 'total': total, 'round_off': round_off}
+
+
+def table_rows(invoices: Iterable['InvoiceParser'], force_invoice_data: bool = False,
+               use_numpy: bool = None) -> list[list]:
+    """
+    table rows of the invoices, equal to the rows of InvoiceParser.rows
+
+    the items of each invoice are merged from InvoiceParser.item_values, then the gst, round off and total
+    of all the merged items are computed in one item_totals call. InvoiceParser.items is not used,
+    so Item and MergedItems are not created
+
+    Parameters
+    ----------
+    invoices: Iterable[InvoiceParser]
+        invoices to make the rows of
+
+    force_invoice_data: bool
+        overwrite calculated data with invoice data (default is False)
+
+    use_numpy: bool, optional
+        use NumPy (default is None, uses NumPy if installed)
+
+    Returns
+    -------
+    list:
+        the rows, gold and/or silver of each invoice
+    """
+    merged = []  # invoice, isvalid, type, quantity and sub_total paise of each row
+    for invoice in invoices:
+        # as MergedItems, same type items are added up (quantity rounded at each sum), silver before gold
+        gold = silver = None
+        for type, quantity, sub_total in invoice.item_values:
+            quantity, sub_total = rnd(quantity, 3), to_paise(sub_total)
+            if type == 'gold':
+                gold = (type, quantity, sub_total) if gold is None else \
+                    (gold[0], rnd(gold[1] + quantity, 3), gold[2] + sub_total)
+            else:
+                silver = (type, quantity, sub_total) if silver is None else \
+                    (silver[0], rnd(silver[1] + quantity, 3), silver[2] + sub_total)
+        items = [item for item in (silver, gold) if item is not None]
+
+        # InvoiceParser.isvalid, the gst of the merged items is the gst of their summed sub_total
+        sub_total, gst = sum(item[2] for item in items), invoice.gst
+        isvalid = to_paise(invoice.sub_total) == sub_total and isinstance(gst, GST) \
+            and gst.amount_paise == 2 * gst_paise(sub_total, gst.rate)
+        merged += [(invoice, isvalid, *item) for item in items]
+
+    totals = item_totals([sub_total / PAISE for *_, sub_total in merged],
+                         [invoice.gst.rate for invoice, *_ in merged], use_numpy)
+
+    rows = []
+    for (invoice, isvalid, type, quantity, sub_total), sgst, cgst, round_off, total in zip(
+            merged, totals['sgst'], totals['cgst'], totals['round_off'], totals['total']):
+        item_round_off = round_off
+        if len(invoice.items_raw) == 1 and not isvalid and force_invoice_data:
+            sgst, cgst, round_off = invoice.gst.sgst.amount, invoice.gst.cgst.amount, invoice.round_off
+            if invoice.total is not None:
+                total = invoice.total
+        rows.append([invoice.invoice_no, type, invoice.date, quantity, sub_total / PAISE, sgst, cgst, round_off,
+                     total, 2 * invoice.gst.rate, invoice.round_off, item_round_off, isvalid])
+    return rows
+
+
+def _numpy(use_numpy: bool | None) -> bool:
+    # True if NumPy is to be used, imported on the first call which may use it
+    global numpy, _numpy_missing
+    if use_numpy is False:
+        return False
+    if numpy is None and not _numpy_missing:
+        try:
+            import numpy
+        except ImportError:  # pragma: no cover - numpy is optional
+            _numpy_missing = True
+    if use_numpy and numpy is None:
+        raise ImportError("use_numpy needs numpy, install it with 'pip install numpy'")
+    return numpy is not None
+
+
+def _np_round(values, decimal: int = 0):
+    # half up on the absolute value, as Round.round
+    m = numpy.abs(values)
+    if decimal:
+        m = m * float(10 ** decimal)
+    floor = numpy.floor(m)
+    rounded = floor + (m - floor >= 0.5)
+    if decimal:
+        return numpy.where(values < 0, -(rounded / float(10 ** decimal)), rounded / float(10 ** decimal))
+    return numpy.where(values < 0, -rounded, rounded) + 0.0  # Round.round returns int, never -0
+
+
+def _np_paise(values):
+    # to_paise of each value, values that close to half a paise are converted by to_paise
+    scaled = numpy.abs(values) * float(PAISE)
+    floor = numpy.floor(scaled)
+    fraction = scaled - floor
+    paise = (floor + (fraction > 0.5)).astype(numpy.int64)
+    paise = numpy.where(values < 0, -paise, paise)
+    for i in numpy.flatnonzero(numpy.abs(fraction - 0.5) <= scaled * 1e-15 + 1e-12):
+        paise[i] = to_paise(float(values[i]))
+    return paise
+
+
+def _np_div_round(dividends, divisor: int):
+    # div_round of each dividend
+    quotients = (numpy.abs(dividends) * 2 + divisor) // (divisor * 2)
+    return numpy.where(dividends < 0, -quotients, quotients)
+
+
+def _np_item_totals(sub_totals, rates) -> dict[str, list]:
+    sub_totals = _np_paise(sub_totals)
+    units = numpy.array([rate_units(rate) for rate in rates.tolist()], dtype=numpy.int64)
+    amounts = _np_div_round(sub_totals * units, 100 * RATE_SCALE)
+    gst = amounts + amounts
+    gst_total = sub_totals + gst
+    total = _np_div_round(gst_total, PAISE) * PAISE
+    half = (amounts / PAISE).tolist()
+    return {'sgst': half, 'cgst': list(half), 'gst': (gst / PAISE).tolist(), 'total': (total / PAISE).tolist(),
+            'round_off': ((total - gst_total) / PAISE).tolist()}
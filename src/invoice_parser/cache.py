@@ -0,0 +1,155 @@
+import datetime
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from pathlib import Path
+
+
+class ParseCache:
+    """
+    persistent cache of parsed invoice pages, stored in a sqlite file
+
+    each page is keyed by the hash of its content stream, so pages repeated
+    in the next day's pdf are not extracted or parsed again.
+    stores InvoiceParser.fields of the page, or empty fields if the page is not an invoice.
+
+    entries older than max_age are evicted, and the least recently used
+    entries are evicted when there are more than max_entries.
+
+    clear the cache when the Patterns used to parse the pages change.
+
+    Parameters
+    ----------
+    path: str | Path, optional
+        path of the sqlite file (default is 'invoice_parser_cache.sqlite3')
+
+    max_entries: int, optional
+        max number of pages kept in the cache (default is 100000)
+
+    max_age: float, optional
+        max age of a page in seconds (default is None, never expires)
+
+    """
+
+    def __init__(self, path: str | Path = 'invoice_parser_cache.sqlite3', max_entries: int = 100_000,
+                 max_age: float = None):
+        self.path = str(path)
+        self.max_entries = max_entries
+        self.max_age = max_age
+
+        self.hits = 0
+        self.misses = 0
+
+        self._connection = None
+        self._pid = None
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS pages (key TEXT PRIMARY KEY, fields TEXT, created REAL, used REAL)'
+        )
+        self.connection.execute('CREATE INDEX IF NOT EXISTS pages_used ON pages (used)')
+        self.commit()
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        # a forked worker process cannot share the parent's connection, opens its own
+        if self._pid != os.getpid():
+            self._connection = sqlite3.connect(self.path, timeout=30)
+            self._connection.execute('PRAGMA journal_mode=WAL')
+            self._pid = os.getpid()
+        return self._connection
+
+    @staticmethod
+    def key(page) -> str:
+        """returns the hash of the content stream(s) of a PyPDF2 page"""
+        digest = hashlib.sha1()
+        contents = page.get('/Contents')
+        contents = contents.get_object() if contents is not None else []
+        for stream in contents if isinstance(contents, list) else [contents]:
+            digest.update(stream.get_object().get_data())
+        return digest.hexdigest()
+
+    def get(self, key: str) -> dict | None:
+        """
+        returns the cached fields of the page, or None if the page is not in the cache
+
+        fields are empty if the page is not an invoice
+        """
+        row = self.connection.execute('SELECT fields, created FROM pages WHERE key = ?', (key,)).fetchone()
+        now = time.time()
+        if row is None or (self.max_age is not None and row[1] < now - self.max_age):
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self.connection.execute('UPDATE pages SET used = ? WHERE key = ?', (now, key))
+        fields = json.loads(row[0])
+        if fields:
+            fields['date'] = datetime.datetime.fromisoformat(fields['date'])
+        return fields
+
+    def set(self, key: str, fields: dict) -> None:
+        """stores the fields of the page, pass empty fields if the page is not an invoice"""
+        now = time.time()
+        self.connection.execute(
+            'INSERT OR REPLACE INTO pages (key, fields, created, used) VALUES (?, ?, ?, ?)',
+            (key, json.dumps(fields, default=datetime.datetime.isoformat), now, now)
+        )
+
+    def evict(self) -> int:
+        """
+        removes expired and least recently used entries
+
+        Returns
+        -------
+        int:
+            number of entries removed
+        """
+        removed = 0
+        if self.max_age is not None:
+            removed += self.connection.execute(
+                'DELETE FROM pages WHERE created < ?', (time.time() - self.max_age,)
+            ).rowcount
+        if self.max_entries is not None:
+            removed += self.connection.execute(
+                'DELETE FROM pages WHERE key IN (SELECT key FROM pages ORDER BY used DESC LIMIT -1 OFFSET ?)',
+                (self.max_entries,)
+            ).rowcount
+        self.commit()
+        return removed
+
+    def clear(self) -> None:
+        """removes all the entries and resets the counters"""
+        self.connection.execute('DELETE FROM pages')
+        self.commit()
+        self.hits = self.misses = 0
+
+    def commit(self) -> None:
+        self.connection.commit()
+
+    def close(self) -> None:
+        if self._connection is not None and self._pid == os.getpid():
+            self._connection.commit()
+            self._connection.close()
+        self._connection = self._pid = None
+
+    @property
+    def stats(self) -> dict:
+        """hits, misses and number of entries in the cache"""
+        return {'hits': self.hits, 'misses': self.misses, 'entries': len(self)}
+
+    def __len__(self):
+        return self.connection.execute('SELECT COUNT(*) FROM pages').fetchone()[0]
+
+    def __getstate__(self):
+        # connection is reopened by the process which unpickles the cache
+        return {**self.__dict__, '_connection': None, '_pid': None}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __repr__(self):
+        return f"ParseCache({self.path!r}, hits={self.hits}, misses={self.misses})"
@@ -0,0 +1,97 @@
+import json
+import os
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from PyPDF2 import PdfReader
+
+
+class Checkpoint:
+    """
+    state of the pdfs already parsed, stored in a json file
+
+    vyapar exports are cumulative, each day's pdf has the pages of the day before followed by the new invoices.
+    for each source (file name of the pdf) the checkpoint records the number of pages parsed
+    and the hash of the last of those pages, so Invoices parses only the pages added since the last run.
+    invoice numbers are not used, a corrected or out of sequence invoice on a new page is parsed like any other.
+
+    a pdf whose parsed pages changed (fewer pages, or a different last page) is parsed again from the first page,
+    Invoices.resumed is False then. pages are recorded by Invoices.commit_checkpoint, once their rows are saved
+
+    Parameters
+    ----------
+    path: str | Path, optional
+        path of the json file (default is 'invoice_parser_checkpoint.json')
+
+    """
+
+    def __init__(self, path: str | Path = 'invoice_parser_checkpoint.json'):
+        self.path = str(path)
+        self.sources: dict[str, dict] = {}
+        if os.path.isfile(self.path):
+            with open(self.path, encoding='utf-8') as file:
+                self.sources = json.load(file)
+
+    def get(self, source: str) -> dict | None:
+        """returns pages and key (hash of the last page) recorded for source, None if not recorded"""
+        return self.sources.get(source)
+
+    def start(self, source: str, reader: 'PdfReader') -> int:
+        """
+        index of the first page of reader not parsed yet
+
+        Returns
+        -------
+        int:
+            number of pages recorded for source, or 0 if it is not recorded or its pages changed
+            (Invoices.start_page)
+        """
+        state = self.sources.get(source)
+        if not state or not state['pages']:
+            return 0
+        from .cache import ParseCache  # the hash of a page, imported here as it imports sqlite3
+
+        pages = state['pages']
+        if pages > len(reader.pages) or ParseCache.key(reader.pages[pages - 1]) != state['key']:
+            return 0
+        return pages
+
+    def update(self, source: str, reader: 'PdfReader') -> None:
+        """
+        records all the pages of reader as parsed and saves the checkpoint
+
+        Parameters
+        ----------
+        source: str
+            name of the pdf
+
+        reader: PdfReader
+            the parsed pdf
+        """
+        from .cache import ParseCache
+
+        pages = len(reader.pages)
+        self.sources[source] = {
+            'pages': pages,
+            'key': ParseCache.key(reader.pages[pages - 1]) if pages else None,
+        }
+        self.save()
+
+    def reset(self, source: str = None) -> None:
+        """forgets source, or all the sources if None, and saves the checkpoint"""
+        if source is None:
+            self.sources.clear()
+        else:
+            self.sources.pop(source, None)
+        self.save()
+
+    def save(self) -> None:
+        # written to a temporary file first, a run stopped halfway does not leave a broken checkpoint
+        temp = f'{self.path}.tmp'
+        with open(temp, 'w', encoding='utf-8') as file:
+            json.dump(self.sources, file, indent=2)
+        os.replace(temp, self.path)
+
+    def __repr__(self):
+        return f"Checkpoint({self.path!r}, sources={len(self.sources)})"
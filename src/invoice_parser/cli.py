@@ -0,0 +1,291 @@
+"""
+invoice-parser command, converts vyapar pdfs to xlsx or csv
+
+    invoice-parser invoices/*.pdf --jobs 8 --format xlsx --output-dir excel
+
+each pdf is converted on its own by a pool of --jobs worker processes, a line is printed as each file is done
+with its pages, invoices and pages/sec, followed by a summary of all the files and the files which failed.
+
+exit codes
+----------
+0: all the files were converted
+1: one or more files failed (not a vyapar pdf, corrupt, wrong password, a page error with --strict)
+2: invalid arguments, no pdf found or pdfs which would be converted to the same file
+130: interrupted
+"""
+import argparse
+import glob
+import logging
+import os
+import sys
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import IO, NamedTuple
+
+from .exporters import CSVExport
+from .extractors import EXTRACTORS
+from .invoices import Invoices, PageError
+from .profiling import logger
+
+FORMATS = ('xlsx', 'csv')
+
+EXIT_OK, EXIT_FAILED, EXIT_USAGE, EXIT_INTERRUPTED = 0, 1, 2, 130
+
+
+class Conversion(NamedTuple):
+    """result of converting a pdf"""
+    file: str
+    output: str
+    pages: int
+    invoices: int
+    errors: int  # pages which could not be parsed, written to the errors sheet or <name>.errors.csv
+    seconds: float
+
+
+def convert(pdf: str | Path, output: str | Path, password: None | str = None, format: str = 'xlsx',
+            extractor: str = None, strict: bool = False, write_only: bool = True,
+            memory_map: bool = False, segment: bool = False) -> Conversion:
+    """
+    parses a pdf and saves its table to output
+
+    Parameters
+    ----------
+    pdf: str | Path
+        path of the pdf
+
+    output: str | Path
+        path of the xlsx or csv file
+
+    password: str, optional
+        password for the pdf, if any (default is None)
+
+    format: str, optional
+        'xlsx' or 'csv' (default is 'xlsx')
+
+    extractor: str, optional
+        name of the text extraction backend (default is None, PyPDF2Extractor)
+
+    strict: bool, optional
+        fail at the first page which cannot be parsed (default is False)
+        otherwise the page errors go to an errors sheet, or to <name>.errors.csv next to a csv
+
+    write_only: bool, optional
+        build the workbook in write only mode (default is True), the sheets are the same as the default mode of
+        Export, many times faster. False builds the workbook in memory first, as Export does by default
+
+    memory_map: bool, optional
+        map the pdf instead of reading it into memory (default is False)
+
+    segment: bool, optional
+        split the text into invoices instead of one invoice per page (default is False)
+
+    Returns
+    -------
+    Conversion:
+        counts and time taken
+
+    Raises
+    ------
+        errors of Invoices, like NotAVyaparPDF, VyaparPDFReadError or PageParseError (if strict)
+    """
+    start = time.perf_counter()
+    invoices = Invoices(str(pdf), password, extractor=extractor, memory_map=memory_map, strict=strict, segment=segment)
+    output = Path(output)
+    if format == 'csv':
+        CSVExport(invoices.table, footer=True).save(output)
+        if invoices.errors:
+            CSVExport(invoices.errors, header=list(PageError._fields)).save(output.with_suffix('.errors.csv'))
+    else:
+        from .export import Export  # openpyxl is imported only for xlsx
+        Export(invoices.table, write_only=write_only, errors=invoices.errors).save(str(output))
+    return Conversion(str(pdf), str(output), len(invoices._pdf.pages), len(invoices.invoices), len(invoices.errors),
+                      time.perf_counter() - start)
+
+
+def find_pdfs(sources: list[str]) -> list[Path]:
+    """pdfs of each source: a file, a directory (its *.pdf files) or a glob pattern, in order without repeats"""
+    pdfs = {}
+    for source in sources:
+        if os.path.isdir(source):
+            found = sorted(Path(source).glob('*.pdf'))
+        elif glob.has_magic(source):
+            found = [Path(name) for name in sorted(glob.glob(source)) if os.path.isfile(name)]
+        else:
+            found = [Path(source)]  # a missing file is reported as a failure of the file
+        pdfs.update(dict.fromkeys(found))
+    return list(pdfs)
+
+
+def output_path(pdf: Path, output_dir: str | None, format: str) -> Path:
+    """path of the converted pdf, in output_dir or next to the pdf"""
+    return Path(output_dir or pdf.parent) / f'{pdf.stem}.{format}'
+
+
+def clashing_outputs(pdfs: list[Path], output_dir: str | None, format: str) -> dict[str, list[Path]]:
+    """
+    files which more than one pdf would be written to, like a/day.pdf and b/day.pdf with one output_dir
+
+    paths are compared as the os does (case-insensitive on windows), the errors file of a csv is included
+
+    Returns
+    -------
+    dict:
+        each clashing output path and the pdfs converted to it, empty if every pdf has its own files
+    """
+    writers: dict[str, list[Path]] = {}
+    for pdf in pdfs:
+        output = output_path(pdf, output_dir, format)
+        for path in (output, output.with_suffix('.errors.csv')) if format == 'csv' else (output,):
+            pdfs_of_path = writers.setdefault(os.path.normcase(os.path.abspath(path)), [])
+            if pdf not in pdfs_of_path:
+                pdfs_of_path.append(pdf)
+    return {path: pdfs_of_path for path, pdfs_of_path in writers.items() if len(pdfs_of_path) > 1}
+
+
+def parser() -> argparse.ArgumentParser:
+    arguments = argparse.ArgumentParser(
+        prog='invoice-parser', description='converts vyapar invoice pdfs to excel (xlsx) or csv tables',
+        epilog='exit codes: 0 all files converted, 1 some files failed, '
+               '2 invalid arguments or pdfs with the same output file, 130 interrupted'
+    )
+    arguments.add_argument('pdfs', nargs='+', help='pdf files, directories of pdfs or glob patterns')
+    arguments.add_argument('-f', '--format', choices=FORMATS, default='xlsx', help='output format (default: xlsx)')
+    arguments.add_argument('-o', '--output-dir', help='directory of the converted files (default: next to each pdf)')
+    arguments.add_argument('-j', '--jobs', type=int, default=1,
+                           help='number of files converted at a time, 0 for one per cpu (default: 1)')
+    arguments.add_argument('-p', '--password', default=os.environ.get('INVOICE_PARSER_PASSWORD'),
+                           help='password of the pdfs (default: $INVOICE_PARSER_PASSWORD)')
+    arguments.add_argument('--extractor', choices=list(EXTRACTORS), help='text extraction backend (default: pypdf2)')
+    arguments.add_argument('--strict', action='store_true',
+                           help='fail a file at its first page which cannot be parsed, '
+                                'instead of listing the page in an errors sheet')
+    arguments.add_argument('--write-only', action=argparse.BooleanOptionalAction, default=True,
+                           help='stream xlsx sheets to the file, --no-write-only builds the workbook in memory first, '
+                                'the same sheets many times slower (default: write only)')
+    arguments.add_argument('--memory-map', action='store_true', help='map the pdfs instead of reading them')
+    arguments.add_argument('--segment', action='store_true',
+                           help='split the text into invoices, for pdfs with invoices longer than a page '
+                                'or several invoices on a page')
+    arguments.add_argument('-q', '--quiet', action='store_true', help='print only the summary of the failures')
+    return arguments
+
+
+def _init_worker(level: int) -> None:
+    # warnings of page errors are printed by the workers only if not quiet
+    logger.setLevel(level)
+
+
+def _describe(error: BaseException) -> str:
+    return f"{type(error).__name__}: {str(error).strip()}".replace('\n', ' ')
+
+
+def main(argv: list[str] = None, stream: IO = None) -> int:
+    """
+    runs the invoice-parser command, see the module docstring
+
+    Parameters
+    ----------
+    argv: list[str], optional
+        arguments (default is None, sys.argv[1:])
+
+    stream: IO, optional
+        where progress and the summary are printed (default is None, sys.stderr)
+
+    Returns
+    -------
+    int:
+        exit code
+    """
+    args = parser().parse_args(argv)
+    stream = stream or sys.stderr
+
+    def say(*values, always: bool = False):
+        if always or not args.quiet:
+            print(*values, file=stream, flush=True)
+
+    pdfs = find_pdfs(args.pdfs)
+    if not pdfs:
+        say('invoice-parser: no pdf found in', *args.pdfs, always=True)
+        return EXIT_USAGE
+    if args.jobs < 0:
+        say('invoice-parser: --jobs must be 0 or more', always=True)
+        return EXIT_USAGE
+    clashes = clashing_outputs(pdfs, args.output_dir, args.format)
+    if clashes:
+        # checked before any file is written, the last pdf converted would overwrite the others
+        say('invoice-parser: pdfs would be converted to the same file, rename them or convert them apart:',
+            always=True)
+        for path, sources in clashes.items():
+            say(f"  {path}: {', '.join(map(str, sources))}", always=True)
+        return EXIT_USAGE
+    if args.output_dir:
+        os.makedirs(args.output_dir, exist_ok=True)
+
+    jobs = min(args.jobs or os.cpu_count() or 1, len(pdfs))
+    level = logging.ERROR if args.quiet else logging.WARNING
+    options = dict(password=args.password, format=args.format, extractor=args.extractor, strict=args.strict,
+                   write_only=args.write_only, memory_map=args.memory_map, segment=args.segment)
+    width = len(str(len(pdfs)))
+    start = time.perf_counter()
+    done, pages, failures = [], 0, {}
+
+    def report(pdf: Path, future: Future) -> None:
+        nonlocal pages
+        error = future.exception()
+        counter = f"[{len(done) + len(failures) + 1:>{width}}/{len(pdfs)}]"
+        if error is not None:
+            failures[str(pdf)] = error
+            say(f"{counter} {pdf} failed, {_describe(error)}")
+            return
+        result = future.result()
+        done.append(result)
+        pages += result.pages
+        say(f"{counter} {pdf} -> {result.output}: {result.pages} pages, {result.invoices} invoices"
+            + (f", {result.errors} page errors" if result.errors else '')
+            + f" in {result.seconds:.2f}s ({result.pages / max(result.seconds, 1e-9):,.0f} pages/s), "
+              f"total {pages / max(time.perf_counter() - start, 1e-9):,.0f} pages/s")
+
+    previous = logger.level
+    logger.setLevel(level)
+    try:
+        if jobs == 1:
+            for pdf in pdfs:
+                future = Future()
+                try:
+                    future.set_result(convert(pdf, output_path(pdf, args.output_dir, args.format), **options))
+                except Exception as e:
+                    future.set_exception(e)
+                report(pdf, future)
+        else:
+            with ProcessPoolExecutor(jobs, initializer=_init_worker, initargs=(level,)) as executor:
+                futures = {executor.submit(convert, pdf, output_path(pdf, args.output_dir, args.format), **options): pdf
+                           for pdf in pdfs}
+                try:
+                    for future in as_completed(futures):
+                        report(futures[future], future)
+                finally:
+                    for future in futures:
+                        future.cancel()
+    except KeyboardInterrupt:
+        say(f"invoice-parser: interrupted, {len(done)} of {len(pdfs)} files converted", always=True)
+        return EXIT_INTERRUPTED
+    finally:
+        logger.setLevel(previous)
+
+    seconds = time.perf_counter() - start
+    errors = sum(result.errors for result in done)
+    say(f"{len(done)} of {len(pdfs)} files converted, {pages} pages, "
+        f"{sum(result.invoices for result in done)} invoices"
+        + (f", {errors} page errors" if errors else '')
+        + f" in {seconds:.2f}s ({pages / max(seconds, 1e-9):,.0f} pages/s, {jobs} jobs)")
+    if failures:
+        say(f"{len(failures)} failed:", always=True)
+        for name, error in failures.items():
+            say(f"  {name}: {_describe(error)}", always=True)
+        return EXIT_FAILED
+    return EXIT_OK
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -8,8 +8,13 @@ error file for all class for Invoices
 class InvoiceError(Exception):
     """%s"""
     def __init__(self, msg=""):
+        self.msg = msg
         super().__init__(self.__doc__ % msg)
 
+    def __reduce__(self):
+        # args are the formatted message, recreate from msg when unpickled in another process
+        return type(self), (self.msg,)
+
 
 class NotAVyaparPDF(InvoiceError):
     """The PDF %s provided is not generated by Vyapar app """
@@ -43,5 +48,40 @@ class GSTChangeError(InvoiceError):
     """Cannot change GST once assigned %s """
 
 
+class ItemChangeError(InvoiceError):
+    """Cannot change Item once created %s """
+
+
 class GSTInsufficientArgs(InvoiceError):
     """parameters are not sufficient either cgst and sgst should be passed or rate, sub_total should be passed %s"""
+
+
+class NotAnInvoice(InvoiceError):
+    """No field of an invoice found in the page %s"""
+
+
+class FieldError(InvoiceError):
+    """%s"""
+
+    @property
+    def field(self) -> str:
+        """field of the invoice which failed"""
+        return self.msg
+
+
+class MissingField(FieldError):
+    """%s not found in the invoice"""
+
+
+class InvalidField(FieldError):
+    """%s of the invoice could not be parsed"""
+
+
+class PageParseError(InvoiceError):
+    """%s"""
+    def __init__(self, msg="", record=None):
+        self.record = record
+        super().__init__(msg)
+
+    def __reduce__(self):
+        return type(self), (self.msg, self.record)
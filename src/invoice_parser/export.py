@@ -1,12 +1,35 @@
 import datetime
+import re
+from copy import copy
+from typing import Callable, Iterable, Iterator
 
-from openpyxl import Workbook
+from openpyxl import Workbook, load_workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.formula.translate import Translator
 from openpyxl.utils import get_column_letter
-from openpyxl.styles import Alignment, Font, Border, Side, PatternFill
+from openpyxl.styles import Alignment, Font, Border, Side, PatternFill, NamedStyle
 from openpyxl.formatting.rule import CellIsRule
 # from  openpyxl.styles.differential import DifferentialStyle
 
-from table import Table
+from .profiling import timed
+from .table import Table
+
+
+ALIGN_CENTER = Alignment("center", "center", wrap_text=True, shrink_to_fit=True)
+ALIGN_VERTICAL_CENTER = Alignment(vertical='center')
+DATE_FORMAT = '[$-en-US]dd-mmm-yy;@'
+SIDE = Side(None, "000000", "thin")
+BORDER_TOP_BOTTOM = Border(top=SIDE, bottom=SIDE)
+BORDER_ALL = Border(SIDE, SIDE, SIDE, SIDE)
+FILL_YELLOW = PatternFill(start_color="FFFF00", end_color="FFFF00", fill_type="solid")
+
+NUMBER_FORMAT_2 = '0.00'
+NUMBER_FORMAT_3 = '0.000'
+
+ERROR_WIDTHS = {'file': 24, 'page': 6, 'invoice_no': 10, 'error': 16, 'field': 12, 'message': 60}  # errors sheet
+RE_SUM = re.compile(r'(=SUM\([A-Z]+\d+:[A-Z]+)(\d+)\)')  # footer formulas, last row of the range in group 2
+RE_SHEET_TITLE = re.compile(r'[\\*?:/\[\]]')  # characters excel does not allow in sheet names
+MAX_SHEET_TITLE = 31  # longest sheet name excel allows
 
 
 class Export:
@@ -18,19 +41,188 @@ class Export:
     table: Table
         list of rows to print
 
+    write_only: bool, optional
+        write the sheets in openpyxl's write-only mode (default is False)
+        rows are streamed into the file as already styled cells with shared named styles,
+        at their final position, instead of formatting and shifting every cell afterwards.
+        looks the same as the default mode, much faster and lighter for large tables,
+        but the sheets cannot be edited after they are made
+
+    groups: Iterable[Callable[[list], str | None]], optional
+        functions which return the name of the sheet a row goes to, or None to leave it out
+        (default is [Export.by_item()], gold and silver sheets).
+        rows are split into the sheets of all the groups in a single pass of the table,
+        sheets of each group are made in sorted order of their names, after the main sheet
+        e.g. groups=[Export.by_item(), Export.by_month()]
+
+    errors: Iterable[PageError], optional
+        records of the pages which could not be parsed (Invoices.errors), written to an errors sheet
+        after the other sheets (default is None, no errors sheet)
+
+    summaries: dict[str, Table], optional
+        summary tables of Table.aggregate, a sheet of values (no formulas) per summary named after it,
+        after the sheets of groups (default is None)
+
     """
-    def __init__(self, table: Table):
-        self.book = Workbook()
-        self.sheet = self.book.active
+    def __init__(self, table: Table, write_only: bool = False, groups: Iterable[Callable[[list], str | None]] = None,
+                 errors: Iterable[tuple] = None, summaries: dict[str, Table] = None):
+        self.write_only = write_only
+        self.book = Workbook(write_only=write_only)
+        self.sheet = None if write_only else self.book.active
         self._num_empty_rows = 0
+        self._named_styles = set()
+        self._cell_styles = {}
         self.table = table
         self.table.sort_by_invoice()
 
+        with timed('export.partition'):
+            sheets = self.partition(self.table.rows, [self.by_item()] if groups is None else groups)
+
         self.make_sheet()
-        self.make_sheet('gold', rows=[*table.filter_by_item('gold')])
-        self.make_sheet('silver', rows=[*table.filter_by_item('silver')])
+        for name, rows in sheets.items():
+            self.make_sheet(name, rows=rows)
+        for name, summary in (summaries or {}).items():
+            self.make_summary_sheet(name, summary)
+        if errors:
+            self.make_errors_sheet(errors)
+
+        if not write_only:
+            self.book.remove(self.book.get_sheet_by_name('Sheet'))
 
-        self.book.remove(self.book.get_sheet_by_name('Sheet'))
+    @classmethod
+    def append(cls, filename: str, table: Table, groups: Iterable[Callable[[list], str | None]] = None) -> 'Export':
+        """
+        opens a workbook saved by Export and appends the rows of table to its sheets
+
+        rows are added after the last row of each sheet, the footer is moved below them and its sums extended.
+        rows of a sheet which is not in the workbook (like a new month) go to a new sheet.
+        call save to write the workbook, e.g. with the rows of the pages added to a pdf since the last run
+
+        append only if Invoices.resumed, the table then has the rows of the pages from Invoices.start_page.
+        otherwise every page was parsed (the pages recorded in the checkpoint changed), make the workbook again
+        with Export. after save, call Invoices.commit_checkpoint, e.g.
+
+            invoices = Invoices(pdf, checkpoint='checkpoint.json')
+            if invoices.resumed:
+                Export.append('invoices.xlsx', invoices.table).save('invoices.xlsx')
+            else:
+                Export(invoices.table).save('invoices.xlsx')
+            invoices.commit_checkpoint()
+
+        Parameters
+        ----------
+        filename: str
+            path of the workbook
+
+        table: Table
+            rows to append, with the header the workbook was written with
+
+        groups: Iterable[Callable[[list], str | None]], optional
+            groups the workbook was written with (default is [Export.by_item()])
+        """
+        self = cls.__new__(cls)
+        self.write_only = False
+        self.book = load_workbook(filename)
+        self.sheet = self.book.active
+        self._num_empty_rows = 0
+        self._named_styles = set(self.book.named_styles)
+        self._cell_styles = {}
+        self.table = table
+        self.table.sort_by_invoice()
+
+        with timed('export.partition'):
+            sheets = self.partition(self.table.rows, [self.by_item()] if groups is None else groups)
+
+        with timed('export.append'):
+            for name, rows in {'main': self.table.rows, **sheets}.items():
+                if name in self.book.sheetnames:
+                    self._append_rows(self.book[name], rows)
+                else:
+                    self.make_sheet(name, rows=rows)
+        return self
+
+    @staticmethod
+    def partition(rows: Iterable[list], groups: Iterable[Callable[[list], str | None]]) -> dict[str, list[list]]:
+        """
+        splits rows into sheets of each group in one pass
+
+        names are made valid sheet names, see sheet_title
+
+        Returns
+        -------
+        dict:
+            rows of each sheet name, sheets of a group sorted by their names
+        """
+        groups = list(groups)
+        sheets = [{} for _ in groups]
+        for row in rows:
+            for group, buckets in zip(groups, sheets):
+                name = group(row)
+                if name is not None:
+                    buckets.setdefault(name, []).append(row)
+
+        titles = {'main': None}  # sheet names taken, main sheet first
+        for buckets in sheets:
+            for name in sorted(buckets):
+                titles[Export.sheet_title(name, titles)] = buckets[name]
+        del titles['main']
+        return titles
+
+    @staticmethod
+    def sheet_title(name: str, taken: Iterable[str] = ()) -> str:
+        """
+        name as a valid excel sheet name
+
+        characters excel does not allow (\\ / * ? : [ ]) are replaced by '-' and the name is cut to 31 characters.
+        a name already in taken (compared ignoring case, as excel does) gets a suffix, ' (2)', ' (3)' and so on
+
+        >>> Export.sheet_title('2023-04-01 00:00:00')
+        '2023-04-01 00-00-00'
+
+        >>> Export.sheet_title('gold', ['main', 'Gold'])
+        'gold (2)'
+        """
+        title = RE_SHEET_TITLE.sub('-', str(name))[:MAX_SHEET_TITLE] or '-'
+        taken = {name.lower() for name in taken}
+        suffix = 1
+        unique = title
+        while unique.lower() in taken:
+            suffix += 1
+            unique = f'{title[:MAX_SHEET_TITLE - len(f" ({suffix})")]} ({suffix})'
+        return unique
+
+    @staticmethod
+    def by_field(field: str, format: Callable = None, header: list = None) -> Callable[[list], str | None]:
+        """
+        group of rows by value of field, sheet names are format(value)
+
+        e.g. a sheet per day, named like 2023-04-01
+        >>> Export(invoices.table, groups=[Export.by_field('DATE')])  # doctest: +SKIP
+
+        Parameters
+        ----------
+        field: str
+            field in header, like 'ITEM' or 'DATE'
+
+        format: Callable, optional
+            returns the sheet name of a value (default is None, dates as 2023-04-01, other values with str)
+
+        header: list, optional
+            header of the table (default is header of Table)
+        """
+        index = Table(header=header)._find_index(field)
+        format = format or _sheet_name
+        return lambda row: None if row[index] is None else format(row[index])
+
+    @staticmethod
+    def by_item(header: list = None) -> Callable[[list], str | None]:
+        """a sheet per item, gold and silver"""
+        return Export.by_field('ITEM', header=header)
+
+    @staticmethod
+    def by_month(header: list = None) -> Callable[[list], str | None]:
+        """a sheet per month of invoice date, named like 2023-04"""
+        return Export.by_field('DATE', lambda date: date.strftime('%Y-%m'), header=header)
 
     @property
     def empty_row(self):
@@ -42,21 +234,13 @@ class Export:
         return self._num_empty_rows
 
     def save(self, filename: str) -> None:
-        self.book.save(filename)
+        with timed('export.save'):
+            self.book.save(filename)
 
     def _set_formats(self, sheet=None):
         if not sheet:
             sheet = self.sheet
 
-        ALIGN_CENTER = Alignment("center", "center", wrap_text=True, shrink_to_fit=True)
-        DATE_FORMAT = '[$-en-US]dd-mmm-yy;@'
-        SIDE = Side(None, "000000", "thin")
-        BORDER_TOP_BOTTOM = Border(top=SIDE, bottom=SIDE)
-        BORDER_ALL = Border(SIDE, SIDE, SIDE, SIDE)
-        FILL_YELLOW = PatternFill(start_color="FFFF00", end_color="FFFF00", fill_type="solid")
-
-        NUMBER_FORMAT_2 = '0.00'
-        NUMBER_FORMAT_3 = '0.000'
         for row in range(sheet.min_row, sheet.max_row + 1):
             for col in range(sheet.min_column, sheet.max_column + 1):
                 cell = sheet.cell(row, col)
@@ -72,7 +256,7 @@ class Export:
                         cell.border = BORDER_TOP_BOTTOM
                         cell.fill = FILL_YELLOW
                         sheet.row_dimensions[row].height = 18
-                        cell.alignment = Alignment(vertical='center')
+                        cell.alignment = ALIGN_VERTICAL_CENTER
                         cell.number_format = NUMBER_FORMAT_2 if col != sheet.min_column + 3 else NUMBER_FORMAT_3
                 else:
                     if isinstance(cell.value, (int, float)) and col > sheet.min_column:
@@ -96,24 +280,233 @@ class Export:
         sheet = sheet or self.sheet
         sheet.move_range(sheet.dimensions, rows=rows, cols=cols, translate=True)
 
+    def _named_style(self, kind: str, border: bool = False) -> str:
+        """registers the named style of a kind of cell once per workbook, returns its name"""
+        name = f"invoice {kind}{' border' if border else ''}"
+        if name not in self._named_styles:
+            style = NamedStyle(name)
+            if border:
+                style.border = BORDER_ALL
+            if kind in ('header', 'date', 'text'):
+                style.alignment = ALIGN_CENTER
+            if kind in ('number', 'footer'):
+                style.number_format = NUMBER_FORMAT_2
+            elif kind in ('quantity', 'footer quantity'):
+                style.number_format = NUMBER_FORMAT_3
+            elif kind == 'date':
+                style.number_format = DATE_FORMAT
+            if kind.startswith('footer'):
+                style.border = BORDER_TOP_BOTTOM
+                style.fill = FILL_YELLOW
+                style.alignment = ALIGN_VERTICAL_CENTER
+            self.book.add_named_style(style)
+            self._named_styles.add(name)
+        return name
+
+    def _cell(self, sheet, value, kind: str = None, border: bool = False):
+        if not (kind or border):
+            return value
+        cell = WriteOnlyCell(sheet, value)
+        style = self._cell_styles.get((kind, border))
+        if style is None:
+            # style array of the named style, copied into cells of the same kind
+            cell.style = self._named_style(kind or 'cell', border)
+            style = self._cell_styles[kind, border] = cell._style
+        cell._style = copy(style)
+        return cell
+
+    @staticmethod
+    def _kind(value, col: int) -> str | None:
+        # kind of the named style of a cell in a row of the table
+        if isinstance(value, (int, float)) and col > 1:
+            return 'quantity' if col == 4 else 'number'
+        elif isinstance(value, datetime.datetime):
+            return 'date'
+        elif isinstance(value, str):
+            return 'text'
+        return None
+
+    def _append_rows(self, sheet, rows: list, cols_shift: int = 2) -> None:
+        """inserts rows above the footer (last row) of a sheet written by Export, moving the footer down"""
+        if not rows:
+            return
+        footer_row = sheet.max_row
+        for col in range(1, sheet.max_column + 1):
+            cell = sheet.cell(footer_row, col)
+            if cell.value is None and not cell.has_style:
+                continue
+            value = cell.value
+            if isinstance(value, str):
+                value = RE_SUM.sub(lambda match: f'{match.group(1)}{int(match.group(2)) + len(rows)})', value)
+            moved = sheet.cell(footer_row + len(rows), col, value)
+            moved._style = copy(cell._style)
+            cell.value = None
+            cell.style = 'Normal'
+        sheet.row_dimensions[footer_row + len(rows)].height = sheet.row_dimensions[footer_row].height
+        sheet.row_dimensions[footer_row].height = None
+
+        for i, row in enumerate(rows):
+            for col, value in enumerate(row, 1):
+                cell = sheet.cell(footer_row + i, col + cols_shift, value)
+                kind = self._kind(value, col)
+                if kind or col <= 9:
+                    cell.style = self._named_style(kind or 'cell', col <= 9)
+
+        valid_col = get_column_letter(len(rows[0]) + cols_shift)
+        sheet.conditional_formatting.add(
+            f'{valid_col}{footer_row}:{valid_col}{footer_row + len(rows) - 1}',
+            CellIsRule('=', ['FALSE'], True, None, None, FILL_YELLOW)
+        )
+
+    def _write_sheet(self, sheet, rows: list, rows_shift: int = 2, cols_shift: int = 2) -> None:
+        """
+        writes header, rows and footer of the table as styled cells, already shifted
+
+        same formats as _set_formats followed by shift
+        """
+        table = self.table
+        num_cols = max(len(table.header), len(table.footer), len(rows[0]) if rows else 0)
+        max_row = len(rows) + 2  # before shifting: header, rows, footer
+
+        # column widths and footer height are set before any row is written
+        # (on the columns and row they had before shifting, like _set_formats)
+        widths = {}
+        for col, value in enumerate(rows[0] if rows else (), 1):
+            if isinstance(value, (int, float)) and col > 1:
+                widths[col] = 10
+            elif isinstance(value, datetime.datetime):
+                widths[col] = 12
+            elif isinstance(value, str):
+                widths[col] = 8
+        for col, width in widths.items():
+            sheet.column_dimensions[get_column_letter(col)].width = width
+        if any(table.footer):
+            sheet.row_dimensions[max_row].height = 18
+
+        for _ in range(rows_shift):
+            sheet.append([])
+        padding = [None] * cols_shift
+
+        sheet.append(padding + [self._cell(sheet, value, 'header', col <= 9)
+                                for col, value in enumerate(table.header + [None] * (num_cols - len(table.header)), 1)])
+
+        for row in rows:
+            cells = padding.copy()
+            for col, value in enumerate(row, 1):
+                cells.append(self._cell(sheet, value, self._kind(value, col), col <= 9))
+            sheet.append(cells)
+
+        footer = padding.copy()
+        for col, value in enumerate(table.footer, 1):
+            if value and isinstance(value, str) and value.startswith('='):
+                value = Translator(value, f"{get_column_letter(col)}{max_row}").translate_formula(
+                    f"{get_column_letter(col + cols_shift)}{max_row + rows_shift}")
+            footer.append(self._cell(sheet, value, 'footer quantity' if col == 4 else 'footer') if value else value)
+        sheet.append(footer)
+
+        max_sheet_col = get_column_letter(num_cols + 2)
+        sheet.conditional_formatting.add(
+            f'{max_sheet_col}{1+3}:{max_sheet_col}{max_row+1}',
+            CellIsRule('=', ['FALSE'], True, None, None, FILL_YELLOW)
+        )
+
+    def make_summary_sheet(self, name: str, summary: Table, rows_shift: int = 2, cols_shift: int = 2):
+        """
+        writes a summary table of Table.aggregate to a sheet, styled like the other sheets
+
+        the footer has the totals as values, nothing is recalculated when the workbook is opened
+        """
+        sheet = self.book.create_sheet(name)
+        header = summary.header
+        num_keys = header.index('COUNT') + 1 if 'COUNT' in header else 0  # keys and count
+        quantity = header.index('QUANTITY') + 1 if 'QUANTITY' in header else None
+
+        def cells(row: list, part: str) -> Iterator[tuple[object, str | None, bool]]:
+            # value, kind of named style and border of each cell of the header, a row or the footer
+            for col, value in enumerate(row, 1):
+                if part == 'header':
+                    yield value, 'header', True
+                elif part == 'footer':
+                    yield value, None if value is None else 'footer quantity' if col == quantity else 'footer', False
+                elif col > num_keys and isinstance(value, (int, float)):
+                    yield value, 'quantity' if col == quantity else 'number', True
+                else:
+                    yield value, self._kind(value, 1), True
+
+        for col in range(1, len(header) + 1):
+            sheet.column_dimensions[get_column_letter(col + cols_shift)].width = 10 if col > num_keys else 12
+        sheet.row_dimensions[len(summary.rows) + 2 + rows_shift].height = 18
+        parts = [(header, 'header'), *((row, 'row') for row in summary.rows), (summary.footer, 'footer')]
+
+        with timed('export.summary'):
+            if self.write_only:
+                for _ in range(rows_shift):
+                    sheet.append([])
+                for row, part in parts:
+                    sheet.append([None] * cols_shift + [self._cell(sheet, value, kind, border)
+                                                        for value, kind, border in cells(row, part)])
+            else:
+                for i, (row, part) in enumerate(parts, rows_shift + 1):
+                    for col, (value, kind, border) in enumerate(cells(row, part), cols_shift + 1):
+                        cell = sheet.cell(i, col, value)
+                        if kind or border:
+                            cell.style = self._named_style(kind or 'cell', border)
+        return sheet
+
+    def make_errors_sheet(self, errors: Iterable[tuple], name: str = 'errors'):
+        """
+        writes records of the pages which could not be parsed (PageError) to a sheet, a row per page
+
+        the header is the field names of the records
+        """
+        errors = list(errors)
+        fields = errors[0]._fields if errors else ()
+        sheet = self.book.create_sheet(name)
+        with timed('export.errors'):
+            for col, field in enumerate(fields, 1):
+                sheet.column_dimensions[get_column_letter(col)].width = ERROR_WIDTHS.get(field, 12)
+            if self.write_only:
+                sheet.append([self._cell(sheet, field, 'header', True) for field in fields])
+            else:
+                sheet.append(fields)
+                for cell in sheet[1]:
+                    cell.alignment = ALIGN_CENTER
+                    cell.border = BORDER_ALL
+            for error in errors:
+                sheet.append(list(error))
+        return sheet
+
     def make_sheet(self, name: str = "main", rows: list = None):
         sheet = self.book.create_sheet(name)
         table = self.table
         rows = rows or table.rows
 
-        sheet.append(table.header)
         table.row_start = 2
         table.row_end = table.row_start + len(rows) - 1
 
-        for row in rows:
-            sheet.append(row)
-
         if name != 'main':
             table.footer[3] = f'=SUM(D{table.row_start}:D{table.row_end})'
-        sheet.append(table.footer)
 
-        self._set_formats(sheet=sheet)
-        self.shift(sheet=sheet)
+        if self.write_only:
+            with timed('export.write'):
+                self._write_sheet(sheet, rows)
+            return
+
+        with timed('export.append'):
+            sheet.append(table.header)
+            for row in rows:
+                sheet.append(row)
+            sheet.append(table.footer)
+
+        with timed('export.set_formats'):
+            self._set_formats(sheet=sheet)
+        with timed('export.shift'):
+            self.shift(sheet=sheet)
+
+
+def _sheet_name(value) -> str:
+    # default format of Export.by_field
+    return value.strftime('%Y-%m-%d') if isinstance(value, (datetime.date, datetime.datetime)) else str(value)
 
 
 # todo: optimize export set_formats and document it
@@ -0,0 +1,192 @@
+import abc
+import csv
+import datetime
+import json
+from pathlib import Path
+from typing import IO, Iterable, Iterator
+
+from .table import Table
+
+
+class Exporter(abc.ABC):
+    """
+    base of the streaming exporters, CSVExport, JSONLinesExport and ParquetExport
+
+    rows are written one at a time straight from a Table or from invoices,
+    without building a workbook.
+    columns are the named fields of the header of Table (columns without a name are left out),
+    the footer adds the totals of the columns which have a formula in the footer of Table
+
+    subclass and implement write to add another format
+
+    Parameters
+    ----------
+    source: Table | Iterable[InvoiceParser] | Iterable[list]
+        table, invoices (like Invoices, or Invoices.iter_pages()) or rows to export
+
+    header: list, optional
+        header of the rows (default is header of source if it is a Table, otherwise header of Table)
+
+    footer: bool, optional
+        add a row of totals at the end (default is False)
+
+    force_invoice_data: bool, optional
+        rows of invoices are made with invoice data, see Invoices.make_table (default is False)
+
+    """
+
+    mode = 'w'  # mode to open the file in
+
+    def __init__(self, source: Table | Iterable, header: list = None, footer: bool = False,
+                 force_invoice_data: bool = False):
+        self.source = source
+        self.footer = footer
+        self.force_invoice_data = force_invoice_data
+
+        table = source if isinstance(source, Table) else Table()
+        self.header = header or table.header
+        self._columns = [i for i, name in enumerate(self.header) if name]
+        self._totals = [i for i, value in enumerate(table.footer) if value]
+
+    @property
+    def fields(self) -> list[str]:
+        """names of the exported columns"""
+        return [self.header[i].replace('\n', ' ') for i in self._columns]
+
+    def rows(self) -> Iterator[list]:
+        """yields the exported columns of each row of source, and the totals if footer"""
+        rows = self.source.rows if isinstance(self.source, Table) else self._invoice_rows()
+        totals = dict.fromkeys(self._totals, 0)
+        for row in rows:
+            if self.footer:
+                for i in totals:
+                    totals[i] += row[i] or 0
+            yield [row[i] for i in self._columns]
+
+        if self.footer:
+            yield [round(totals[i], 3) if i in totals else None for i in self._columns]
+
+    def _invoice_rows(self) -> Iterator[list]:
+        for invoice in self.source:
+            if isinstance(invoice, (list, tuple)):
+                yield invoice
+            else:
+                yield from invoice.rows(self.force_invoice_data)
+
+    def save(self, file: str | Path | IO) -> int:
+        """
+        writes the rows to file, a path or an open file
+
+        Returns
+        -------
+        int:
+            number of rows written
+        """
+        if isinstance(file, (str, Path)):
+            with open(file, self.mode, **({} if 'b' in self.mode else {'newline': '', 'encoding': 'utf-8'})) as f:
+                return self.write(f)
+        return self.write(file)
+
+    @abc.abstractmethod
+    def write(self, file: IO) -> int:
+        """writes the rows to an open file, returns the number of rows written"""
+
+
+class CSVExport(Exporter):
+    """
+    exports rows to csv, dates as YYYY-MM-DD
+
+    read Exporter.__doc__ for parameters, other keyword arguments are passed to csv.writer
+    """
+
+    def __init__(self, source: Table | Iterable, header: list = None, footer: bool = False,
+                 force_invoice_data: bool = False, **fmtparams):
+        super().__init__(source, header, footer, force_invoice_data)
+        self.fmtparams = fmtparams
+
+    def write(self, file: IO) -> int:
+        writer = csv.writer(file, **self.fmtparams)
+        writer.writerow(self.fields)
+        count = 0
+        for row in self.rows():
+            writer.writerow([value.date().isoformat() if isinstance(value, datetime.datetime) else value
+                             for value in row])
+            count += 1
+        return count
+
+
+class JSONLinesExport(Exporter):
+    """
+    exports rows to json lines, an object per row with fields as keys, dates as YYYY-MM-DD
+
+    read Exporter.__doc__ for parameters
+    """
+
+    def write(self, file: IO) -> int:
+        fields = self.fields
+        count = 0
+        for row in self.rows():
+            file.write(json.dumps(dict(zip(fields, row)), default=lambda date: date.date().isoformat()))
+            file.write('\n')
+            count += 1
+        return count
+
+
+class ParquetExport(Exporter):
+    """
+    exports rows to parquet, needs pyarrow
+
+    rows are written in row groups of batch_size rows, dates as date32
+
+    read Exporter.__doc__ for parameters
+
+    Raises
+    ------
+    ImportError:
+        if pyarrow is not installed
+    """
+
+    mode = 'wb'
+
+    def __init__(self, source: Table | Iterable, header: list = None, footer: bool = False,
+                 force_invoice_data: bool = False, batch_size: int = 65536):
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise ImportError("ParquetExport needs pyarrow, install it with 'pip install pyarrow'") from None
+
+        super().__init__(source, header, footer, force_invoice_data)
+        self.batch_size = batch_size
+        self._pa = pyarrow
+
+    def _schema(self):
+        pa = self._pa
+        types = {'BILL NO': pa.int64(), 'ITEM': pa.string(), 'DATE': pa.date32(), 'VALID': pa.bool_()}
+        return pa.schema([(field, types.get(field, pa.float64())) for field in self.fields])
+
+    def write(self, file: IO) -> int:
+        import pyarrow.parquet
+
+        schema = self._schema()
+        count = 0
+        with pyarrow.parquet.ParquetWriter(file, schema) as writer:
+            batch = []
+            for row in self.rows():
+                batch.append(row)
+                if len(batch) == self.batch_size:
+                    writer.write_table(self._table(batch, schema))
+                    count += len(batch)
+                    batch = []
+            if batch:
+                writer.write_table(self._table(batch, schema))
+                count += len(batch)
+        return count
+
+    def _table(self, rows: list[list], schema):
+        columns = [[row[i] for row in rows] for i in range(len(schema))]
+        for i, field in enumerate(schema):
+            if field.name == 'DATE':
+                columns[i] = [value.date() if isinstance(value, datetime.datetime) else value for value in columns[i]]
+        return self._pa.Table.from_arrays([self._pa.array(column, type=field.type)
+                                           for column, field in zip(columns, schema)], schema=schema)
@@ -0,0 +1,380 @@
+"""
+text extraction backends of Invoices
+
+an extractor is bound to the PdfReader (PyPDF2) of a pdf, then extracts the text of its pages by page index.
+PyPDF2Extractor is the default, PypdfExtractor and PdfminerExtractor need pypdf and pdfminer.six installed.
+ContentStreamExtractor reads the Tj/TJ text operators of the page straight from the content stream,
+which is enough for the fixed layout of vyapar invoices and much faster than a full layout extraction.
+
+any backend can be passed to Invoices by name (see EXTRACTORS) or as an instance,
+subclass Extractor and implement extract to add another one
+"""
+import abc
+import copy
+import re
+from io import StringIO
+from typing import TYPE_CHECKING, Callable
+
+if TYPE_CHECKING:
+    from PyPDF2 import PdfReader
+
+
+class Extractor(abc.ABC):
+    """
+    base of the text extraction backends
+
+    bind returns a copy of the extractor bound to a PdfReader, the copy extracts the text of its pages.
+    extractors are sent unbound to worker processes, each worker binds its own reader
+
+    """
+
+    name = 'base'
+
+    def __init__(self):
+        self.reader: 'PdfReader | None' = None
+
+    def bind(self, reader: 'PdfReader', password: None | str | bytes = None) -> 'Extractor':
+        """returns a copy of the extractor which extracts pages of reader"""
+        bound = copy.copy(self)
+        bound.reader = reader
+        bound._open(reader, password)
+        return bound
+
+    def _open(self, reader: 'PdfReader', password: None | str | bytes) -> None:
+        """opens the pdf of reader in the backend, if it needs its own document"""
+
+    @abc.abstractmethod
+    def extract(self, index: int) -> str:
+        """returns the text of page index"""
+
+    def __getstate__(self):
+        # bound documents stay in the process that opened them
+        return {key: value for key, value in self.__dict__.items() if not key.startswith('_') and key != 'reader'}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.reader = None
+
+    def __repr__(self):
+        return f"{type(self).__name__}()"
+
+
+class PyPDF2Extractor(Extractor):
+    """extracts text with PyPDF2 PageObject.extract_text, the default"""
+
+    name = 'pypdf2'
+
+    def extract(self, index: int) -> str:
+        return self.reader.pages[index].extract_text()
+
+
+class PypdfExtractor(Extractor):
+    """
+    extracts text with pypdf, the maintained successor of PyPDF2
+
+    Raises
+    ------
+    ImportError:
+        if pypdf is not installed
+    """
+
+    name = 'pypdf'
+
+    def __init__(self):
+        try:
+            import pypdf
+        except ImportError:
+            raise ImportError("PypdfExtractor needs pypdf, install it with 'pip install pypdf'") from None
+        super().__init__()
+
+    def _open(self, reader: 'PdfReader', password: None | str | bytes) -> None:
+        import pypdf
+
+        self._document = pypdf.PdfReader(reader.stream, password=password)
+
+    def extract(self, index: int) -> str:
+        return self._document.pages[index].extract_text()
+
+
+class PdfminerExtractor(Extractor):
+    """
+    extracts text with pdfminer.six
+
+    Parameters
+    ----------
+    laparams: dict, optional
+        layout parameters passed to pdfminer LAParams (default is None, pdfminer defaults)
+
+    Raises
+    ------
+    ImportError:
+        if pdfminer.six is not installed
+    """
+
+    name = 'pdfminer'
+
+    def __init__(self, laparams: dict = None):
+        try:
+            import pdfminer
+        except ImportError:
+            raise ImportError("PdfminerExtractor needs pdfminer.six, install it with 'pip install pdfminer.six'") from None
+        super().__init__()
+        self.laparams = laparams
+
+    def _open(self, reader: 'PdfReader', password: None | str | bytes) -> None:
+        from pdfminer.layout import LAParams
+        from pdfminer.pdfdocument import PDFDocument
+        from pdfminer.pdfinterp import PDFResourceManager
+        from pdfminer.pdfpage import PDFPage
+        from pdfminer.pdfparser import PDFParser
+
+        password = password.decode() if isinstance(password, bytes) else password or ''
+        self._pages = list(PDFPage.create_pages(PDFDocument(PDFParser(reader.stream), password)))
+        self._manager = PDFResourceManager(caching=True)
+        self._laparams = LAParams(**(self.laparams or {}))
+
+    def extract(self, index: int) -> str:
+        from pdfminer.converter import TextConverter
+        from pdfminer.pdfinterp import PDFPageInterpreter
+
+        output = StringIO()
+        device = TextConverter(self._manager, output, laparams=self._laparams)
+        PDFPageInterpreter(self._manager, device).process_page(self._pages[index])
+        device.close()
+        return output.getvalue()
+
+
+# tokens of a content stream: literal string (one level of nested parentheses), hex string, array brackets,
+# dict brackets, name, number, operator and comment
+_TOKEN = re.compile(rb"""
+    (?P<string>\((?:[^()\\]|\\.|\((?:[^()\\]|\\.)*\))*\))
+    | (?P<hex><[0-9A-Fa-f\s]*>)
+    | (?P<array>[\[\]])
+    | (?P<dict><<|>>)
+    | (?P<name>/[^\s/\[\]()<>{}%]*)
+    | (?P<number>[+-]?(?:\d+\.?\d*|\.\d+))
+    | (?P<operator>[A-Za-z'"][A-Za-z0-9*'"]*)
+    | (?P<comment>%[^\r\n]*)
+""", re.VERBOSE | re.DOTALL)
+_ESCAPE = re.compile(rb"\\([0-7]{1,3}|\r\n|.)", re.DOTALL)
+_ESCAPES = {b'n': b'\n', b'r': b'\r', b't': b'\t', b'b': b'\b', b'f': b'\f', b'\n': b'', b'\r': b'', b'\r\n': b''}
+_BFCHAR = re.compile(rb"beginbfchar(.*?)endbfchar", re.DOTALL)
+_BFRANGE = re.compile(rb"beginbfrange(.*?)endbfrange", re.DOTALL)
+_CODESPACE = re.compile(rb"begincodespacerange\s*<([0-9A-Fa-f]+)>", re.DOTALL)
+_HEX = re.compile(rb"<([0-9A-Fa-f\s]*)>|\[|\]")
+_INLINE_IMAGE = re.compile(rb"\sEI(?=\s)")
+
+TJ_SPACE = -250  # TJ offsets (thousandths of text space) below this are gaps between words
+
+
+def _unescape(match: re.Match) -> bytes:
+    escape = match.group(1)
+    if escape[:1].isdigit():
+        return bytes([int(escape, 8) & 0xFF])
+    return _ESCAPES.get(escape, escape)
+
+
+def _hex(data: bytes) -> bytes:
+    data = re.sub(rb'\s', b'', data)
+    return bytes.fromhex((data + b'0' * (len(data) % 2)).decode())
+
+
+def _parse_cmap(data: bytes) -> tuple[dict[bytes, str], int]:
+    """parses a ToUnicode cmap, returns the map of character codes to text and the code width in bytes"""
+    cmap = {}
+    for block in _BFCHAR.findall(data):
+        values = [_hex(match.group(1)) for match in _HEX.finditer(block) if match.group(1) is not None]
+        for code, text in zip(values[::2], values[1::2]):
+            cmap[code] = text.decode('utf-16-be', 'replace')
+
+    for block in _BFRANGE.findall(data):
+        tokens = [match.group(1) for match in _HEX.finditer(block)]  # None for [ and ]
+        i = 0
+        while i + 2 < len(tokens):
+            low, high = _hex(tokens[i]), _hex(tokens[i + 1])
+            width, start, stop = len(low), int.from_bytes(low, 'big'), int.from_bytes(high, 'big')
+            if tokens[i + 2] is None:  # [<dst> <dst> ...]
+                end = tokens.index(None, i + 3)
+                for offset, text in enumerate(tokens[i + 3:end]):
+                    cmap[(start + offset).to_bytes(width, 'big')] = _hex(text).decode('utf-16-be', 'replace')
+                i = end + 1
+            else:
+                text = _hex(tokens[i + 2])
+                base = int.from_bytes(text, 'big')
+                for offset in range(stop - start + 1):
+                    cmap[(start + offset).to_bytes(width, 'big')] = \
+                        (base + offset).to_bytes(len(text), 'big').decode('utf-16-be', 'replace')
+                i += 3
+
+    codespace = _CODESPACE.search(data)
+    width = len(codespace.group(1)) // 2 if codespace else len(next(iter(cmap), b'\0'))
+    return cmap, width
+
+
+class ContentStreamExtractor(Extractor):
+    """
+    extracts text by tokenizing the content stream of the page, no layout analysis
+
+    text shown by Tj, TJ, ' and " is decoded with the ToUnicode cmap of the font
+    (or its WinAnsi/latin-1 encoding), lines are split where the text moves to another line
+    and pieces of text moved along the same line are joined with a space.
+    meant for vyapar invoices, which are written line by line; text of other layouts may come out in a different order
+    """
+
+    name = 'content'
+
+    def _open(self, reader: 'PdfReader', password: None | str | bytes) -> None:
+        self._fonts: dict[int, Callable[[bytes], str]] = {}  # decoders of the fonts, by object id
+
+    def extract(self, index: int) -> str:
+        page = self.reader.pages[index]
+        contents = page.get_contents()
+        if contents is None:
+            return ''
+        resources = page.get('/Resources')
+        fonts = resources.get_object().get('/Font') if resources is not None else None
+        return self._text(contents.get_data(), fonts.get_object() if fonts is not None else {})
+
+    def _decoder(self, font) -> Callable[[bytes], str]:
+        key = id(font.get_object()) if font is not None else None
+        decoder = self._fonts.get(key)
+        if decoder is None:
+            decoder = self._fonts[key] = self._make_decoder(font.get_object() if font is not None else {})
+        return decoder
+
+    @staticmethod
+    def _make_decoder(font) -> Callable[[bytes], str]:
+        encoding = font.get('/Encoding')
+        encoding = 'cp1252' if encoding == '/WinAnsiEncoding' else 'latin-1'
+        cmap, width = {}, 2 if font.get('/Subtype') == '/Type0' else 1
+        if '/ToUnicode' in font:
+            cmap, width = _parse_cmap(font['/ToUnicode'].get_object().get_data())
+
+        if not cmap:
+            return lambda data: data.decode(encoding, 'replace')
+        if width == 1:
+            # one translate table of all the 256 codes, applied to the bytes read as latin-1
+            table = {byte: cmap.get(bytes([byte])) or bytes([byte]).decode(encoding, 'replace') for byte in range(256)}
+            return lambda data: data.decode('latin-1').translate(table)
+        return lambda data: ''.join([cmap.get(data[i:i + width], '') for i in range(0, len(data), width)])
+
+    def _text(self, data: bytes, fonts) -> str:
+        out: list[str] = []
+        operands: list = []
+        array: list | None = None
+        decode = self._decoder(None)
+        leading = 0.0
+        line = [1.0, 0.0, 0.0, 1.0, 0.0, 0.0]  # text line matrix
+        y = None  # y of the last text shown
+        moved = False  # text moved since the last text shown
+
+        def show(text: str, newline: bool = False) -> None:
+            nonlocal y, moved
+            if out:
+                if newline or (moved and y != line[5]):
+                    out.append('\n')
+                elif moved and not out[-1][-1:].isspace() and not text[:1].isspace():
+                    out.append(' ')
+            out.append(text)
+            y, moved = line[5], False
+
+        def move(tx: float, ty: float) -> None:
+            nonlocal moved
+            a, b, c, d, e, f = line
+            line[4:6] = e + tx * a + ty * c, f + tx * b + ty * d
+            moved = True
+
+        position = 0
+        while True:
+            match = _TOKEN.search(data, position)
+            if match is None:
+                break
+            position = match.end()
+            kind = match.lastgroup
+            token = match.group()
+
+            if kind == 'string':
+                value = _ESCAPE.sub(_unescape, token[1:-1])
+            elif kind == 'hex':
+                value = _hex(token[1:-1])
+            elif kind == 'number':
+                value = float(token)
+            elif kind == 'array':
+                if token == b'[':
+                    array = []
+                else:
+                    operands.append(array or [])
+                    array = None
+                continue
+            elif kind == 'operator':
+                if token == b'BI':  # inline image, skip its data up to EI
+                    end = _INLINE_IMAGE.search(data, position)
+                    position = end.end() if end else len(data)
+                elif token == b'BT':
+                    line[:] = [1.0, 0.0, 0.0, 1.0, 0.0, 0.0]
+                    moved = True
+                elif token == b'Tf' and operands:
+                    decode = self._decoder(fonts.get(operands[0]) if len(operands) > 1 else None)
+                elif token in (b'Td', b'TD') and len(operands) >= 2:
+                    move(operands[-2], operands[-1])
+                    if token == b'TD':
+                        leading = -operands[-1]
+                elif token == b'Tm' and len(operands) >= 6:
+                    line[:] = operands[-6:]
+                    moved = True
+                elif token == b'TL' and operands:
+                    leading = operands[-1]
+                elif token == b'T*':
+                    move(0, -leading)
+                elif token == b'Tj' and operands and isinstance(operands[-1], bytes):
+                    show(decode(operands[-1]))
+                elif token in (b"'", b'"') and operands and isinstance(operands[-1], bytes):
+                    move(0, -leading)
+                    show(decode(operands[-1]), newline=True)
+                elif token == b'TJ' and operands and isinstance(operands[-1], list):
+                    pieces = []
+                    for item in operands[-1]:
+                        if isinstance(item, bytes):
+                            pieces.append(decode(item))
+                        elif item < TJ_SPACE and pieces:
+                            pieces.append(' ')
+                    show(''.join(pieces))
+                operands = []
+                continue
+            elif kind == 'name':
+                value = token.decode('latin-1')
+            else:  # comment, dict
+                continue
+
+            if array is not None:
+                array.append(value)
+            else:
+                operands.append(value)
+
+        return ''.join(out)
+
+
+EXTRACTORS: dict[str, type[Extractor]] = {
+    extractor.name: extractor for extractor in (PyPDF2Extractor, PypdfExtractor, PdfminerExtractor, ContentStreamExtractor)
+}
+
+
+def get_extractor(extractor: Extractor | str | None = None) -> Extractor:
+    """
+    returns the extractor, by name from EXTRACTORS, or PyPDF2Extractor if None
+
+    Raises
+    ------
+    ValueError:
+        if there is no extractor of the name
+
+    ImportError:
+        if the extractor needs a library which is not installed
+    """
+    if extractor is None:
+        return PyPDF2Extractor()
+    if isinstance(extractor, str):
+        if extractor.lower() not in EXTRACTORS:
+            raise ValueError(f"no extractor '{extractor}', use one of {', '.join(EXTRACTORS)}")
+        return EXTRACTORS[extractor.lower()]()
+    return extractor
@@ -1,4 +1,26 @@
-from errors import *
+from decimal import Decimal, ROUND_HALF_UP
+
+from .errors import *
+from .round import PAISE, div_round, to_paise
+
+
+_set = object.__setattr__  # sets a slot of the immutable objects below
+
+RATE_SCALE = 10_000  # rates are kept in integer 1/10000ths of a percent
+_rates: dict[float, int] = {}
+
+
+def rate_units(rate: float) -> int:
+    """gst rate in integer 1/10000ths of a percent, 1.5 is 15000"""
+    units = _rates.get(rate)
+    if units is None:
+        units = _rates[rate] = int((Decimal(repr(rate)) * RATE_SCALE).to_integral_value(ROUND_HALF_UP))
+    return units
+
+
+def gst_paise(sub_total_paise: int, rate: float) -> int:
+    """gst amount of sub_total at rate, rounded half up to the paise"""
+    return div_round(sub_total_paise * rate_units(rate), 100 * RATE_SCALE)
 
 
 class GSTBase(object):
@@ -6,13 +28,14 @@ class GSTBase(object):
     Auto calculates gst with arguments rate and sub_total
 
     auto calculates gst returns the CGST/SGST class according to the type
-    on change of sub_total auto calculates amount
+    gst is calculated once when created, CGST/SGST cannot be changed afterwards
 
-    either amount should be provided or sub_total. otherwise,
-    gst will amount will be 0 and sub_total will be 0
+    amounts are kept as integer paise (amount_paise, sub_total_paise), so sums and
+    comparisons are exact. gst is rounded half up to the paise.
+    amount and sub_total are the same values in rupees
 
-    you have to change sub_total to change amount
-    only sub_total is allowed to change once assigned
+    either amount should be provided or sub_total. otherwise,
+    gst amount will be 0
 
 
     Parameters
@@ -40,49 +63,84 @@ class GSTBase(object):
         when try to change amount.
         amount is calculated if not provided, and then cannot be changed
 
+    GSTChangeError:
+        when try to change sub_total
+
+    InvalidGstType:
+        when type is not CGST/SGST
+
     """
 
-    def __new__(cls, type: str, rate: float, sub_total: float = None, amount: float = 0):
-        if cls is GSTBase:
-            return CGST(rate, sub_total, amount) if type.lower()[0] == 'c' else SGST(rate, sub_total, amount)
-        else:
-            return super().__new__(cls)
+    __slots__ = ('rate', 'amount_paise', 'sub_total_paise')
 
-    def __init__(self, type: str, rate: float, sub_total: float = None, amount: float = 0):
+    type: str  # CGST or SGST, set by the subclass
+
+    def __new__(cls, type: str, rate: float, sub_total: float = None, amount: float = 0):
         if type.lower()[0] not in ('c', 's'):
             raise InvalidGstType(f"not '{type}'")
-        elif len(type) == 1:
-            type = (type + 'gst').upper()
+        return (CGST if type.lower()[0] == 'c' else SGST)(rate, sub_total, amount)
+
+    @classmethod
+    def _new(cls, rate: float, sub_total: float = None, amount: float = 0) -> 'GSTBase':
+        rate = float(rate.replace('%', '')) if isinstance(rate, str) else rate
+        return cls._from_paise(rate,
+                               to_paise(sub_total) if sub_total else None,
+                               to_paise(amount) if amount else amount)
+
+    @classmethod
+    def _from_paise(cls, rate: float, sub_total_paise: int = None, amount_paise: int = 0) -> 'GSTBase':
+        # gst is calculated once here, the object cannot be changed afterwards
+        if sub_total_paise:
+            amount_paise = gst_paise(sub_total_paise, rate)
+        elif amount_paise and rate:
+            sub_total_paise = div_round(amount_paise * 100 * RATE_SCALE, rate_units(rate))
+
+        self = object.__new__(cls)
+        _set_rate(self, rate)
+        _set_amount(self, amount_paise)
+        _set_sub_total(self, sub_total_paise)
+        return self
 
-        self.type = type
-        self.rate = float(rate.replace('%', '')) if isinstance(rate, str) else rate
-        self.amount = float(amount.replace(',', '')) if isinstance(amount, str) else amount
-        self.sub_total = float(sub_total.replace(',', '')) if isinstance(sub_total, str) else sub_total
+    @classmethod
+    def _like(cls, other: 'GSTBase') -> 'GSTBase':
+        # same rate, amount and sub_total as other, without calculating again
+        self = object.__new__(cls)
+        _set_rate(self, other.rate)
+        _set_amount(self, other.amount_paise)
+        _set_sub_total(self, other.sub_total_paise)
+        return self
+
+    @property
+    def amount(self) -> float:
+        return self.amount_paise / PAISE
+
+    @property
+    def sub_total(self) -> float | None:
+        return None if self.sub_total_paise is None else self.sub_total_paise / PAISE
+
+    def __getnewargs__(self):
+        # slots are restored by __setstate__, used when pickling between processes
+        return self.rate,
+
+    def __setstate__(self, state):
+        for key, value in state[1].items():
+            _set(self, key, value)
 
     def __setattr__(self, key, value):
-        if key == 'rate' and key in self.__dict__:
+        if key == 'rate':
             raise RateChangeError
-        if key == 'amount' and value:
-            if key in self.__dict__:
-                raise GstAmountChangeError
-            else:
-                self.__dict__['sub_total'] = round(value * 100 / 1.5, 2)
-        if key == 'sub_total':
-            if value:
-                self.__dict__['amount'] = round(value * self.rate / 100, 2)
-            elif self.sub_total:
-                return
-
-        self.__dict__[key] = value
+        if key in ('amount', 'amount_paise'):
+            raise GstAmountChangeError
+        raise GSTChangeError(f"{key}")
 
     def __eq__(self, other):
-        return self.rate == other.rate and self.amount == other.amount \
+        return self.rate == other.rate and self.amount_paise == other.amount_paise \
             if isinstance(other, GSTBase) else False
 
     def __add__(self, other):
         if not isinstance(other, GSTBase):
             return self
-        if self.rate == other.rate and self.type != other.type and self.amount == other.amount:
+        if self.rate == other.rate and self.type != other.type and self.amount_paise == other.amount_paise:
             return GST(cgst=self, sgst=other) if self.type[0].lower() == 'c' else GST(cgst=other, sgst=self)
 
     def __radd__(self, other):
@@ -94,6 +152,11 @@ class GSTBase(object):
         return f"{self.type} {self.rate} {self.amount}"
 
 
+_set_rate = GSTBase.rate.__set__
+_set_amount = GSTBase.amount_paise.__set__
+_set_sub_total = GSTBase.sub_total_paise.__set__
+
+
 class CGST(GSTBase):
     """
     CGST object of GSTBase
@@ -102,9 +165,12 @@ class CGST(GSTBase):
     read GSTBase.__doc__ for more info
     """
 
-    def __init__(self, rate: float, sub_total: float = None, amount: float = 0, **kwargs):
-        if not self.__dict__:
-            super().__init__(type='c', rate=rate, sub_total=sub_total, amount=amount)
+    __slots__ = ()
+
+    type = 'CGST'
+
+    def __new__(cls, rate: float, sub_total: float = None, amount: float = 0, **kwargs):
+        return cls._new(rate, sub_total, amount)
 
 
 class SGST(GSTBase):
@@ -113,9 +179,12 @@ class SGST(GSTBase):
     read GSTBase.__doc__ for more info
     """
 
-    def __init__(self, rate: float, sub_total: float = None, amount: float = 0, **kwargs):
-        if not self.__dict__:
-            super().__init__(type='s', rate=rate, sub_total=sub_total, amount=amount)
+    __slots__ = ()
+
+    type = 'SGST'
+
+    def __new__(cls, rate: float, sub_total: float = None, amount: float = 0, **kwargs):
+        return cls._new(rate, sub_total, amount)
 
 
 class GST:
@@ -123,7 +192,7 @@ class GST:
     GST is combination of CGST and SGST
 
     adding CGST and SGST returns GST
-    it inherits the rate and adds the amount and sub_total
+    it inherits the rate and adds the amount and sub_total, in paise like GSTBase
 
     Parameters
     ----------
@@ -139,35 +208,65 @@ class GST:
 
     """
 
+    __slots__ = ('rate', 'amount_paise', 'sub_total_paise', 'cgst', 'sgst')
+
+    type = 'GST'
+
     def __init__(self, rate: float = None, sub_total: float = None, amount: float = 0, cgst: CGST | GSTBase = None, sgst: SGST | GSTBase = None):
         if rate and (sub_total or amount):
             cgst = CGST(rate, sub_total, amount)
-            sgst = SGST(rate, sub_total, amount)
+            sgst = SGST._like(cgst)
         if not (cgst and sgst):
             raise GSTInsufficientArgs
         if cgst.rate != sgst.rate:
             raise IncorrectGSTRates(f"{cgst.rate} != {sgst.rate}")
-        self.rate = cgst.rate
-        self.type = "GST"
-        self.amount = cgst.amount + sgst.amount
-        self.sub_total = cgst.sub_total
+        self._init(cgst, sgst)
+
+    def _init(self, cgst: GSTBase, sgst: GSTBase) -> None:
+        _set(self, 'rate', cgst.rate)
+        _set(self, 'amount_paise', cgst.amount_paise + sgst.amount_paise)
+        _set(self, 'sub_total_paise', cgst.sub_total_paise)
+
+        _set(self, 'cgst', cgst)
+        _set(self, 'sgst', sgst)
+
+    @classmethod
+    def _from_paise(cls, rate: float, sub_total_paise: int) -> 'GST':
+        # GST(rate, sub_total) of a sub_total already in paise
+        self = object.__new__(cls)
+        cgst = CGST._from_paise(rate, sub_total_paise)
+        self._init(cgst, SGST._like(cgst))
+        return self
+
+    @property
+    def amount(self) -> float:
+        return self.amount_paise / PAISE
+
+    @property
+    def sub_total(self) -> float:
+        return self.sub_total_paise / PAISE
+
+    @property
+    def total_paise(self) -> int:
+        return self.sub_total_paise + self.amount_paise
 
-        self.cgst = cgst
-        self.sgst = sgst
+    @property
+    def total(self) -> float:
+        return self.total_paise / PAISE
 
-        self.total = self.sub_total + self.amount
+    def __setstate__(self, state):
+        for key, value in state[1].items():
+            _set(self, key, value)
 
     def __setattr__(self, key, value):
-        if key in self.__dict__:
-            raise GSTChangeError
-        self.__dict__[key] = value
+        raise GSTChangeError
 
     def __add__(self, other):
         if isinstance(other, (int, float)):
             return other + self.amount
         elif isinstance(other, GST):
             if self.rate == other.rate:
-                return GST(self.rate, self.sub_total + other.sub_total)
+                return GST._from_paise(self.rate, self.sub_total_paise + other.sub_total_paise)
 
     def __radd__(self, other):
         if isinstance(other, (GST, int, float)):
@@ -178,7 +277,7 @@ class GST:
         return f"GST -> {self.cgst.rate + self.sgst.rate}% {self.amount}"
 
     def __eq__(self, other):
-        return self.rate == other.rate and self.amount == other.amount if isinstance(other, GST) else False
+        return self.rate == other.rate and self.amount_paise == other.amount_paise if isinstance(other, GST) else False
 
     def __iter__(self):
         for gst in (self.sgst, self.cgst):
@@ -1,17 +1,41 @@
 import datetime
-import re
+import functools
+import glob
+import math
+import mmap
+import os
+import time
+from collections import deque
+from concurrent.futures import Executor
 from io import BytesIO
+from itertools import islice
 from os import path
 from pathlib import Path
+from weakref import WeakKeyDictionary
 
-from PyPDF2 import PdfReader
-from PyPDF2.errors import PdfReadError
+from .errors import *
+from .extractors import Extractor, get_extractor
+from .gst import GSTBase, GST
+from .items import MergedItems, Item
+from .round import to_paise, to_rupees
+from .patterns import Patterns, PATTERNS
+from .segmenter import InvoiceSegmenter, Segment
+from . import profiling
+from .profiling import logger, timed
+from .table import Table, ColumnarTable
+from typing import TYPE_CHECKING, AsyncIterator, Callable, Iterable, Iterator, NamedTuple
 
-from errors import *
-from gst import GSTBase, GST
-from items import MergedItems, Item
-from table import Table
-from typing import Callable
+if TYPE_CHECKING:
+    import asyncio
+    from PyPDF2 import PdfReader
+    from .cache import ParseCache
+    from .checkpoint import Checkpoint
+
+
+MAX_CHUNK_SIZE = 64  # max pages sent to a worker at a time
+MAX_CONCURRENT_LOADS = os.cpu_count() or 1  # max pdfs loaded at a time by Invoices.aload, per event loop
+
+_load_limits: 'WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]' = WeakKeyDictionary()
 
 
 class Invoices:
@@ -28,6 +52,46 @@ class Invoices:
     password: str | bytes, optional
         password for pdf, if any (default is None)
 
+    parallel: bool | int, optional
+        parse pages on a process pool (default is False)
+        True uses one worker per cpu, an int sets the number of workers
+
+    lazy: bool, optional
+        do not parse the pages up front (default is False)
+        invoices and table are None, iterate or call make_table to parse pages on demand
+
+    patterns: Patterns, optional
+        compiled regexes to find the fields of each invoice (default is PATTERNS)
+
+    cache: ParseCache | str, optional
+        cache of parsed pages, or path of its sqlite file (default is None)
+        pages found in the cache are not extracted or parsed again
+
+    extractor: Extractor | str, optional
+        text extraction backend, or its name: 'pypdf2', 'pypdf', 'pdfminer' or 'content'
+        (default is None, PyPDF2Extractor), see extractors
+
+    memory_map: bool, optional
+        map the pdf file into memory instead of reading all of it (default is False)
+        pages are read from the os page cache, so large pdfs are not copied into each process,
+        worker processes map the same file. ignored if pdf is a BytesIO
+
+    checkpoint: Checkpoint | str, optional
+        checkpoint of the pdfs already parsed, or path of its json file (default is None)
+        only the pages added since the last run of the same file name are parsed, from start_page.
+        the checkpoint is not updated by parsing, call commit_checkpoint once the rows are saved.
+        if resumed is False every page is parsed (first run, or the recorded pages changed), see Checkpoint
+
+    strict: bool, optional
+        raise PageParseError at the first invoice page which cannot be parsed (default is False)
+        otherwise the page is left out and its PageError is added to errors,
+        export them with Export(..., errors=invoices.errors) or CSVExport(invoices.errors, header=PageError._fields)
+
+    segment: bool, optional
+        split the text of the pages into invoices at their invoice number and total (default is False),
+        for pdfs where a page is not one invoice: invoices longer than a page or pages with several invoices.
+        see InvoiceSegmenter, page of a PageError is the first page of the invoice. cache is not used
+
 
     Raises
     ------
@@ -37,6 +101,9 @@ class Invoices:
         FileNotFoundError:
             if the given path is incorrect
 
+        PageParseError:
+            if strict, at the first page which cannot be parsed
+
 
     Returns
     -------
@@ -44,18 +111,29 @@ class Invoices:
 
     """
 
-    def __init__(self, pdf: str | Path | BytesIO, password: None | str | bytes = None, parallel=False):
+    def __init__(self, pdf: str | Path | BytesIO, password: None | str | bytes = None, parallel: bool | int = False,
+                 lazy: bool = False, patterns: Patterns = PATTERNS, cache: 'ParseCache | str' = None,
+                 extractor: Extractor | str = None, memory_map: bool = False, checkpoint: 'Checkpoint | str' = None,
+                 strict: bool = False, segment: bool = False):
 
         if type(pdf) in (str, Path):
             if path.isfile(pdf):
                 self.filename = path.basename(pdf)
             else:
                 raise FileNotFoundError(f"Invalid file path, '{path.abspath(pdf)}' is not a valid path")
+        else:
+            self.filename = path.basename(getattr(pdf, 'name', None) or type(pdf).__name__)
 
+        from PyPDF2 import PdfReader  # imported on first use, parsing text alone does not need it
+        from PyPDF2.errors import PdfReadError
+
+        source = pdf
+        memory_map = memory_map and type(pdf) in (str, Path)
         try:
-            pdf = PdfReader(pdf, strict=True, password=password)
+            with timed('open'):
+                pdf = PdfReader(_map_file(pdf) if memory_map else pdf, strict=True, password=password)
 
-            if "Vyaparapp" not in pdf.metadata.creator:
+            if not pdf.metadata or "Vyaparapp" not in (pdf.metadata.creator or ''):
                 raise NotAVyaparPDF(f'"{self.filename}"')
 
         except PdfReadError as e:
@@ -64,17 +142,380 @@ class Invoices:
             ) from None
 
         else:
-            self.invoices = []
-            for page in pdf.pages:
-                page = page.extract_text()
+            self._pdf = pdf
+            self._source = source
+            self._password = password
+            self._patterns = patterns
+            if isinstance(cache, (str, Path)):
+                from .cache import ParseCache  # sqlite3 is imported only when a cache is used
+                cache = ParseCache(cache)
+            self.cache = cache
+            self.extractor = get_extractor(extractor)
+            self._memory_map = memory_map
+            self._workers = os.cpu_count() if parallel is True else int(parallel or 0)
+            self.strict = strict
+            self.segment = segment
+            self.errors: list[PageError] = []
+
+            # pages already parsed by an earlier run
+            if isinstance(checkpoint, (str, Path)):
+                from .checkpoint import Checkpoint
+                checkpoint = Checkpoint(checkpoint)
+            self.checkpoint = checkpoint
+            # index of the first page parsed, more than 0 if resumed from the checkpoint
+            self.start_page = 0 if self.checkpoint is None else self.checkpoint.start(self.filename, pdf)
+            self._parsed = False  # all the pages from start_page are parsed, see commit_checkpoint
+
+            self.invoices: list[InvoiceParser] | None = None
+            self.table: Table | None = None
+            if not lazy:
+                self.invoices = list(self.iter_pages())
+                # self._header = ['BILL NO', 'DATE', 'ITEM', 'TAXABLE\nAMOUNT', 'SGST', 'CGST', 'ROUND\nOFF', 'TOTAL']
+                self.table = self.make_table()
+
+    @classmethod
+    def from_many(cls, pdfs: str | Iterable[str | Path | BytesIO], password: None | str | bytes = None,
+                  workers: int = None, patterns: Patterns = PATTERNS, extractor: Extractor | str = None,
+                  memory_map: bool = False, strict: bool = False, segment: bool = False) -> 'Invoices':
+        """
+        parses many pdfs concurrently and merges their invoices into one table
+
+        pdfs are read and parsed on a process pool, one pdf per task, at most two pdfs per worker are queued.
+        invoice numbers repeated across pdfs are kept only once (first pdf wins).
+        a pdf which fails is recorded in failures, the rest of the batch goes on.
+
+        Parameters
+        ----------
+        pdfs: str | Iterable[str | Path | BytesIO]
+            a glob pattern, or paths/BytesIO of pdfs
+
+        password: str | bytes, optional
+            password for the pdfs, if any (default is None)
+
+        workers: int, optional
+            number of worker processes (default is one per cpu), 1 parses in this process
+
+        patterns: Patterns, optional
+            compiled regexes to find the fields of each invoice (default is PATTERNS)
+
+        extractor: Extractor | str, optional
+            text extraction backend, or its name (default is None, PyPDF2Extractor)
+
+        memory_map: bool, optional
+            workers map the pdf files instead of reading them into memory (default is False)
+
+        strict: bool, optional
+            raise PageParseError of the first pdf with a page which cannot be parsed (default is False)
+
+        segment: bool, optional
+            split the text of each pdf into invoices instead of one invoice per page (default is False)
+
+        Returns
+        -------
+        Invoices:
+            with merged invoices and table,
+            files: names of the pdfs parsed
+            failures: dict of name of pdf and the exception it raised, like NotAVyaparPDF, VyaparPDFReadError
+            duplicates: invoice numbers dropped as they were already in an earlier pdf
+            errors: PageError of each page which could not be parsed, of all the pdfs
+        """
+        pdfs = sorted(glob.glob(pdfs)) if isinstance(pdfs, str) else [str(pdf) if isinstance(pdf, Path) else pdf
+                                                                      for pdf in pdfs]
+        names = [str(pdf) if isinstance(pdf, (str, Path)) else getattr(pdf, 'name', None) or f'<{type(pdf).__name__} {i}>'
+                 for i, pdf in enumerate(pdfs)]
+        workers = workers or os.cpu_count()
+        extractor = get_extractor(extractor)
+
+        results = []
+        if workers > 1 and len(pdfs) > 1:
+            from concurrent.futures import ProcessPoolExecutor  # imports multiprocessing, only for a pool
+
+            with ProcessPoolExecutor(workers) as executor:
+                # workers open the files themselves, and only a few pdfs per worker are queued at a time,
+                # so the batch is never all in memory at once
+                tasks = (executor.submit(_load_pdf, pdf, password, patterns, extractor, memory_map, strict, segment)
+                         for pdf in pdfs)
+                pending = deque(islice(tasks, workers * 2))
+                while pending:
+                    result = pending.popleft()
+                    error = result.exception()
+                    if isinstance(error, PageParseError):
+                        # strict stops at the first pdf with a page error, as in this process
+                        for future in pending:
+                            future.cancel()
+                        raise error
+                    results.append(error or result.result())
+                    pending.extend(islice(tasks, 1))
+        else:
+            for pdf in pdfs:
                 try:
-                    self.invoices.append(InvoiceParser(page))
-                except:
-                    pass
-            # self._header = ['BILL NO', 'DATE', 'ITEM', 'TAXABLE\nAMOUNT', 'SGST', 'CGST', 'ROUND\nOFF', 'TOTAL']
-            self.table = self.make_table()
+                    results.append(_load_pdf(pdf, password, patterns, extractor, memory_map, strict, segment))
+                except PageParseError:
+                    raise
+                except Exception as e:
+                    results.append(e)
+
+        self = cls.__new__(cls)
+        self.filename = None
+        self._pdf = self._source = self._password = self.cache = None
+        self._patterns = patterns
+        self.extractor = extractor
+        self._memory_map = memory_map
+        self._workers = 0
+        self.checkpoint, self.start_page, self._parsed = None, 0, True
+        self.strict = strict
+        self.segment = segment
+        self.errors = []
+
+        self.files = names
+        self.failures = {}
+        self.duplicates = []
+        self.invoices = []
+        seen = set()  # invoice numbers of the earlier pdfs
+        for name, result in zip(names, results):
+            if isinstance(result, PageParseError):
+                raise result
+            if isinstance(result, BaseException):
+                self.failures[name] = result
+                continue
+            invoices, errors = result
+            self.errors.extend(errors)
+            for invoice in invoices:
+                if invoice.invoice_no in seen:
+                    self.duplicates.append(invoice.invoice_no)
+                    continue
+                self.invoices.append(invoice)
+            # numbers repeated within a pdf are kept, as Invoices keeps them
+            seen.update(invoice.invoice_no for invoice in invoices)
+
+        self.table = self.make_table()
+        return self
+
+    @classmethod
+    def from_directory(cls, directory: str | Path, pattern: str = '*.pdf', **kwargs) -> 'Invoices':
+        """
+        parses all the pdfs in directory matching pattern, see Invoices.from_many
+
+        Parameters
+        ----------
+        directory: str | Path
+            directory of pdfs
+
+        pattern: str, optional
+            glob pattern of the pdfs, use '**/*.pdf' for sub directories (default is '*.pdf')
+        """
+        if not path.isdir(directory):
+            raise FileNotFoundError(f"Invalid directory, '{path.abspath(directory)}' is not a valid path")
+        return cls.from_many(sorted(Path(directory).glob(pattern)), **kwargs)
+
+    @classmethod
+    async def aload(cls, pdf: str | Path | BytesIO, password: None | str | bytes = None, executor: Executor = None,
+                    semaphore: 'asyncio.Semaphore' = None, **kwargs) -> 'Invoices':
+        """
+        Invoices(pdf, password, **kwargs) without blocking the event loop
+
+        the pdf is read and parsed on executor. at most MAX_CONCURRENT_LOADS pdfs are loaded at a time
+        on the event loop, the others wait for their turn, so many uploads can be awaited at once.
+        use lazy=True and async for to parse the pages one at a time
+
+        Parameters
+        ----------
+        pdf: str | Path | BytesIO
+            path or BytesIO of the pdf
+
+        password: str | bytes, optional
+            password for pdf, if any (default is None)
+
+        executor: Executor, optional
+            executor to load the pdf on (default is None, the default executor of the event loop),
+            with a ProcessPoolExecutor the loaded Invoices is sent back without its pdf, don't use lazy
+
+        semaphore: asyncio.Semaphore, optional
+            limits the concurrent loads instead of the default limit of the event loop (default is None)
+
+        kwargs:
+            arguments of Invoices, like parallel, lazy, patterns or cache
+
+        Returns
+        -------
+        Invoices:
+            the loaded invoices
+        """
+        import asyncio  # imported on first use, it takes longer to import than the rest of the package
+
+        loop = asyncio.get_running_loop()
+        if semaphore is None:
+            semaphore = _load_limits.get(loop)
+            if semaphore is None:
+                semaphore = _load_limits[loop] = asyncio.Semaphore(MAX_CONCURRENT_LOADS)
+
+        async with semaphore:
+            return await loop.run_in_executor(executor, functools.partial(cls, pdf, password, **kwargs))
+
+    def iter_pages(self) -> Iterator['InvoiceParser']:
+        """
+        yields the parsed invoice of each page, one page at a time
+
+        pages which are not invoices are skipped.
+        if the invoices are already parsed they are yielded from memory,
+        otherwise pages are extracted and parsed as the generator is consumed.
+        with a checkpoint, only the pages from start_page are parsed, whatever their invoice numbers.
+        pages which cannot be parsed are added to errors, or raise PageParseError if strict
+
+        Yields
+        ------
+        InvoiceParser:
+            invoice of each page in page order
+        """
+        if self.invoices is not None:
+            yield from self.invoices
+        else:
+            self.errors = []
+            for invoice in self._iter_new_pages():
+                if isinstance(invoice, PageError):
+                    invoice = invoice._replace(file=self.filename)
+                    if self.strict:
+                        raise PageParseError(f"page {invoice.page} of {self.filename}, {invoice.message}", invoice)
+                    logger.warning('page %s of %s: %s', invoice.page, self.filename, invoice.message)
+                    self.errors.append(invoice)
+                    continue
+                yield invoice
+            self._parsed = True
+
+        if self.cache is not None:
+            self.cache.commit()
+            self.cache.evict()
+
+    @property
+    def resumed(self) -> bool:
+        """
+        True if the pages before start_page were skipped, as they are recorded in the checkpoint
+
+        the rows are only of the new pages, append them to the workbook of the last run (see Export.append).
+        False without a checkpoint, on the first run of the pdf, or if its recorded pages changed
+        (fewer pages or a different last page), then all the pages are parsed and the workbook has to be made again
+        """
+        return self.start_page > 0
+
+    def commit_checkpoint(self) -> None:
+        """
+        records all the pages of the pdf as parsed in the checkpoint and saves it, does nothing without a checkpoint
+
+        call it after the rows are saved (e.g. Export.save), the next run parses only the pages added after them
+
+        Raises
+        ------
+        ValueError:
+            if the pages are not all parsed yet, lazy invoices not iterated to the end or stopped at an error by strict
+        """
+        if self.checkpoint is None:
+            return
+        if not self._parsed:
+            raise ValueError(f"pages of {self.filename} are not all parsed, the checkpoint is not updated")
+        self.checkpoint.update(self.filename, self._pdf)
+
+    def _iter_new_pages(self) -> Iterator['InvoiceParser']:
+        # invoices of the pages from the checkpoint on, in this process or on a process pool
+        num_pages = len(self._pdf.pages)
+        if self.segment:
+            for segment in self._iter_segments():
+                invoice = _parse_text(segment.text, self._patterns, segment.page)
+                if invoice:
+                    yield invoice
+        elif self._workers > 1 and num_pages - self.start_page > 1:
+            source = self._source.getvalue() if isinstance(self._source, BytesIO) else self._source
+            yield from self._iter_parallel(source, self._password, num_pages, self._workers, self._patterns,
+                                           self.cache, self.extractor, self._memory_map, self.start_page)
+        else:
+            extractor = self.extractor.bind(self._pdf, self._password)
+            for index in range(self.start_page, num_pages):
+                invoice = _parse_page(self._pdf.pages[index], self._patterns, self.cache, extractor, index)
+                if invoice:
+                    yield invoice
+
+    def _iter_segments(self) -> Iterator[Segment]:
+        # text of each invoice of the pages from the checkpoint on, the pages are extracted on a process pool
+        # if parallel, and split into invoices in page order in this process
+        num_pages = len(self._pdf.pages)
+        if self._workers > 1 and num_pages - self.start_page > 1:
+            source = self._source.getvalue() if isinstance(self._source, BytesIO) else self._source
+            texts = self._iter_parallel(source, self._password, num_pages, self._workers, self._patterns,
+                                        None, self.extractor, self._memory_map, self.start_page, _extract_pages)
+        else:
+            extractor = self.extractor.bind(self._pdf, self._password)
+            texts = (_extract_page(extractor, index) for index in range(self.start_page, num_pages))
+
+        segmenter = InvoiceSegmenter(self._patterns)
+        for index, text in enumerate(texts, self.start_page):
+            yield from segmenter.feed(text, index)
+        yield from segmenter.close()
+
+    @staticmethod
+    def _iter_parallel(pdf: str | Path | bytes, password: None | str | bytes, num_pages: int, workers: int,
+                       patterns: Patterns = PATTERNS, cache: 'ParseCache' = None,
+                       extractor: Extractor = None, memory_map: bool = False,
+                       start: int = 0, task: Callable[[int, int], tuple] = None) -> Iterator['InvoiceParser']:
+        """
+        extracts and parses pages[start:num_pages] on a process pool
 
-    def make_table(self, header: list = None, footer: list = None, force_invoice_data: bool = False) -> Table:
+        pages are split into contiguous chunks, each worker opens its own
+        PdfReader once (mapping the file if memory_map) and parses the chunks it is given.
+        only a few chunks per worker are in flight at a time,
+        results are yielded in page order.
+        task is _parse_pages by default, _extract_pages yields the text of the pages instead
+
+        workers open their own connection to the cache,
+        their hits and misses are added to cache
+        """
+        chunk = min(math.ceil((num_pages - start) / (workers * 4)), MAX_CHUNK_SIZE)
+        chunks = ((first, min(first + chunk, num_pages)) for first in range(start, num_pages, chunk))
+        task = task or _parse_pages
+        phase = 'parse_parallel' if task is _parse_pages else 'extract_parallel'
+
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(pdf, password, patterns, cache, extractor, memory_map)) as executor:
+            pending = deque(executor.submit(task, *pages) for pages in islice(chunks, workers * 2))
+            try:
+                while pending:
+                    invoices, hits, misses, seconds = pending.popleft().result()
+                    pending.extend(executor.submit(task, *pages) for pages in islice(chunks, 1))
+                    if profiling.enabled():
+                        profiling.record(phase, seconds, len(invoices))
+                    if cache is not None:
+                        cache.hits += hits
+                        cache.misses += misses
+                    yield from invoices
+            finally:
+                # stopped early (like strict at a failed page), chunks not started yet are dropped
+                for future in pending:
+                    future.cancel()
+
+    def iter_rows(self, invoices: Iterable['InvoiceParser'] = None, force_invoice_data: bool = False) -> Iterator[list]:
+        """
+        yields the table rows of invoices, one item at a time
+
+        same type of items are merged in each invoice
+        so max of two rows per invoice either gold or silver
+
+        Parameters
+        ----------
+        invoices: Iterable[InvoiceParser], optional
+            invoices to convert into rows (default is all the invoices of the pdf)
+
+        force_invoice_data: bool
+            overwrite calculated data with invoice data (default is False)
+
+        Yields
+        ------
+        list:
+            a row of the table
+        """
+        for invoice in self.iter_pages() if invoices is None else invoices:
+            yield from invoice.rows(force_invoice_data)
+
+    def make_table(self, header: list = None, footer: list = None, force_invoice_data: bool = False,
+                   invoices: Iterable['InvoiceParser'] = None, columnar: bool = False) -> Table:
         """
         creates a 2d list of items in invoices
 
@@ -92,6 +533,15 @@ class Invoices:
         force_invoice_data: bool
             overwrite calculated data with invoice data (default is False)
 
+        invoices: Iterable[InvoiceParser], optional
+            invoices to make the table of, consumed one at a time
+            (default is all the invoices of the pdf)
+
+        columnar: bool
+            store the table column by column in a ColumnarTable, for large tables (default is False)
+            the rows are made by batch.table_rows, the gst, round off and total of all the items in one call
+            without creating Item objects
+
         Returns
         -------
         Table:
@@ -100,36 +550,205 @@ class Invoices:
 
         """
 
-        header = header
+        with timed('make_table'):
+            if columnar:
+                from .batch import table_rows
+
+                rows = table_rows(self.iter_pages() if invoices is None else invoices, force_invoice_data)
+                return ColumnarTable(rows=rows, header=header, footer=footer)
+            return Table(rows=list(self.iter_rows(invoices, force_invoice_data)), header=header, footer=footer)
+
+    def __iter__(self):
+        return self.iter_pages()
+
+    async def __aiter__(self) -> AsyncIterator['InvoiceParser']:
+        """
+        async for over the invoices, each page is extracted and parsed on the default executor
+
+        the event loop runs other tasks between the pages, see iter_pages
+        """
+        import asyncio
+
+        loop = asyncio.get_running_loop()
+        pages = self.iter_pages()
+        done = object()
+        try:
+            while (invoice := await loop.run_in_executor(None, next, pages, done)) is not done:
+                yield invoice
+        finally:
+            await loop.run_in_executor(None, pages.close)
+
+    def __getstate__(self):
+        # loaded invoices are sent between processes without the pdf, see aload
+        state = self.__dict__.copy()
+        if self.invoices is not None:
+            state['_pdf'] = state['_source'] = None
+        return state
+
+
+def _map_file(pdf: str | Path) -> mmap.mmap | str | Path:
+    """maps the file read only, PdfReader reads it like a file without copying it into memory"""
+    with open(pdf, 'rb') as file:
+        if not os.fstat(file.fileno()).st_size:
+            return pdf  # an empty file cannot be mapped, PdfReader reports it
+        return mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def _load_pdf(pdf: str | Path | BytesIO, password: None | str | bytes = None,
+              patterns: Patterns = PATTERNS, extractor: Extractor = None, memory_map: bool = False,
+              strict: bool = False, segment: bool = False) -> tuple[list, list]:
+    """parses all the pages of a pdf, returns its invoices and errors, used by Invoices.from_many"""
+    invoices = Invoices(pdf, password, lazy=True, patterns=patterns, extractor=extractor, memory_map=memory_map,
+                        strict=strict, segment=segment)
+    return list(invoices), invoices.errors
+
+
+_reader: 'PdfReader' = None  # PdfReader of the current worker process
+_patterns: Patterns = PATTERNS  # Patterns of the current worker process
+_cache: 'ParseCache | None' = None  # ParseCache of the current worker process
+_extractor: Extractor | None = None  # Extractor of the current worker process, bound to _reader
+
+
+def _init_worker(pdf: str | Path | bytes, password: None | str | bytes, patterns: Patterns = PATTERNS,
+                 cache: 'ParseCache' = None, extractor: Extractor = None, memory_map: bool = False) -> None:
+    """opens (or maps) the pdf and the cache once per worker process"""
+    from PyPDF2 import PdfReader
+
+    global _reader, _patterns, _cache, _extractor
+    if isinstance(pdf, bytes):
+        pdf = BytesIO(pdf)
+    elif memory_map:
+        pdf = _map_file(pdf)
+    _reader = PdfReader(pdf, strict=True, password=password)
+    _patterns = patterns
+    _cache = cache
+    _extractor = get_extractor(extractor).bind(_reader, password)
+
+
+def _parse_pages(start: int, stop: int) -> tuple[list, int, int, float]:
+    """
+    parses pages[start:stop] of the worker's pdf, skipping pages which are not invoices
+
+    returns the invoices (and PageError of the pages which cannot be parsed),
+    the cache hits and misses of these pages and seconds taken
+    """
+    started = time.perf_counter()
+    hits, misses = (_cache.hits, _cache.misses) if _cache else (0, 0)
+    invoices = [invoice for invoice in (_parse_page(_reader.pages[index], _patterns, _cache, _extractor, index)
+                                        for index in range(start, stop)) if invoice]
+    if _cache:
+        _cache.commit()
+        hits, misses = _cache.hits - hits, _cache.misses - misses
+    return invoices, hits, misses, time.perf_counter() - started
 
-        rows = list()
 
-        for invoice in self.invoices:
-            single_item_not_valid = len(invoice.items_raw) == 1 and (not invoice.isvalid) and force_invoice_data
-            for item in invoice.items:
-                row = [
-                    item.invoice_no,
-                    item.type,
-                    invoice.date,
-                    item.quantity,
-                    item.sub_total,
-                    item.gst.sgst.amount if not single_item_not_valid else invoice.gst.sgst.amount,
-                    item.gst.cgst.amount if not single_item_not_valid else invoice.gst.cgst.amount,
-                    item.round_off if not single_item_not_valid else invoice.round_off,
-                    item.total if not single_item_not_valid else invoice.total,
-                    None, # Extra rows
-                    invoice.round_off,  # remove this two rows
-                    item.round_off,
-                    invoice.isvalid,
-                ]
+def _extract_pages(start: int, stop: int) -> tuple[list[str], int, int, float]:
+    """extracts the text of pages[start:stop] of the worker's pdf, returned like _parse_pages"""
+    started = time.perf_counter()
+    texts = [_extract_page(_extractor, index) for index in range(start, stop)]
+    return texts, 0, 0, time.perf_counter() - started
 
-                rows.append(row)
 
-        return Table(rows=rows, header=header, footer=footer)
+def _extract_page(extractor: Extractor, index: int) -> str:
+    with timed('extract_text'):
+        return extractor.extract(index)
 
-    def __iter__(self):
-        for invoice in self.invoices:
-            yield invoice
+
+def _parse_text(text: str, patterns: Patterns = PATTERNS, index: int = None) -> 'InvoiceParser | PageError | None':
+    """parses the text of an invoice, returns None if it is not an invoice or the PageError if it cannot be parsed"""
+    try:
+        return InvoiceParser(text, patterns)
+    except NotAnInvoice:
+        return None
+    except Exception as e:
+        return PageError.of(e, index, text, patterns)
+
+
+def _parse_page(page, patterns: Patterns = PATTERNS, cache: 'ParseCache' = None, extractor: Extractor = None,
+                index: int = None) -> 'InvoiceParser | PageError | None':
+    """
+    extracts the text of a pdf page and parses it, returns None if it is not an invoice
+
+    returns the PageError of the page if it is an invoice which cannot be parsed.
+    the text is extracted by extractor (bound to the pdf of the page) if given, otherwise by PyPDF2.
+    if cache is given, pages already in it are not extracted or parsed again, failed pages are not cached
+    """
+    if cache is not None:
+        key = cache.key(page)
+        fields = cache.get(key)
+        if fields is not None:
+            return InvoiceParser.from_fields(fields) if fields else None
+
+    with timed('extract_text'):
+        page = extractor.extract(index) if extractor is not None else page.extract_text()
+    invoice = _parse_text(page, patterns, index)
+    if isinstance(invoice, PageError):
+        return invoice
+
+    if cache is not None:
+        cache.set(key, invoice.fields if invoice else {})  # empty fields, page is not an invoice
+    return invoice
+
+
+class PageError(NamedTuple):
+    """
+    record of a page which could not be parsed, see Invoices.errors
+
+    page is the index of the page in the pdf, invoice_no is None if it is not found,
+    error is the name of the exception and field the field of the invoice which failed, if known
+    """
+
+    file: str | None
+    page: int | None
+    invoice_no: int | None
+    error: str
+    field: str | None
+    message: str
+
+    @classmethod
+    def of(cls, error: Exception, page: int = None, text: str = '', patterns: Patterns = PATTERNS,
+           file: str = None) -> 'PageError':
+        """record of the error raised while parsing text of page"""
+        found = patterns.scan(text).get('invoice')
+        cause = error.__cause__ if isinstance(error, InvalidField) and error.__cause__ else error
+        return cls(file, page, int(found['no']) if found else None, type(cause).__name__,
+                   getattr(error, 'field', None), str(error) if cause is error else f"{error}: {cause}")
+
+
+def _date(found: dict) -> datetime.datetime:
+    day, month, year = found['date']['date'].split('-')
+    return datetime.datetime(int(year), int(month), int(day))
+
+
+def _gst(found: dict) -> list[tuple[str, float, float]]:
+    if not found['gst']:
+        raise MissingField('gst')
+    return [(gst['type'], float(gst['rate'].replace('%', '')), float(gst['amount'].replace(',', '')))
+            for gst in found['gst']]
+
+
+# fields of InvoiceParser.fields (except items_raw), parsed from the matches of Patterns.scan
+FIELDS: dict[str, Callable[[dict], object]] = {
+    'invoice_no': lambda found: int(found['invoice']['no']),
+    'date': _date,
+    'sub_total': lambda found: float(found['sub_total']['subtotal'].replace(',', '')),
+    'gst': _gst,
+    'round_off': lambda found: float(found['round_off']['minus'] + found['round_off']['roundoff'])
+    if 'round_off' in found else 0.0,
+    'total': lambda found: float(found['total']['total'].replace(',', '')) if 'total' in found else None,
+}
+
+
+def _parse_field(field: str, parse: Callable[[dict], object], found: dict):
+    """parses a field, raises MissingField if it is not found, InvalidField if it cannot be parsed"""
+    try:
+        return parse(found)
+    except KeyError:
+        raise MissingField(field) from None
+    except FieldError:
+        raise
+    except Exception as e:
+        raise InvalidField(field) from e
 
 
 class InvoiceParser:
@@ -148,68 +767,145 @@ class InvoiceParser:
     invoice: str
         extracted text of pdf invoice
 
+    patterns: Patterns, optional
+        compiled regexes to find the fields of invoice (default is PATTERNS)
+
     """
 
-    def __init__(self, invoice: str | Callable) -> None:
+    def __init__(self, invoice: str | Callable, patterns: Patterns = PATTERNS) -> None:
         if callable(invoice):
             invoice = invoice.__call__()
 
-        print(invoice.split('\n')[13])
-
-        RS = '₹'
-        RI = '₨'
-        RE_AMOUNT = r'\d*,?\d*,?\d*,?\d+\.?\d*'
-        # RE_ITEM = rf"(?P<n>\d)\s*(?P<item>gold|silver)(?P<desc>\s[\w.\d\s&]*\s)(?P<hsn>7113)\s*(\?P<quantity>\d+\.?\d*)\s?(?P<unit>gm|Gm)\s?[{RS}.]*\s(?P<unitprice>\d*,?\d*,?\d*,?\d+\.?\d*)\s?[{RS}.]*\s?(\?P<amount>{RE_AMOUNT}) "
-        # item without discount
-        # RE_ITEM = rf"(?P<n>\d)\s*(?P<item>gold|silver)(?P<desc>\s[\w.\d\s&]*\s)\s*(?P<quantity>\d+\.?\d*)\s?(?P<unit>gm|Gm)\s?[{RS+RI}.]*\s(?P<unitprice>{RE_AMOUNT})\s?[{RS+RI}.]*\s?(?P<amount>{RE_AMOUNT})"
-        # Item with discount
-        RE_ITEM = rf"(?P<n>\d)\s*(?P<item>gold|silver)(?P<desc>\s[\w.\d\s&]*\s)\s*(?P<quantity>\d+\.?\d*)\s?(?P<unit>gm|Gm)\s?[{RS+RI}.]*\s(?P<unitprice>{RE_AMOUNT})\s?[{RS+RI}.]*\s((?P<discount>{RE_AMOUNT})\s?\(\d%\))*[{RS+RI}\s.]*(?P<amount>{RE_AMOUNT})+"
-        # RE_ITEM_RI = rf"(?P<n>\d)\s*(?P<item>gold|silver)(?P<desc>\s[\w.\d\s&]*\s)\s*(?P<quantity>\d+\.?\d*)\s?(?P<unit>gm|Gm)\s?[{RI}.]*\s(?P<unitprice>\d*,?\d*,?\d*,?\d+\.?\d*)\s?[{RI}.]*\s?(?P<amount>{RE_AMOUNT})"
-        RE_GST = rf"(?:(?P<type>SGST|CGST)@(?P<rate>\d+.?\d*%?)\W*(?P<amount>{RE_AMOUNT}))"
-        RE_ROUND = rf"Round\s*off\s*(?P<minus>-?)\s*\W*(?P<roundoff>{RE_AMOUNT})"
-        RE_SUBTOTAL = rf"(?:Sub Total)\W*(?P<subtotal>{RE_AMOUNT})"
-        RE_TOTAL = rf"(?:(?<!Sub\s)Total(?=\s*{RS}|{RI}))\W*(?P<total>{RE_AMOUNT})"
-        # RE_TOTAL_RI = rf"(?:(?<!Sub\s)Total(?=\s*{RI}))\W*(?P<total>{RE_AMOUNT})"
-        RE_DATE = r"(?:(?:Date\s*:\s*)(?P<date>\d{2}-\d{2}-\d{4}))"
-        RE_INVOICE = r"(?:(?:Invoice No.\s*:\s*)(?P<no>\d+))"
-
-        self.invoice_no = int(re.findall(RE_INVOICE, invoice)[0])
-        self.date = datetime.datetime.strptime(re.findall(RE_DATE, invoice)[0], '%d-%m-%Y')
-        self.sub_total = float(re.findall(RE_SUBTOTAL, invoice)[0].replace(',', ''))
-        self.gst: GST | GSTBase = sum([
-            GSTBase(type=gst.groupdict()['type'], rate=float(gst.groupdict()['rate'].replace('%', '')), amount=float(gst.groupdict()['amount'].replace(',', ''))) for gst in re.finditer(RE_GST, invoice)
-        ])
-        try:
-            self.round_off = float("".join(re.findall(RE_ROUND, invoice)[0]))
-        except IndexError:
-            self.round_off = 0.0
+        with timed('parse'):
+            found = patterns.scan(invoice)
+            if len(found) == 1 and not found['gst'] and not patterns.item.search(invoice):
+                raise NotAnInvoice
+            fields = {field: _parse_field(field, parse, found) for field, parse in FIELDS.items()}
+            fields['items_raw'] = patterns.items(invoice)
+            if not fields['items_raw']:
+                raise MissingField('items')
 
-        try:
-            self.total = float(re.findall(RE_TOTAL, invoice)[0].replace(',', ''))
-        except IndexError:
-            # self.total = float(re.findall(RE_TOTAL_RI, invoice)[0].replace(',', ''))
-            pass
+        self._load(fields)
+        logger.debug('parsed invoice %s', self.invoice_no)
+
+    @classmethod
+    def from_fields(cls, fields: dict) -> 'InvoiceParser':
+        """
+        creates InvoiceParser from already parsed fields, without parsing the text again
+
+        Parameters
+        ----------
+        fields: dict
+            fields of a parsed invoice, see InvoiceParser.fields
+        """
+        invoice = cls.__new__(cls)
+        invoice._load(fields)
+        return invoice
+
+    def _load(self, fields: dict) -> None:
+        # parsed values, enough to rebuild the invoice (used by ParseCache)
+        self.fields = fields
 
+        self.invoice_no = fields['invoice_no']
+        self.date = fields['date']
+        self.sub_total = fields['sub_total']
         try:
-            self.items_raw = items_raw = [item.groupdict() for item in re.finditer(RE_ITEM, invoice)]
-        except IndexError:
-            # self.items_raw = items_raw = [item.groupdict() for item in re.finditer(RE_ITEM_RI, invoice)]
-            pass
+            self.gst: GST | GSTBase = sum([
+                GSTBase(type=type, rate=rate, amount=amount) for type, rate, amount in fields['gst']
+            ])
+        except Exception as e:
+            raise InvalidField('gst') from e
+        if not isinstance(self.gst, (GST, GSTBase)):  # sgst and cgst of different rates or amounts
+            raise InvalidField('gst')
+        self.round_off = fields['round_off']
+        self.total: float | None = fields['total']  # None if the invoice has no total
+
+        self.items_raw = items_raw = fields['items_raw']
+
+        # type, quantity and sub_total of each item as passed to Item, the Item objects are created by items
+        try:
+            self.item_values: list[tuple[str, float, float]] = [
+                (i['item'], float(i['quantity'].replace(',', '')), float(i['amount'].replace(',', '')))
+                for i in items_raw
+            ]
+            if not (self.gst.rate and all(to_paise(sub_total) for _, _, sub_total in self.item_values)):
+                raise GSTInsufficientArgs
+        except Exception as e:
+            raise InvalidField('items') from e
+        self._items = None
 
-        self.items = MergedItems(
-            [Item(self.invoice_no,
-                  i['item'],
-                  float(i['quantity'].replace(',', '')),
-                  float(i['amount'].replace(',', '')),
-                  self.gst.rate)
+    @property
+    def items(self) -> MergedItems:
+        """gold and/or silver Item of the invoice, created on the first use"""
+        if self._items is None:
+            with timed('items'):
+                try:
+                    self._items = MergedItems([Item(self.invoice_no, type, quantity, sub_total, self.gst.rate)
+                                               for type, quantity, sub_total in self.item_values])
+                except Exception as e:
+                    raise InvalidField('items') from e
+        return self._items
 
-             for i in items_raw]
-        )
+    def rows(self, force_invoice_data: bool = False) -> Iterator[list]:
+        """
+        yields the table rows of items of invoice, gold and/or silver
 
+        Parameters
+        ----------
+        force_invoice_data: bool
+            overwrite calculated data with invoice data (default is False)
+        """
+        single_item_not_valid = len(self.items_raw) == 1 and (not self.isvalid) and force_invoice_data
+        for item in self.items:
+            yield [
+                item.invoice_no,
+                item.type,
+                self.date,
+                item.quantity,
+                item.sub_total,
+                item.gst.sgst.amount if not single_item_not_valid else self.gst.sgst.amount,
+                item.gst.cgst.amount if not single_item_not_valid else self.gst.cgst.amount,
+                item.round_off if not single_item_not_valid else self.round_off,
+                item.total if not single_item_not_valid or self.total is None else self.total,
+                2 * item.gst_rate,  # gst rate in percent, sgst + cgst
+                self.round_off,  # remove this two rows
+                item.round_off,
+                self.isvalid,
+            ]
 
     @property
     def isvalid(self) -> bool:
-        return self.sub_total == self.items.sub_total and self.gst == self.items.gst
+        """sub_total and gst of the invoice are equal to the sum of its items, compared exactly in paise"""
+        return to_paise(self.sub_total) == self.items.sub_total_paise and self.gst == self.items.gst
+
+    def diff(self) -> dict[str, tuple[float, float]]:
+        """
+        fields of the invoice which are not equal to the ones calculated from its items
+
+        compares sub_total, gst rate, sgst, cgst, round_off and total exactly in paise.
+        an invoice is valid if sub_total and gst match, round off and total may still differ
+
+        Returns
+        -------
+        dict:
+            field: (invoice value, calculated value), empty if all the fields match
+        """
+        items = self.items
+        fields = {
+            'sub_total': (to_paise(self.sub_total), items.sub_total_paise),
+            'round_off': (to_paise(self.round_off), items.round_off_paise),
+            'total': (to_paise(self.total) if self.total is not None else None, items.total_paise),
+        }
+        invoice_gst = {gst.type.lower(): gst for gst in (self.gst if isinstance(self.gst, GST) else [self.gst])}
+        for gst in ('sgst', 'cgst'):
+            fields[gst] = (invoice_gst[gst].amount_paise if gst in invoice_gst else None,
+                           getattr(items.gst, gst).amount_paise)
+
+        diff = {field: (None if invoice is None else to_rupees(invoice), to_rupees(calculated))
+                for field, (invoice, calculated) in fields.items() if invoice != calculated}
+        if self.gst.rate != items.gst.rate:
+            diff['gst_rate'] = (self.gst.rate, items.gst.rate)
+        return diff
 
     def print_validate(self) -> None:
         print(self.invoice_no, self.invoice_no == self.items.invoice_no)
@@ -1,5 +1,10 @@
-from round import rnd
-from gst import GST
+from .errors import GSTInsufficientArgs, ItemChangeError
+from .round import PAISE, cached_round, div_round, to_paise, to_rupees
+from .gst import GST
+
+
+_set = object.__setattr__  # sets a slot of the immutable Item
+_round_quantity = cached_round()  # the same quantities come again and again
 
 
 class Item:
@@ -22,8 +27,19 @@ class Item:
 
     gst_rate: float, optional
         gst percentage applied to the item (default is 1.5)
+
+    amounts are kept as integer paise (sub_total_paise, total_paise, round_off_paise),
+    sub_total, total and round_off are the same values in rupees.
+    total is the gst total rounded half up to the rupee
+
+    Raises
+    ------
+    ItemChangeError:
+        when try to change the item, gst, total and round off are calculated once when created
     """
 
+    __slots__ = ('invoice_no', 'type', 'quantity', 'sub_total_paise', 'gst_rate', 'gst', 'total_paise')
+
     def __init__(self,
                  invoice_no: int,
                  type: str,
@@ -31,16 +47,41 @@ class Item:
                  sub_total: float,
                  gst_rate: float = 1.5):
 
-        self.invoice_no = invoice_no
-        self.type = type
-        self.quantity = rnd(quantity, 3)
-        self.sub_total = rnd(sub_total, 2)
-        self.gst_rate = gst_rate
+        _set(self, 'invoice_no', invoice_no)
+        _set(self, 'type', type)
+        _set(self, 'quantity', _round_quantity(quantity, 3))
+        _set(self, 'sub_total_paise', to_paise(sub_total))
+        _set(self, 'gst_rate', gst_rate)
 
         # calculated values
-        self.gst = GST(gst_rate, sub_total)
-        self.total = float(rnd(self.gst.total))
-        self.round_off = rnd(self.total - self.gst.total, 2)
+        if not (gst_rate and self.sub_total_paise):
+            raise GSTInsufficientArgs
+        gst = GST._from_paise(gst_rate, self.sub_total_paise)
+        _set(self, 'gst', gst)
+        _set(self, 'total_paise', div_round(gst.total_paise, PAISE) * PAISE)
+
+    @property
+    def sub_total(self) -> float:
+        return self.sub_total_paise / PAISE
+
+    @property
+    def total(self) -> float:
+        return self.total_paise / PAISE
+
+    @property
+    def round_off_paise(self) -> int:
+        return self.total_paise - self.gst.total_paise
+
+    @property
+    def round_off(self) -> float:
+        return self.round_off_paise / PAISE
+
+    def __setstate__(self, state):
+        for key, value in state[1].items():
+            _set(self, key, value)
+
+    def __setattr__(self, key, value):
+        raise ItemChangeError(key)
 
     def __str__(self):
         return self.type
@@ -49,7 +90,7 @@ class Item:
         if isinstance(other, Item) and self.invoice_no == other.invoice_no and self.gst_rate == other.gst_rate:
             if other.type == self.type:
                 return Item(self.invoice_no, self.type, self.quantity + other.quantity,
-                            self.sub_total + other.sub_total, self.gst_rate)
+                            to_rupees(self.sub_total_paise + other.sub_total_paise), self.gst_rate)
             return MergedItems([self, other])  # if Item but not same item, one is gold and other is silver
         return self  # if not Item then return self
 
@@ -94,12 +135,16 @@ class MergedItems:
         gold, silver = self.gold, self.silver  # for ease of use
         both = gold and silver
 
-        # filling data
+        # filling data, sums are exact in paise
         self.invoice_no = (gold or silver).invoice_no
-        self.sub_total = silver.sub_total + gold.sub_total if both else (gold or silver).sub_total
+        self.sub_total_paise = silver.sub_total_paise + gold.sub_total_paise if both else (gold or silver).sub_total_paise
         self.gst = gold.gst + silver.gst if both else (gold or silver).gst
-        self.round_off = rnd(silver.round_off + gold.round_off, 2) if both else (gold or silver).round_off
-        self.total = silver.total + gold.total if both else (gold or silver).total
+        self.round_off_paise = silver.round_off_paise + gold.round_off_paise if both else (gold or silver).round_off_paise
+        self.total_paise = silver.total_paise + gold.total_paise if both else (gold or silver).total_paise
+
+        self.sub_total = to_rupees(self.sub_total_paise)
+        self.round_off = to_rupees(self.round_off_paise)
+        self.total = to_rupees(self.total_paise)
 
         self.items: tuple[Item] = tuple(
             item for item in (self.silver, self.gold) if item)  # adding only non-None type item
@@ -0,0 +1,121 @@
+"""
+compiled regular expressions for the text of a vyapar invoice
+
+patterns are compiled once at import, InvoiceParser uses PATTERNS by default.
+"""
+import re
+
+
+RS = '₹'
+RI = '₨'
+RE_AMOUNT = r'\d*,?\d*,?\d*,?\d+\.?\d*'
+# Item with discount
+RE_ITEM = rf"(?P<n>\d)\s*(?P<item>gold|silver)(?P<desc>\s[\w.\d\s&]*\s)\s*(?P<quantity>\d+\.?\d*)\s?(?P<unit>gm|Gm)\s?[{RS+RI}.]*\s(?P<unitprice>{RE_AMOUNT})\s?[{RS+RI}.]*\s((?P<discount>{RE_AMOUNT})\s?\(\d%\))*[{RS+RI}\s.]*(?P<amount>{RE_AMOUNT})+"
+RE_GST = rf"(?:(?P<type>SGST|CGST)@(?P<rate>\d+.?\d*%?)\W*(?P<amount>{RE_AMOUNT}))"
+RE_ROUND = rf"Round\s*off\s*(?P<minus>-?)\s*\W*(?P<roundoff>{RE_AMOUNT})"
+RE_SUBTOTAL = rf"(?:Sub Total)\W*(?P<subtotal>{RE_AMOUNT})"
+RE_TOTAL = rf"(?:(?<!Sub\s)Total(?=\s*{RS}|{RI}))\W*(?P<total>{RE_AMOUNT})"
+RE_DATE = r"(?:(?:Date\s*:\s*)(?P<date>\d{2}-\d{2}-\d{4}))"
+RE_INVOICE = r"(?:(?:Invoice No.\s*:\s*)(?P<no>\d+))"
+# line of the total, end of an invoice (either rupee symbol)
+RE_FOOTER = rf"(?<!Sub\s)Total(?=\s*[{RS}{RI}])"
+
+
+class Patterns:
+    """
+    set of compiled regexes to parse the text of an invoice
+
+    header and footer fields are joined into a single scanner,
+    so all of them are found in one sweep of the text.
+    items are found with a separate pattern.
+    pass your own Patterns to InvoiceParser/Invoices to parse other layouts.
+
+    group names should be unique across the fields
+
+    Parameters
+    ----------
+    item: str, optional
+        regex of an item row, with groups item, quantity and amount (default is RE_ITEM)
+
+    invoice: str, optional
+        regex of invoice number, with group no (default is RE_INVOICE)
+
+    date: str, optional
+        regex of invoice date, with group date (default is RE_DATE)
+
+    sub_total: str, optional
+        regex of sub total, with group subtotal (default is RE_SUBTOTAL)
+
+    gst: str, optional
+        regex of each SGST/CGST row, with groups type, rate and amount (default is RE_GST)
+
+    round_off: str, optional
+        regex of round off, with groups minus and roundoff (default is RE_ROUND)
+
+    total: str, optional
+        regex of total, with group total (default is RE_TOTAL)
+
+    start: str, optional
+        regex of the first character of every field and of footer, lets the scanner skip other characters quickly
+        (default is '[ISCDRT]'), set to None if fields start with other characters
+
+    footer: str, optional
+        regex of the last line of an invoice, where InvoiceSegmenter ends an invoice (default is RE_FOOTER)
+
+    """
+
+    FIELDS = ('invoice', 'date', 'sub_total', 'gst', 'round_off', 'total')
+
+    def __init__(self,
+                 item: str = RE_ITEM,
+                 invoice: str = RE_INVOICE,
+                 date: str = RE_DATE,
+                 sub_total: str = RE_SUBTOTAL,
+                 gst: str = RE_GST,
+                 round_off: str = RE_ROUND,
+                 total: str = RE_TOTAL,
+                 start: str | None = '[ISCDRT]',
+                 footer: str = RE_FOOTER):
+
+        self.item = re.compile(item)
+        self.fields = dict(zip(self.FIELDS, (invoice, date, sub_total, gst, round_off, total)))
+
+        # each field is wrapped in a group named after it, which is the last group closed on a match
+        scanner = '|'.join(f'(?P<_{name}>{regex})' for name, regex in self.fields.items())
+        self.scanner = re.compile(f'(?={start})(?:{scanner})' if start else scanner)
+        # invoice number and footer, where InvoiceSegmenter splits the text into invoices
+        boundary = f'(?P<_invoice>{invoice})|(?P<_footer>{footer})'
+        self.boundary = re.compile(f'(?={start})(?:{boundary})' if start else boundary)
+
+    def scan(self, text: str) -> dict:
+        """
+        finds header and footer fields in one pass of the text
+
+        Parameters
+        ----------
+        text: str
+            extracted text of an invoice
+
+        Returns
+        -------
+        dict:
+            first match of each field found, gst is a list of all the matches
+        """
+        fields = {'gst': []}
+        for match in self.scanner.finditer(text):
+            field = match.lastgroup[1:]
+            if field == 'gst':
+                fields['gst'].append(match)
+            elif field not in fields:
+                fields[field] = match
+        return fields
+
+    def items(self, text: str) -> list[dict]:
+        """returns groupdict of each item row in the text"""
+        return [item.groupdict() for item in self.item.finditer(text)]
+
+    def __repr__(self):
+        return f"Patterns({', '.join(self.FIELDS)}, item)"
+
+
+PATTERNS = Patterns()
@@ -0,0 +1,135 @@
+"""
+timing of the parse -> table -> export pipeline
+
+phases are timed only while a Profiler is active or debug logging of the
+'invoice_parser' logger is enabled, otherwise timed returns a shared no-op context manager,
+which costs the check of the flags and the with statement.
+
+phases recorded
+---------------
+open: opening the pdf with PdfReader
+extract_text: text extraction of each page
+parse: regex parsing of each invoice
+items: MergedItems construction of each invoice
+make_table: Invoices.make_table (includes parsing in lazy mode)
+export.partition, export.append, export.write, export.set_formats, export.shift, export.save: phases of Export
+
+pages parsed on a process pool (Invoices parallel) are recorded as parse_parallel,
+the time each chunk of pages took in a worker
+"""
+import json
+import logging
+import time
+from contextlib import contextmanager, nullcontext
+from typing import Callable
+
+
+logger = logging.getLogger('invoice_parser')
+
+_profilers: list['Profiler'] = []  # active profilers
+
+
+class Profiler:
+    """
+    records wall time and count of each phase of the pipeline run inside it
+
+    >>> with Profiler() as profiler:  # doctest: +SKIP
+    ...     invoices = Invoices('invoices.pdf')
+    ...     Export(invoices.table).save('invoices.xlsx')
+    >>> profiler.report()  # doctest: +SKIP
+    {'open': {'count': 1, 'total': 0.01, 'mean': 0.01, 'max': 0.01}, 'extract_text': {...}, ...}
+
+    Parameters
+    ----------
+    callbacks: list[Callable[[str, float], None]], optional
+        called with phase and seconds, each time a phase is recorded (default is None)
+
+    """
+
+    def __init__(self, callbacks: list[Callable[[str, float], None]] = None):
+        self.callbacks = list(callbacks or [])
+        self.reset()
+
+    def reset(self) -> None:
+        """clears all recorded phases"""
+        self.counts: dict[str, int] = {}
+        self.totals: dict[str, float] = {}
+        self.max: dict[str, float] = {}
+
+    def add_callback(self, callback: Callable[[str, float], None]) -> None:
+        """callback is called with phase and seconds, each time a phase is recorded"""
+        self.callbacks.append(callback)
+
+    def remove_callback(self, callback: Callable[[str, float], None]) -> None:
+        self.callbacks.remove(callback)
+
+    def record(self, phase: str, seconds: float, count: int = 1) -> None:
+        self.counts[phase] = self.counts.get(phase, 0) + count
+        self.totals[phase] = self.totals.get(phase, 0.0) + seconds
+        self.max[phase] = max(self.max.get(phase, 0.0), seconds)
+        for callback in self.callbacks:
+            callback(phase, seconds)
+
+    def report(self) -> dict[str, dict]:
+        """
+        Returns
+        -------
+        dict:
+            count, total, mean and max seconds of each phase, in the order they were first recorded
+        """
+        return {phase: {'count': count,
+                        'total': self.totals[phase],
+                        'mean': self.totals[phase] / count,
+                        'max': self.max[phase]}
+                for phase, count in self.counts.items()}
+
+    def to_json(self, **kwargs) -> str:
+        """report as json, kwargs are passed to json.dumps"""
+        return json.dumps(self.report(), **kwargs)
+
+    def start(self) -> 'Profiler':
+        """starts recording, same as entering the context"""
+        _profilers.append(self)
+        return self
+
+    def stop(self) -> None:
+        if self in _profilers:
+            _profilers.remove(self)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def __repr__(self):
+        return f"Profiler({', '.join(f'{phase}={total:.3f}s' for phase, total in self.totals.items())})"
+
+
+def enabled() -> bool:
+    """True if phases are being recorded"""
+    return bool(_profilers) or logger.isEnabledFor(logging.DEBUG)
+
+
+def record(phase: str, seconds: float, count: int = 1) -> None:
+    """records a phase in the active profilers, and logs it at debug level"""
+    for profiler in _profilers:
+        profiler.record(phase, seconds, count)
+    logger.debug('%s took %.6fs', phase, seconds, extra={'phase': phase, 'seconds': seconds, 'count': count})
+
+
+_NOT_TIMED = nullcontext()  # returned by timed when nothing is recorded, no generator is made per block
+
+
+def timed(phase: str, count: int = 1):
+    """times the block as phase, if a profiler is active or debug logging is enabled"""
+    return _timed(phase, count) if enabled() else _NOT_TIMED
+
+
+@contextmanager
+def _timed(phase: str, count: int = 1):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(phase, time.perf_counter() - start, count)
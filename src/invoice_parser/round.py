@@ -1,4 +1,7 @@
 import math
+from decimal import Decimal, ROUND_HALF_UP
+from functools import lru_cache
+from typing import Callable, Iterable
 
 
 class Round:
@@ -56,19 +59,147 @@ class Round:
 
     @staticmethod
     def round(n: int | float, decimal: int = 0) -> int | float:
-        # TODO: add >= to 0.5
-        sign = 1 if abs(n) == n else -1
-        n = abs(n)
-        if decimal:
-            n = Round.round(n * (10 ** decimal)) / (10 ** decimal)
-        elif n > 1 and n % int(n) >= 0.5:
-            n = math.ceil(n)
+        # half up on the absolute value, n scaled by 10 ** decimal is split into its integer part and fraction.
+        # the scaling is the same float multiplication as before, so results are unchanged (1.005 still rounds to 1.0)
+        if n < 0:
+            n, sign = -n, -1
         else:
-            n = math.ceil(n) if 1 > n >= 0.5 else math.floor(n)
-        return n * sign
+            sign = 1
+        if decimal:
+            scale = 10 ** decimal
+            n *= scale
+            floor = int(n)
+            return (floor + (n - floor >= 0.5)) / scale * sign
+        floor = int(n)
+        return (floor + (n - floor >= 0.5)) * sign
 
     def get(self):
         return self.n
 
 
 rnd = Round.round
+
+ROUND_CACHE_SIZE = 4096  # rounded values kept by cached_round
+
+
+def cached_round(maxsize: int | None = ROUND_CACHE_SIZE) -> Callable[[int | float, int], int | float]:
+    """
+    Round.round memoised in a bounded lru cache, for values which repeat (quantities of gold and silver items)
+
+    ints and floats are cached apart, so the type of the result is the same as Round.round
+
+    Parameters
+    ----------
+    maxsize: int, optional
+        values kept, the least recently used is dropped (default is ROUND_CACHE_SIZE), None keeps all of them
+
+    Returns
+    -------
+    Callable:
+        rounds like Round.round, cache_info() and cache_clear() of functools.lru_cache
+    """
+    return lru_cache(maxsize=maxsize, typed=True)(Round.round)
+
+
+def round_many(values: Iterable[int | float], decimal: int = 0, memo: Callable = None) -> list:
+    """
+    Round.round of each value, in one loop
+
+    >>> round_many([10.49, 10.5, -2.5])
+    [10, 11, -3]
+
+    >>> round_many([10.49, 0.0005], 3)
+    [10.49, 0.001]
+
+    Parameters
+    ----------
+    values: Iterable[int | float]
+        numbers to round
+
+    decimal: int, optional
+        rounds upto the decimal (default is 0)
+
+    memo: Callable, optional
+        a cached_round to round with, for values which repeat (default is None, rounds each value)
+
+    Returns
+    -------
+    list:
+        rounded values, int if decimal is 0 like Round.round
+    """
+    if memo is not None:
+        return [memo(n, decimal) for n in values]
+    rounded = []
+    append = rounded.append
+    if decimal:
+        scale = 10 ** decimal
+        for n in values:
+            if n < 0:
+                n = -n * scale
+                floor = int(n)
+                append(-((floor + (n - floor >= 0.5)) / scale))
+            else:
+                n *= scale
+                floor = int(n)
+                append((floor + (n - floor >= 0.5)) / scale)
+    else:
+        for n in values:
+            if n < 0:
+                floor = int(-n)
+                append(-(floor + (-n - floor >= 0.5)))
+            else:
+                floor = int(n)
+                append(floor + (n - floor >= 0.5))
+    return rounded
+
+
+PAISE = 100  # paise in a rupee
+
+
+def to_paise(amount: int | float | str) -> int:
+    """
+    converts rupees to integer paise, rounded half up like Round.round
+
+    strings are parsed exactly (commas are ignored), floats are taken as the decimal they print as
+
+    >>> to_paise('1,234.565')
+    123457
+
+    >>> to_paise(10.49)
+    1049
+
+    >>> to_paise(1.005)
+    101
+
+    """
+    if isinstance(amount, int):
+        return amount * PAISE
+    if isinstance(amount, float):
+        scaled = abs(amount) * PAISE
+        floor = math.floor(scaled)
+        fraction = scaled - floor
+        # scaled is off by a few ulps at most, only amounts that close to half a paise need the exact decimal
+        if abs(fraction - 0.5) > scaled * 1e-15 + 1e-12:
+            return (floor + (fraction > 0.5)) * (1 if amount >= 0 else -1)
+        amount = repr(amount)
+    return int((Decimal(amount.replace(',', '')) * PAISE).to_integral_value(ROUND_HALF_UP))
+
+
+def to_rupees(paise: int) -> float:
+    """converts integer paise back to rupees"""
+    return paise / PAISE
+
+
+def div_round(dividend: int, divisor: int) -> int:
+    """
+    integer division rounded half up (away from zero), like Round.round of the exact quotient
+
+    >>> div_round(5, 2)
+    3
+
+    >>> div_round(-5, 2)
+    -3
+
+    """
+    quotient = (abs(dividend) * 2 + divisor) // (divisor * 2)
+    return quotient if dividend >= 0 else -quotient
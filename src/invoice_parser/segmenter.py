@@ -0,0 +1,125 @@
+"""
+splits the text of a pdf into invoices, for pdfs where a page is not one invoice
+
+an invoice starts at its invoice number (Invoice No.) and ends at the line of its total (the footer, RE_FOOTER).
+the text of the pages is fed one page at a time, each invoice is yielded as soon as its total is found,
+so invoices longer than a page and pages with several invoices are parsed like any other invoice,
+with one pass over the text and only the open invoice kept in memory.
+"""
+from typing import Iterable, Iterator, NamedTuple
+
+from .patterns import Patterns, PATTERNS
+
+LOOKBEHIND = 256  # characters of the previous page scanned again, for a field split across pages
+MAX_INVOICE_CHARS = 1_000_000  # text of an open invoice before it is given up as incomplete
+
+
+class Segment(NamedTuple):
+    """
+    text of an invoice and the pages it is on
+
+    complete is False if the invoice was cut short: another invoice number or the end of the text
+    came before its total, or it grew beyond max_chars
+    """
+
+    text: str
+    page: int | None  # index of the first page
+    last_page: int | None
+    complete: bool
+
+
+class InvoiceSegmenter:
+    """
+    streaming splitter of the text of pages into the text of each invoice
+
+    >>> segmenter = InvoiceSegmenter()
+    >>> for page, text in enumerate(texts):  # doctest: +SKIP
+    ...     for segment in segmenter.feed(text, page):
+    ...         InvoiceParser(segment.text)
+    >>> rest = list(segmenter.close())  # doctest: +SKIP
+
+    an invoice number repeated before the total (header of a continuation page) continues the invoice,
+    repeated after it (header of a page of terms after the total) is skipped,
+    a different one closes the open invoice as incomplete. text outside invoices (between a total and the next
+    invoice number, pages without invoices) is kept only as the header of the next invoice
+
+    Parameters
+    ----------
+    patterns: Patterns, optional
+        boundary of Patterns finds the invoice number and the footer (default is PATTERNS)
+
+    max_chars: int, optional
+        longest text of an invoice, bounds the memory if a total is never found (default is MAX_INVOICE_CHARS)
+
+    """
+
+    def __init__(self, patterns: Patterns = PATTERNS, max_chars: int = MAX_INVOICE_CHARS):
+        self.boundary = patterns.boundary
+        self.max_chars = max_chars
+        self._text = ''  # text of the open invoice, or the end of the text after the last invoice
+        self._scanned = 0  # end of the last boundary found in _text
+        self._open: str | None = None  # invoice number of the open invoice, None if no invoice is open
+        self._closed: str | None = None  # invoice number of the last invoice yielded
+        self._page: int | None = None  # first page of the open invoice
+        self._last_page: int | None = None
+
+    def feed(self, text: str, page: int = None) -> Iterator[Segment]:
+        """
+        adds the text of the next page, yields the invoices it completes
+
+        Parameters
+        ----------
+        text: str
+            extracted text of the page
+
+        page: int, optional
+            index of the page, reported in the segments (default is None)
+        """
+        self._last_page = page
+        start = max(self._scanned, len(self._text) - LOOKBEHIND)
+        self._text += text if text.endswith('\n') else text + '\n'
+
+        begin = 0  # start of the text not yielded yet
+        for match in self.boundary.finditer(self._text, start):
+            if match.start() < self._scanned:
+                continue  # found on the previous page already
+            previous, self._scanned = self._scanned, match.end()
+            if match.lastgroup == '_invoice':
+                number = match.group('no')
+                if number == self._open or (self._open is None and number == self._closed):
+                    continue  # header of a continuation page, or of a page after the total
+                if self._open is not None:
+                    yield Segment(self._text[begin:match.start()], self._page, page, False)
+                    begin = match.start()
+                else:
+                    begin = max(begin, previous)  # the header of the invoice, without the boundaries before it
+                self._open, self._page = number, page
+            else:
+                end = self._text.find('\n', match.end()) + 1 or len(self._text)
+                yield Segment(self._text[begin:end], page if self._open is None else self._page, page, True)
+                begin = end
+                self._open, self._closed = None, self._open
+
+        if self._open is not None and len(self._text) - begin > self.max_chars:
+            yield Segment(self._text[begin:], self._page, page, False)
+            self._open, self._closed, begin = None, self._open, len(self._text)
+        if self._open is None:
+            # only the end of the text is kept, a header or a field of the next invoice split across the pages
+            begin = max(begin, len(self._text) - LOOKBEHIND)
+        self._text = self._text[begin:]
+        self._scanned = max(0, self._scanned - begin)
+
+    def close(self) -> Iterator[Segment]:
+        """yields the open invoice as incomplete at the end of the text, the segmenter can be used again"""
+        if self._open is not None:
+            yield Segment(self._text, self._page, self._last_page, False)
+        self._text, self._scanned, self._open, self._closed, self._page, self._last_page = '', 0, None, None, None, None
+
+    def split(self, texts: Iterable[str]) -> Iterator[Segment]:
+        """yields the invoices of the text of each page, page indexes start at 0"""
+        for page, text in enumerate(texts):
+            yield from self.feed(text, page)
+        yield from self.close()
+
+    def __repr__(self):
+        return f"InvoiceSegmenter(open={self._open}, buffered={len(self._text)})"
@@ -0,0 +1,393 @@
+"""
+http service parsing uploaded pdfs on a pool of warm worker processes
+
+    python -m invoice_parser.server --port 8080 --workers 4
+
+the workers are started and have PyPDF2 and openpyxl imported before the first request,
+so a request pays for parsing only, not for starting python or importing.
+with --warm-up a.pdf each worker also parses a.pdf once, so even its first request is as fast as the rest.
+
+endpoints
+---------
+POST /parse?format=json|csv|xlsx: the pdf as the body (curl --data-binary @a.pdf)
+    or as the file of a multipart form (curl -F file=@a.pdf).
+    optional query parameters: strict=1, force_invoice_data=1, extractor=<name>,
+    password in the X-PDF-Password header.
+    returns the rows of the table as json (fields, rows, totals and errors), csv, or the xlsx workbook of Export
+GET /metrics: queue depth, requests in flight and latency percentiles as json
+GET /health: 200 once the workers are ready
+
+errors are json {"error": name of the exception, "message": ...}, 422 for a pdf which cannot be parsed,
+400 for invalid parameters, 413 for an upload above max_upload bytes, 503 when max_queue requests are waiting
+"""
+import argparse
+import email.parser
+import email.policy
+import io
+import json
+import logging
+import math
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO
+from urllib.parse import parse_qs, quote, urlsplit
+
+from .errors import InvoiceError
+from .export import Export
+from .exporters import CSVExport, JSONLinesExport
+from .extractors import EXTRACTORS, get_extractor
+from .invoices import Invoices
+from .profiling import logger
+
+CONTENT_TYPES = {
+    'json': 'application/json',
+    'csv': 'text/csv; charset=utf-8',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+}
+
+MAX_UPLOAD = 64 * 2 ** 20  # bytes of the largest pdf accepted
+LATENCY_WINDOW = 1024  # latencies kept for the percentiles of metrics
+
+
+def parse(data: bytes, name: str = 'upload.pdf', format: str = 'json', password: str = None, strict: bool = False,
+          force_invoice_data: bool = False, extractor: str = None) -> tuple[bytes, float]:
+    """
+    parses a pdf and renders its table, runs in a worker
+
+    Parameters
+    ----------
+    data: bytes
+        the pdf
+
+    name: str, optional
+        file name of the pdf, in the errors (default is 'upload.pdf')
+
+    format: str, optional
+        'json', 'csv' or 'xlsx' (default is 'json')
+
+    password, strict, extractor:
+        see Invoices
+
+    force_invoice_data: bool, optional
+        see Invoices.make_table (default is False)
+
+    Returns
+    -------
+    tuple:
+        body of the response and seconds taken
+    """
+    start = time.perf_counter()
+    pdf = BytesIO(data)
+    pdf.name = name
+    invoices = Invoices(pdf, password, lazy=True, extractor=extractor, strict=strict)
+    table = invoices.make_table(force_invoice_data=force_invoice_data)
+
+    if format == 'xlsx':
+        body = BytesIO()
+        Export(table, write_only=True, errors=invoices.errors).save(body)
+        body = body.getvalue()
+    elif format == 'csv':
+        body = io.StringIO()
+        CSVExport(table, footer=True).write(body)
+        body = body.getvalue().encode('utf-8')
+    else:
+        exporter = JSONLinesExport(table, footer=True)  # only its rows and fields are used
+        rows = list(exporter.rows())
+        body = json.dumps({'file': name, 'fields': exporter.fields, 'rows': rows[:-1], 'totals': rows[-1],
+                           'errors': [error._asdict() for error in invoices.errors]},
+                          default=lambda date: date.date().isoformat()).encode('utf-8')
+    return body, time.perf_counter() - start
+
+
+def _init_worker(sample: bytes = None) -> None:
+    # runs once in each worker: imports what Invoices imports on first use, and parses the sample pdf in every
+    # format, which runs the code of PyPDF2 and openpyxl a first time, so the first request is not slower than the rest
+    import PyPDF2  # noqa: F401
+    get_extractor(None)
+    if sample is not None:
+        for format in CONTENT_TYPES:
+            try:
+                parse(sample, 'warm_up.pdf', format)
+            except Exception as e:
+                logger.warning('warm up with the sample pdf failed: %s: %s', type(e).__name__, e)
+                break
+
+
+def _warm_up() -> int:
+    # first task of each worker, the pool has started the process and run _init_worker
+    return os.getpid()
+
+
+class Metrics:
+    """
+    counts and latencies of the requests, thread safe
+
+    latencies are kept for the last LATENCY_WINDOW requests
+    """
+
+    def __init__(self, workers: int):
+        self.workers = workers
+        self.started = time.time()
+        self.in_flight = 0  # requests submitted to the pool and not done
+        self.requests = 0
+        self.failures = 0
+        self.rejected = 0
+        self.latencies: deque[float] = deque(maxlen=LATENCY_WINDOW)  # seconds, request received to response
+        self.parse_times: deque[float] = deque(maxlen=LATENCY_WINDOW)  # seconds of parsing in the worker
+        self._lock = threading.Lock()
+
+    @property
+    def queue_depth(self) -> int:
+        """requests waiting for a free worker"""
+        return max(0, self.in_flight - self.workers)
+
+    def submit(self, max_queue: int) -> bool:
+        """counts a request in flight, False if max_queue requests are already waiting"""
+        with self._lock:
+            if self.in_flight - self.workers >= max_queue:
+                self.rejected += 1
+                return False
+            self.in_flight += 1
+            return True
+
+    def done(self, seconds: float, parse_seconds: float = None) -> None:
+        with self._lock:
+            self.in_flight -= 1
+            self.requests += 1
+            self.latencies.append(seconds)
+            if parse_seconds is None:
+                self.failures += 1
+            else:
+                self.parse_times.append(parse_seconds)
+
+    @staticmethod
+    def _percentiles(values: list[float]) -> dict[str, float]:
+        if not values:
+            return {'count': 0}
+        values = sorted(values)
+
+        def at(q: float) -> float:
+            return round(values[max(0, math.ceil(q * len(values)) - 1)] * 1000, 3)  # nearest rank
+
+        return {'count': len(values), 'mean': round(sum(values) / len(values) * 1000, 3),
+                'p50': at(0.5), 'p95': at(0.95), 'p99': at(0.99), 'max': round(values[-1] * 1000, 3)}
+
+    def report(self) -> dict:
+        """metrics as a dict, latencies in milliseconds"""
+        with self._lock:
+            latencies, parse_times = list(self.latencies), list(self.parse_times)
+            return {
+                'workers': self.workers, 'uptime': round(time.time() - self.started, 3),
+                'queue_depth': self.queue_depth, 'in_flight': self.in_flight,
+                'requests': self.requests, 'failures': self.failures, 'rejected': self.rejected,
+                'latency_ms': self._percentiles(latencies), 'parse_ms': self._percentiles(parse_times),
+            }
+
+
+class ParsingServer(ThreadingHTTPServer):
+    """
+    threading http server which parses on a process pool
+
+    each request is read on its own thread and parsed on one of the workers,
+    at most max_queue requests wait for a worker, later ones get 503 without their upload being read
+
+    Parameters
+    ----------
+    address: tuple[str, int]
+        host and port
+
+    workers: int, optional
+        number of worker processes (default is None, one per cpu)
+
+    max_queue: int, optional
+        requests waiting for a worker before new ones are rejected (default is None, 4 per worker)
+
+    max_upload: int, optional
+        bytes of the largest pdf accepted (default is MAX_UPLOAD, 64 MiB)
+
+    warm_up: bytes, optional
+        a pdf each worker parses once in every format when it starts (default is None, the workers only import),
+        without it the first request of a worker is slower than the rest
+
+    """
+    daemon_threads = True
+
+    def __init__(self, address: tuple[str, int], workers: int = None, max_queue: int = None,
+                 max_upload: int = MAX_UPLOAD, warm_up: bytes = None):
+        self.workers = workers or os.cpu_count() or 1
+        self.max_queue = self.workers * 4 if max_queue is None else max_queue
+        self.max_upload = max_upload
+        self.metrics = Metrics(self.workers)
+        self.executor = ProcessPoolExecutor(self.workers, initializer=_init_worker, initargs=(warm_up,))
+        # start all the workers now, not on the first requests
+        for future in [self.executor.submit(_warm_up) for _ in range(self.workers)]:
+            future.result()
+        super().__init__(address, ParseHandler)
+
+    def server_close(self) -> None:
+        super().server_close()
+        self.executor.shutdown(cancel_futures=True)
+
+
+class ParseHandler(BaseHTTPRequestHandler):
+    server: ParsingServer
+    server_version = 'invoice-parser'
+
+    def do_GET(self):
+        route = urlsplit(self.path).path
+        if route == '/metrics':
+            self._send_json(HTTPStatus.OK, self.server.metrics.report())
+        elif route == '/health':
+            self._send_json(HTTPStatus.OK, {'status': 'ok', 'workers': self.server.workers})
+        else:
+            self._send_error(HTTPStatus.NOT_FOUND, 'NotFound', f'no endpoint {route}')
+
+    def do_POST(self):
+        start = time.perf_counter()
+        url = urlsplit(self.path)
+        if url.path != '/parse':
+            return self._send_error(HTTPStatus.NOT_FOUND, 'NotFound', f'no endpoint {url.path}')
+
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        format = query.get('format', 'json')
+        extractor = query.get('extractor')
+        if format not in CONTENT_TYPES:
+            return self._send_error(HTTPStatus.BAD_REQUEST, 'ValueError',
+                                    f"format should be one of {', '.join(CONTENT_TYPES)}, not {format!r}")
+        if extractor is not None and extractor not in EXTRACTORS:
+            return self._send_error(HTTPStatus.BAD_REQUEST, 'ValueError', f"unknown extractor {extractor!r}")
+
+        length = self.headers.get('Content-Length')
+        if length is None or not length.isdigit():
+            return self._send_error(HTTPStatus.LENGTH_REQUIRED, 'ValueError', 'Content-Length is required')
+        if int(length) > self.server.max_upload:
+            self.close_connection = True
+            return self._send_error(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, 'ValueError',
+                                    f'upload of {length} bytes is larger than {self.server.max_upload} bytes')
+
+        # rejected before the body is read, a full queue does not hold the uploads in memory
+        metrics = self.server.metrics
+        if not metrics.submit(self.server.max_queue):
+            self.close_connection = True
+            return self._send_error(HTTPStatus.SERVICE_UNAVAILABLE, 'QueueFull',
+                                    f'{metrics.queue_depth} requests are waiting', {'Retry-After': '1'})
+        parse_seconds, name = None, 'upload.pdf'
+        try:
+            data, name = self._upload(self.rfile.read(int(length)))
+            if data is None:
+                return self._send_error(HTTPStatus.BAD_REQUEST, 'ValueError', 'no file in the multipart form')
+            future = self.server.executor.submit(
+                parse, data, name, format, self.headers.get('X-PDF-Password'), _flag(query.get('strict')),
+                _flag(query.get('force_invoice_data')), extractor
+            )
+            body, seconds = future.result()
+        except (InvoiceError, FileNotFoundError) as e:
+            self._send_error(HTTPStatus.UNPROCESSABLE_ENTITY, type(e).__name__, str(e).strip())
+        except BrokenProcessPool as e:
+            logger.error('worker pool is broken: %s', e)
+            self._send_error(HTTPStatus.INTERNAL_SERVER_ERROR, type(e).__name__, str(e))
+        except Exception as e:
+            logger.exception('parsing %s failed', name)
+            self._send_error(HTTPStatus.INTERNAL_SERVER_ERROR, type(e).__name__, str(e))
+        else:
+            headers = {'X-Parse-Time': f'{seconds:.6f}'}
+            if format == 'xlsx':
+                headers['Content-Disposition'] = _attachment(f'{os.path.splitext(os.path.basename(name))[0]}.xlsx')
+            try:
+                self._send(HTTPStatus.OK, CONTENT_TYPES[format], body, headers)
+            except OSError as e:  # the client closed the connection
+                self.close_connection = True
+                logger.warning('response of %s not sent: %s', name, e)
+            else:
+                parse_seconds = seconds  # counted as a success only once the response is written
+        finally:
+            metrics.done(time.perf_counter() - start, parse_seconds)
+
+    def _upload(self, body: bytes) -> tuple[bytes | None, str]:
+        # the pdf and its name, from the body or from the file of a multipart form
+        content_type = self.headers.get('Content-Type', '')
+        name = self.headers.get('X-Filename', 'upload.pdf')
+        if not content_type.startswith('multipart/form-data'):
+            return body, name
+        head = f'Content-Type: {content_type}\r\n\r\n'.encode('latin-1')
+        form = email.parser.BytesParser(policy=email.policy.default).parsebytes(head + body)
+        for part in form.iter_parts() if form.is_multipart() else ():
+            if part.get_filename() or part.get_param('name', header='content-disposition') == 'file':
+                return part.get_payload(decode=True), part.get_filename() or name
+        return None, name
+
+    def _send(self, status: HTTPStatus, content_type: str, body: bytes, headers: dict = None) -> None:
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, status: HTTPStatus, value: dict, headers: dict = None) -> None:
+        self._send(status, CONTENT_TYPES['json'], json.dumps(value).encode('utf-8'), headers)
+
+    def _send_error(self, status: HTTPStatus, error: str, message: str, headers: dict = None) -> None:
+        self._send_json(status, {'error': error, 'message': message}, headers)
+
+    def log_message(self, format: str, *args) -> None:
+        logger.info('%s %s', self.address_string(), format % args)
+
+
+def _attachment(filename: str) -> str:
+    """
+    Content-Disposition of a download named filename, which comes from the client
+
+    control characters (CR, LF), quotes and backslashes are removed. filename has an ascii fallback
+    for old clients, filename* (RFC 5987) has the utf-8 name, so any name fits in the latin-1 header
+    """
+    filename = ''.join(char for char in filename if char.isprintable() and char not in '"\\')
+    fallback = filename.encode('ascii', 'replace').decode('ascii').replace('?', '_')
+    return f"attachment; filename=\"{fallback}\"; filename*=UTF-8''{quote(filename, safe='')}"
+
+
+def _flag(value: str | None) -> bool:
+    return (value or '').lower() in ('1', 'true', 'yes')
+
+
+def serve(host: str = '127.0.0.1', port: int = 8080, workers: int = None, max_queue: int = None,
+          max_upload: int = MAX_UPLOAD, warm_up: bytes = None) -> None:
+    """runs a ParsingServer until interrupted, read ParsingServer.__doc__ for parameters"""
+    with ParsingServer((host, port), workers, max_queue, max_upload, warm_up) as server:
+        logger.warning('invoice parser serving on http://%s:%s with %s workers', host, server.server_port,
+                       server.workers)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+
+
+def main(argv: list[str] = None) -> None:
+    arguments = argparse.ArgumentParser(prog='python -m invoice_parser.server',
+                                        description='http service parsing vyapar invoice pdfs')
+    arguments.add_argument('--host', default='127.0.0.1', help='address to listen on (default: 127.0.0.1)')
+    arguments.add_argument('--port', type=int, default=8080, help='port to listen on (default: 8080)')
+    arguments.add_argument('--workers', type=int, help='worker processes (default: one per cpu)')
+    arguments.add_argument('--max-queue', type=int, help='requests waiting for a worker (default: 4 per worker)')
+    arguments.add_argument('--max-upload', type=int, default=MAX_UPLOAD, help='bytes of the largest pdf')
+    arguments.add_argument('--warm-up', metavar='PDF', help='a pdf each worker parses when it starts, '
+                                                            'so the first requests are as fast as the rest')
+    arguments.add_argument('-v', '--verbose', action='store_true', help='log each request')
+    args = arguments.parse_args(argv)
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING, format='%(asctime)s %(message)s')
+    warm_up = None
+    if args.warm_up:
+        with open(args.warm_up, 'rb') as file:
+            warm_up = file.read()
+    serve(args.host, args.port, args.workers, args.max_queue, args.max_upload, warm_up)
+
+
+if __name__ == '__main__':
+    main()
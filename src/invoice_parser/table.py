@@ -1,5 +1,16 @@
 import datetime
+import sys
+from array import array
+from bisect import bisect_left, bisect_right
 from operator import itemgetter
+from typing import Callable, Iterable, Iterator, Sequence
+
+
+# columns summed by Table.aggregate by default
+SUMS = ('QUANTITY', 'TAXABLE\nAMOUNT', 'SGST', 'CGST', 'ROUND\nOFF', 'TOTAL')
+
+# a key of Table.aggregate, a field of the header or (name, function of a row)
+Key = str | tuple[str, Callable[[list], object]]
 
 
 class Table:
@@ -45,7 +56,7 @@ class Table:
     @header.setter
     def header(self, head: list):
         self._header = head if head and len(head) == self.num_cols else [
-            'BILL NO', 'ITEM', 'DATE', 'QUANTITY', 'TAXABLE\nAMOUNT', 'SGST', 'CGST', 'ROUND\nOFF', 'TOTAL', None, None, None, "VALID"
+            'BILL NO', 'ITEM', 'DATE', 'QUANTITY', 'TAXABLE\nAMOUNT', 'SGST', 'CGST', 'ROUND\nOFF', 'TOTAL', 'GST\nRATE', None, None, "VALID"
         ]
 
     @property
@@ -96,6 +107,11 @@ class Table:
         """Append a list/row to the table"""
         self._rows.append(row) if len(row) == len(self._header) else None
 
+    def extend(self, rows: Iterable[list]) -> None:
+        """Append rows to the table, like add_row, e.g. rows of the pages added to a pdf since the last run"""
+        for row in rows:
+            self.add_row(row)
+
     def _find_index(self, field: str) -> int:
         try:
             return self.header.index(field)
@@ -136,6 +152,79 @@ class Table:
             return self._filter("DATE", None, lambda row: from_date <= row[self._find_index("DATE")] <= to_date)
         return self._filter("DATE", None, lambda row: from_date <= row[self._find_index("DATE")])
 
+    def _column(self, field: str) -> int:
+        try:
+            return self.header.index(field)
+        except ValueError:
+            raise ValueError(f"no field {field!r} in the header {self.header}") from None
+
+    def _key(self, key: Key) -> tuple[str, Callable[[list], object]]:
+        if isinstance(key, str):
+            return key, itemgetter(self._find_index(key) if key in ('BILL NO', 'DATE', 'ITEM') else self._column(key))
+        return key
+
+    def month(self, field: str = 'DATE') -> tuple[str, Callable[[list], str | None]]:
+        """key of Table.aggregate, month of the date like 2023-04"""
+        index = self._find_index(field)
+        months = {None: None}  # month of each date, formatted once
+
+        def month(row: list) -> str | None:
+            date = row[index]
+            try:
+                return months[date]
+            except KeyError:
+                value = months[date] = date.strftime('%Y-%m')
+                return value
+
+        return 'MONTH', month
+
+    def gst_rate(self) -> tuple[str, Callable[[list], float | None]]:
+        """key of Table.aggregate, gst rate (sgst + cgst) of the row in percent, as on the invoice"""
+        return 'GST RATE', itemgetter(self._column('GST\nRATE'))
+
+    def aggregate(self, groups: dict[str, Sequence[Key]], sums: Iterable[str] = SUMS) -> dict[str, 'Table']:
+        """
+        count and sums of the rows grouped by keys, for all the groups in a single pass of the rows
+
+        Parameters
+        ----------
+        groups: dict[str, Sequence[Key]]
+            name of each summary and the keys it is grouped by,
+            a key is a field of the header or a tuple of its name and a function of a row,
+            e.g. {'daily': ['DATE'], 'monthly': [table.month(), 'ITEM'], 'rates': [table.gst_rate()]}
+
+        sums: Iterable[str], optional
+            fields of the header to sum (default is SUMS, quantity and the amounts)
+
+        Returns
+        -------
+        dict:
+            a Table per group, with the keys, COUNT and the sums as header, a row per key in sorted order
+            and the totals of the columns as footer (values, not formulas). export them with Export(summaries=...)
+        """
+        sums = list(sums)
+        get_sums = _getter([self._column(field) for field in sums])
+        keys = {name: [self._key(key) for key in group] for name, group in groups.items()}
+
+        # values to sum of the rows of each key, of each group. summed column by column at the end
+        buckets = {name: {} for name in groups}
+        plans = [(buckets[name].setdefault, _key_getter([get for _, get in group])) for name, group in keys.items()]
+        for row in self.rows:
+            values = get_sums(row)
+            for bucket, get_key in plans:
+                bucket(get_key(row), []).append(values)
+
+        tables = {}
+        for name, bucket in buckets.items():
+            totals = {key: [len(values), *(round(sum(filter(None, column)), 3) for column in zip(*values))]
+                      for key, values in bucket.items()}
+            header = [key_name for key_name, _ in keys[name]] + ['COUNT'] + sums
+            rows = [[*key, *total] for key, total in sorted(totals.items(), key=_sort_key)]
+            columns = list(zip(*totals.values())) or [()] * (len(sums) + 1)
+            footer = [None] * len(keys[name]) + [sum(columns[0])] + [round(sum(column), 3) for column in columns[1:]]
+            tables[name] = Table(rows, header, footer, num_cols=len(header))
+        return tables
+
     def __iter__(self):
         for row in (self.header, *self.rows):
             yield row
@@ -145,3 +234,270 @@ class Table:
         for row in self.rows:
             r += '\n' + str(row)
         return r
+
+
+def _getter(indexes: list[int]) -> Callable[[list], tuple]:
+    # tuple of the values of the columns of a row
+    if len(indexes) == 1:
+        index = indexes[0]
+        return lambda row: (row[index],)
+    return itemgetter(*indexes) if indexes else lambda row: ()
+
+
+def _key_getter(getters: list[Callable[[list], object]]) -> Callable[[list], tuple]:
+    # tuple of the keys of a row
+    if len(getters) == 1:
+        get = getters[0]
+        return lambda row: (get(row),)
+    return lambda row: tuple([get(row) for get in getters])
+
+
+def _sort_key(item: tuple) -> tuple:
+    # keys of a summary sorted with None last
+    return tuple((value is None, value) for value in item[0])
+
+
+class _Rows:
+    """
+    read-only list of rows of ColumnarTable, in the table's current order
+
+    rows are built from the columns when accessed,
+    sort and append are passed to the table
+    """
+    def __init__(self, table: 'ColumnarTable'):
+        self._table = table
+
+    def __len__(self):
+        return len(self._table)
+
+    def __getitem__(self, index: int | slice) -> list | list[list]:
+        order = self._table.order
+        if isinstance(index, slice):
+            return [self._table.row(i) for i in order[index]]
+        return self._table.row(order[index])
+
+    def __iter__(self):
+        return map(self._table.row, self._table.order)
+
+    def __eq__(self, other):
+        return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+
+    def sort(self, key=None, reverse=False) -> None:
+        self._table.sort(key, reverse)
+
+    def append(self, row: list) -> None:
+        self._table.add_row(row)
+
+    def __repr__(self):
+        return repr(list(self))
+
+
+class ColumnarTable(Table):
+    """
+    Table stored column by column, for large tables
+
+    numbers are stored in array('d')/array('q'), dates as ordinals,
+    strings (ITEM) as codes of interned categories and bools in array('b').
+    a column with mixed types is kept as a list.
+
+    sort permutations and per value/date indexes are built once on the first use,
+    so sorting is a lookup and filtering is an index lookup or a binary search.
+    rows are built from the columns when accessed, the row list API of Table works as is.
+    rows is a read-only view, use add_row to append
+
+    read Table.__doc__ for parameters, rows can be any iterable of rows,
+    it is consumed one row at a time
+    """
+
+    # column kinds
+    _FLOAT, _INT, _BOOL, _DATE, _CATEGORY, _LIST = 'd', 'q', 'b', 'date', 'category', 'list'
+
+    @property
+    def rows(self) -> _Rows:
+        return _Rows(self)
+
+    @rows.setter
+    def rows(self, rows: Iterable[list] = None):
+        self._kinds: list[str] = []
+        self._columns: list = []
+        self._categories: list[list[str]] = []  # categories of each column, empty if not a category column
+        self._codes: list[dict[str, int]] = []
+        self._getters: list = []  # returns the value of the column at a position
+        self._length = 0
+        self._order = None  # None is insertion order
+        self._rank = None
+        self._permutations: dict[tuple[int, bool], array] = {}
+        self._indexes: dict = {}
+        for row in rows or ():
+            self.add_row(row)
+
+    @property
+    def order(self) -> range | array:
+        """current order of rows, as positions of inserted rows"""
+        return range(self._length) if self._order is None else self._order
+
+    @order.setter
+    def order(self, order: array | None):
+        self._order = order
+        self._rank = None
+
+    @property
+    def is_empty(self):
+        return self._length == 0
+
+    def __len__(self):
+        return self._length
+
+    @classmethod
+    def _kind(cls, value) -> str:
+        if isinstance(value, bool):
+            return cls._BOOL
+        if isinstance(value, int):
+            return cls._INT
+        if isinstance(value, float):
+            return cls._FLOAT
+        if isinstance(value, datetime.datetime) and value.time() == datetime.time() and not value.tzinfo:
+            return cls._DATE
+        if isinstance(value, str):
+            return cls._CATEGORY
+        return cls._LIST
+
+    def _getter(self, col: int):
+        kind, column, categories = self._kinds[col], self._columns[col], self._categories[col]
+        if kind == self._DATE:
+            return lambda i: datetime.datetime.fromordinal(column[i])
+        if kind == self._CATEGORY:
+            return lambda i: categories[column[i]]
+        if kind == self._BOOL:
+            return lambda i: bool(column[i])
+        return column.__getitem__
+
+    def _add_column(self, value) -> None:
+        kind = self._kind(value)
+        self._kinds.append(kind)
+        self._columns.append(array('q') if kind in (self._DATE, self._CATEGORY) else [] if kind == self._LIST else array(kind))
+        self._categories.append([])
+        self._codes.append({})
+        self._getters.append(self._getter(len(self._kinds) - 1))
+
+    def _encode(self, col: int, value):
+        kind = self._kinds[col]
+        if kind != self._kind(value):
+            raise TypeError
+        if kind == self._DATE:
+            return value.toordinal()
+        if kind == self._CATEGORY:
+            codes = self._codes[col]
+            if value not in codes:
+                codes[value] = len(codes)
+                self._categories[col].append(sys.intern(value))
+            return codes[value]
+        return value
+
+    def _to_list(self, col: int) -> None:
+        # column has a value of another type, keeps the column as a plain list
+        self._columns[col] = list(map(self._getters[col], range(self._length)))
+        self._kinds[col] = self._LIST
+        self._getters[col] = self._getter(col)
+
+    def add_row(self, row: list) -> None:
+        """Append a list/row to the table"""
+        if not self._kinds:
+            for value in row:
+                self._add_column(value)
+        elif len(row) != len(self._kinds):
+            return
+
+        for col, value in enumerate(row):
+            if self._kinds[col] != self._LIST:
+                try:
+                    self._columns[col].append(self._encode(col, value))
+                    continue
+                except (TypeError, OverflowError):
+                    self._to_list(col)
+            self._columns[col].append(value)
+
+        # new row goes to the end of current order, like list.append
+        if self._order is not None:
+            self._order.append(self._length)
+            self._rank = None
+        self._length += 1
+        if self._permutations or self._indexes:
+            self._permutations, self._indexes = {}, {}
+
+    def row(self, i: int) -> list:
+        """returns the row inserted at position i"""
+        return [get(i) for get in self._getters]
+
+    def column(self, field: str) -> list:
+        """returns values of the field in the current order"""
+        return list(map(self._getters[self._find_index(field)], self.order))
+
+    def _sort_key(self, col: int):
+        # dates and numbers sort on their stored values, others on their values
+        if self._kinds[col] in (self._FLOAT, self._INT, self._DATE):
+            return self._columns[col].__getitem__
+        return self._getters[col]
+
+    def _permutation(self, col: int, reverse: bool = False) -> array:
+        if (col, reverse) not in self._permutations:
+            self._permutations[col, reverse] = array('q', sorted(range(self._length), key=self._sort_key(col), reverse=reverse))
+        return self._permutations[col, reverse]
+
+    def _sort(self, field_index: int, reverse=False) -> None:
+        if not self._length:
+            return
+        if self._order is None:
+            # sorting the insertion order, the permutation is kept for later sorts
+            self.order = array('q', self._permutation(field_index, reverse))
+        else:
+            self.order = array('q', sorted(self._order, key=self._sort_key(field_index), reverse=reverse))
+
+    def sort(self, key=None, reverse=False) -> None:
+        """sorts rows like list.sort, key is called with each row"""
+        key = key or (lambda row: row)
+        self.order = array('q', sorted(self.order, key=lambda i: key(self.row(i)), reverse=reverse))
+
+    def _in_order(self, positions: Iterable[int]) -> list[int]:
+        # positions of inserted rows, in the current order of table
+        if self._order is None:
+            return sorted(positions)
+        if self._rank is None:
+            self._rank = array('q', bytes(8 * self._length))
+            for i, position in enumerate(self._order):
+                self._rank[position] = i
+        return sorted(positions, key=self._rank.__getitem__)
+
+    def _index(self, col: int) -> dict:
+        # positions of rows by value of the column
+        if col not in self._indexes:
+            index = {}
+            for i, value in enumerate(map(self._getters[col], range(self._length))):
+                index.setdefault(value, array('q')).append(i)
+            self._indexes[col] = index
+        return self._indexes[col]
+
+    def _filter(self, field, value, key=None) -> Iterator[list]:
+        if key:
+            return filter(key, self.rows)
+        return map(self.row, self._in_order(self._index(self._find_index(field)).get(value, ())))
+
+    def filter_by_date(self, from_date: datetime.datetime, to_date: datetime.datetime = None) -> Iterator[list] | _Rows:
+        if to_date and to_date < from_date:
+            return self.rows
+
+        col = self._find_index("DATE")
+        if not self._kinds or self._kinds[col] != self._DATE:
+            return super().filter_by_date(from_date, to_date)
+
+        # binary search on the dates sorted once
+        permutation = self._permutation(col)
+        if 'dates' not in self._indexes:
+            self._indexes['dates'] = array('q', map(self._columns[col].__getitem__, permutation))
+        dates = self._indexes['dates']
+
+        # dates are at midnight, so a date is on or after from_date if its day is after from_date's day
+        start = from_date.toordinal() + (isinstance(from_date, datetime.datetime) and from_date.time() != datetime.time())
+        lo = bisect_left(dates, start)
+        hi = bisect_right(dates, to_date.toordinal()) if to_date else len(dates)
+        return map(self.row, self._in_order(permutation[lo:hi]))
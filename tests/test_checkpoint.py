@@ -0,0 +1,53 @@
+"""the checkpoint is recorded only by commit_checkpoint, resumed tells whether the rows can be appended"""
+import pytest
+
+from invoice_parser import Checkpoint, Invoices
+
+import corpus
+
+
+@pytest.fixture
+def texts() -> list[str]:
+    return corpus.pages(12)
+
+
+def test_parsing_does_not_update_checkpoint(texts, tmp_path):
+    pdf = corpus.write_pdf(tmp_path / 'export.pdf', texts[:8])
+    checkpoint = Checkpoint(tmp_path / 'checkpoint.json')
+
+    Invoices(pdf, checkpoint=checkpoint)
+    assert checkpoint.get('export.pdf') is None
+
+    invoices = Invoices(pdf, checkpoint=checkpoint)
+    assert not invoices.resumed and len(invoices.invoices) == 8
+
+
+def test_resumed_after_commit(texts, tmp_path):
+    pdf = corpus.write_pdf(tmp_path / 'export.pdf', texts[:8])
+    Invoices(pdf, checkpoint=tmp_path / 'checkpoint.json').commit_checkpoint()
+
+    corpus.write_pdf(pdf, texts)
+    invoices = Invoices(pdf, checkpoint=tmp_path / 'checkpoint.json')
+    assert invoices.resumed and invoices.start_page == 8
+    assert [invoice.invoice_no for invoice in invoices.invoices] == [9, 10, 11, 12]
+
+
+def test_changed_pages_are_parsed_again(texts, tmp_path):
+    pdf = corpus.write_pdf(tmp_path / 'export.pdf', texts[:8])
+    Invoices(pdf, checkpoint=tmp_path / 'checkpoint.json').commit_checkpoint()
+
+    corpus.write_pdf(pdf, texts[1:])  # the last recorded page is not the same page any more
+    invoices = Invoices(pdf, checkpoint=tmp_path / 'checkpoint.json')
+    assert not invoices.resumed and invoices.start_page == 0 and len(invoices.invoices) == 11
+
+
+def test_commit_needs_all_pages_parsed(texts, tmp_path):
+    pdf = corpus.write_pdf(tmp_path / 'export.pdf', texts)
+    invoices = Invoices(pdf, lazy=True, checkpoint=tmp_path / 'checkpoint.json')
+    next(invoices.iter_pages())
+    with pytest.raises(ValueError):
+        invoices.commit_checkpoint()
+
+    list(invoices.iter_pages())
+    invoices.commit_checkpoint()
+    assert invoices.checkpoint.get('export.pdf')['pages'] == len(texts)
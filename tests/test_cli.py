@@ -0,0 +1,22 @@
+"""invoice-parser command"""
+import io
+
+from invoice_parser import cli
+
+
+def test_clashing_outputs_exit_before_converting(tmp_path):
+    for directory in ('a', 'b'):
+        (tmp_path / directory).mkdir()
+        (tmp_path / directory / 'day.pdf').write_bytes(b'')
+    output = tmp_path / 'out'
+    stream = io.StringIO()
+
+    code = cli.main([str(tmp_path / 'a' / 'day.pdf'), str(tmp_path / 'b' / 'day.pdf'), '-o', str(output)], stream)
+    assert code == cli.EXIT_USAGE
+    assert 'day.xlsx' in stream.getvalue() and not output.exists()
+
+
+def test_errors_file_of_csv_clashes(tmp_path):
+    pdfs = [tmp_path / 'day.pdf', tmp_path / 'day.errors.pdf']
+    assert list(cli.clashing_outputs(pdfs, None, 'csv').values()) == [pdfs]
+    assert cli.clashing_outputs(pdfs, None, 'xlsx') == {}
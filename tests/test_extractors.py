@@ -0,0 +1,47 @@
+"""every installed extraction backend gives InvoiceParser the same fields as the invoice text it was written from"""
+import pytest
+
+from invoice_parser import InvoiceParser
+from invoice_parser.exporters import Exporter
+from invoice_parser.extractors import EXTRACTORS, Extractor, get_extractor
+from PyPDF2 import PdfReader
+
+import corpus
+
+PAGES = 25
+
+
+def fields(text: str) -> tuple:
+    """parsed fields of the invoice, items as the values passed to Item (their descriptions may differ in spaces)"""
+    invoice = InvoiceParser(text)
+    return {key: value for key, value in invoice.fields.items() if key != 'items_raw'}, invoice.item_values
+
+
+@pytest.fixture(scope='module')
+def texts() -> list[str]:
+    return corpus.pages(PAGES)
+
+
+@pytest.fixture(scope='module')
+def pdf(texts, tmp_path_factory):
+    return corpus.write_pdf(tmp_path_factory.mktemp('extractors') / 'invoices.pdf', texts)
+
+
+@pytest.mark.parametrize('name', EXTRACTORS)
+def test_fields_of_backend(name, texts, pdf):
+    try:
+        extractor = get_extractor(name)
+    except ImportError as e:
+        pytest.skip(str(e))
+    reader = PdfReader(pdf)
+    extractor = extractor.bind(reader)
+
+    assert len(reader.pages) == len(texts)
+    for index, text in enumerate(texts):
+        assert fields(extractor.extract(index)) == fields(text), f"page {index + 1}"
+
+
+@pytest.mark.parametrize('base', [Extractor, Exporter])
+def test_base_is_abstract(base):
+    with pytest.raises(TypeError):
+        base([]) if base is Exporter else base()
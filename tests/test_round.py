@@ -0,0 +1,67 @@
+"""Round.round, cached_round, round_many and batch.round_values round as the recursive Round.round they replace"""
+import functools
+import math
+
+import pytest
+
+from invoice_parser.batch import round_values
+from invoice_parser.round import Round, cached_round, round_many
+
+from bench_round import corpus, round_before
+
+DECIMALS = (-1, 0, 1, 2, 3, 4, 6)
+VALUES = 20_000  # of each seed
+
+
+def result(func, n, decimal):
+    # same type and repr, so -0.0 is not 0.0, or the same error for nan and infinity
+    try:
+        value = func(n, decimal)
+    except (ValueError, OverflowError) as error:
+        return type(error)
+    return type(value), repr(value)
+
+
+def each(func):
+    return lambda values, decimal: [result(func, n, decimal) for n in values]
+
+
+def column(func):
+    return lambda values, decimal: [(type(value), repr(value)) for value in func(values, decimal)]
+
+
+FUNCTIONS = {
+    'Round.round': each(Round.round),
+    'cached_round': each(cached_round(256)),
+    'round_many': column(round_many),
+    'round_values': column(lambda values, decimal: round_values(values, decimal, use_numpy=False)),
+    'round_values numpy': column(lambda values, decimal: round_values(values, decimal, use_numpy=True)),
+}
+
+
+@functools.lru_cache
+def values(seed: int) -> list:
+    return corpus(VALUES, seed)
+
+
+@functools.lru_cache
+def expected(seed: int, decimal: int) -> list:
+    return each(round_before)(values(seed), decimal)
+
+
+@pytest.mark.parametrize('seed', [0, 1, 2])
+@pytest.mark.parametrize('decimal', DECIMALS)
+@pytest.mark.parametrize('name', FUNCTIONS)
+def test_rounds_as_before(name, decimal, seed):
+    if name.endswith('numpy'):
+        pytest.importorskip('numpy')
+    rounded = FUNCTIONS[name](values(seed), decimal)
+    differs = [(n, old, new) for n, old, new in zip(values(seed), expected(seed, decimal), rounded) if old != new]
+    assert not differs, f"{len(differs)} values differ, first {differs[0]}"
+
+
+@pytest.mark.parametrize('n', [math.nan, math.inf, -math.inf])
+@pytest.mark.parametrize('decimal', [0, 3])
+@pytest.mark.parametrize('func', [Round.round, cached_round(256)])
+def test_same_error_as_before(func, n, decimal):
+    assert result(func, n, decimal) == result(round_before, n, decimal)
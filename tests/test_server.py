@@ -0,0 +1,40 @@
+"""http parsing service"""
+import threading
+import urllib.request
+
+import pytest
+
+from invoice_parser.server import ParsingServer, _attachment
+
+import corpus
+
+
+@pytest.fixture(scope='module')
+def server():
+    with ParsingServer(('127.0.0.1', 0), workers=1) as server:
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        yield server
+        server.shutdown()
+
+
+def test_attachment_of_any_filename():
+    header = _attachment('बिल "day"\r\nSet-Cookie: a.xlsx')
+    assert '\r' not in header and '\n' not in header
+    assert header.startswith('attachment; filename="___ daySet-Cookie: a.xlsx"; ')
+    assert header.endswith("filename*=UTF-8''%E0%A4%AC%E0%A4%BF%E0%A4%B2%20daySet-Cookie%3A%20a.xlsx")
+    header.encode('latin-1')
+
+
+def test_xlsx_of_non_latin1_filename(server, tmp_path):
+    pdf = corpus.write_pdf(tmp_path / 'invoices.pdf', corpus.pages(2)).read_bytes()
+    boundary = 'invoice-parser-test'
+    body = (f'--{boundary}\r\nContent-Disposition: form-data; name="file"; filename="बिल.pdf"\r\n'
+            f'Content-Type: application/pdf\r\n\r\n').encode('utf-8') + pdf + f'\r\n--{boundary}--\r\n'.encode()
+    request = urllib.request.Request(f'http://127.0.0.1:{server.server_port}/parse?format=xlsx', data=body,
+                                     headers={'Content-Type': f'multipart/form-data; boundary={boundary}'})
+
+    with urllib.request.urlopen(request) as response:
+        assert response.read()[:2] == b'PK'
+        assert response.headers['Content-Disposition'].endswith("filename*=UTF-8''%E0%A4%AC%E0%A4%BF%E0%A4%B2.xlsx")
+    metrics = server.metrics.report()
+    assert metrics['requests'] >= 1 and metrics['failures'] == 0
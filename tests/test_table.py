@@ -0,0 +1,22 @@
+"""Table.aggregate keys"""
+import datetime
+
+from invoice_parser import InvoiceParser, Table
+
+
+def invoice(invoice_no: int, amount: str, rate: float) -> InvoiceParser:
+    gst = round(float(amount) * rate / 100 + 1e-9, 2)
+    return InvoiceParser.from_fields({
+        'invoice_no': invoice_no, 'date': datetime.datetime(2023, 4, 1), 'sub_total': float(amount),
+        'gst': [('SGST', rate, gst), ('CGST', rate, gst)], 'round_off': 0.0, 'total': None,
+        'items_raw': [{'item': 'gold', 'quantity': '1.0', 'amount': amount}],
+    })
+
+
+def test_gst_rate_is_the_rate_of_the_invoice():
+    # 1.00 at 1.5% has 0.02 sgst and cgst, 4% if the rate were taken from the rounded amounts
+    invoices = [invoice(1, '1.00', 1.5), invoice(2, '25112.33', 2.5), invoice(3, '0.40', 0.125)]
+    table = Table(rows=[row for invoice in invoices for row in invoice.rows()])
+
+    rates = table.aggregate({'rates': [table.gst_rate()]})['rates']
+    assert [row[:2] for row in rates.rows] == [[0.25, 1], [3.0, 1], [5.0, 1]]